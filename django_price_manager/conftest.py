@@ -0,0 +1,32 @@
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict
+
+import pytest
+from data_provider.models import Event
+
+
+@pytest.fixture
+def event_data() -> Dict[str, Any]:
+    # A booking event as posted to the events API
+    return {
+        "hotel_id": 1,
+        "event_timestamp": "2020-01-01T00:00:00Z",
+        "status": 1,
+        "room_reservation_id": "0013e338-0158-4d5c-8698-aebe00cba360",
+        "night_of_stay": "2020-01-01",
+    }
+
+
+@pytest.fixture
+def create_event() -> Callable[..., Event]:
+    # Events are bookings of hotel 1 unless overridden, each of its own reservation
+    def create(**fields: Any) -> Event:
+        defaults = {
+            "hotel_id": 1,
+            "timestamp": datetime(2020, 1, 1, tzinfo=timezone.utc),
+            "rpg_status": Event.BOOKING,
+            "night_of_stay": date(2020, 1, 1),
+        }
+        return Event.objects.create(**{**defaults, **fields})
+
+    return create
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class DashboardServiceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "dashboard_service"
+
+    def ready(self) -> None:
+        from data_provider.signals import events_ingested
+
+        from .signals import schedule_dashboard_update
+
+        events_ingested.connect(
+            schedule_dashboard_update, dispatch_uid="schedule_dashboard_update"
+        )
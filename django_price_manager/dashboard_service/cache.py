@@ -0,0 +1,137 @@
+"""
+Module implementing the response cache of the dashboard endpoints.
+
+Responses are cached under the entity tag of their query, which combines the normalized
+query with the versions of the queried data (see `django_price_manager.versions`). The
+dashboard updater bumps the version of every hotel whose rows it changes, and a rebuild
+bumps the epoch of the whole dashboard data. A changed row therefore makes the next
+query compute a new key and miss, without deleting cached responses: outdated entries
+are never read again and expire after `DASHBOARD_CACHE_TIMEOUT`.
+
+On a miss, a lock held in the cache lets a single process compute the response while
+the concurrent requests for the same key wait for it to be cached (single flight).
+Hits, misses and coalesced requests are counted in the cache. Responses are only cached
+in a cache shared by every process, see `versions.cache_is_shared`.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from django_price_manager import versions
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "dashboard"
+STAT_NAMES = ("hits", "misses", "coalesced")
+
+# Number of seconds a miss is locked for, and waited for by concurrent requests
+LOCK_TIMEOUT: float = 5.0
+# Number of seconds between two cache reads while waiting for a locked miss
+LOCK_POLL_INTERVAL: float = 0.02
+
+
+def get_versions(hotel_ids: Optional[Iterable[int]]) -> List[int]:
+    """
+    Return the versions of the dashboard data of hotels.
+
+    Args:
+        hotel_ids (Optional[Iterable[int]]): The hotel IDs, None for every hotel.
+
+    Returns:
+        List[int]: The epoch, then the versions in the order of the sorted hotel IDs.
+    """
+    return versions.get_versions(KEY_PREFIX, hotel_ids)
+
+
+def bump_versions(hotel_ids: Iterable[int]) -> None:
+    """
+    Invalidate the cached responses of hotels by bumping their versions.
+
+    Args:
+        hotel_ids (Iterable[int]): The IDs of the hotels whose data changed.
+    """
+    versions.bump_versions(KEY_PREFIX, hotel_ids)
+
+
+def bump_epoch() -> None:
+    """
+    Invalidate every cached response, after the whole dashboard data was replaced.
+    """
+    versions.bump_epoch(KEY_PREFIX)
+
+
+def increment(key: str) -> None:
+    """
+    Increment a counter stored in the cache, creating it if missing.
+
+    Args:
+        key (str): The cache key of the counter.
+    """
+    if cache.add(key, 1, timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between the two calls
+        cache.add(key, 1, timeout=None)
+
+
+def cached_response(etag: str, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+    """
+    Return the cached response to a query, computing it on a miss.
+
+    Args:
+        etag (str): The entity tag of the query, see `versions.versions_etag`.
+        compute (Callable[[], Any]): Computes the response data.
+
+    Returns:
+        Tuple[Any, bool]: The response data, and whether it was read from the cache.
+    """
+    # Versions bumped by the workers are not seen through a per-process cache
+    if not settings.DASHBOARD_CACHE_TIMEOUT or not versions.cache_is_shared():
+        return compute(), False
+    key = f"{KEY_PREFIX}:response:{etag}"
+    data = cache.get(key)
+    if data is not None:
+        increment(f"{KEY_PREFIX}:stats:hits")
+        return data, True
+
+    lock_key = f"{key}:lock"
+    if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        # Another request is computing the response, wait for it
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            data = cache.get(key)
+            if data is not None:
+                increment(f"{KEY_PREFIX}:stats:coalesced")
+                return data, True
+        logger.warning("Timed out waiting for a cached dashboard response")
+
+    increment(f"{KEY_PREFIX}:stats:misses")
+    try:
+        data = compute()
+        cache.set(key, data, timeout=settings.DASHBOARD_CACHE_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+    return data, False
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Return the counters of the dashboard response cache.
+
+    Returns:
+        Dict[str, Any]: The hits, misses and coalesced requests, and the hit ratio.
+    """
+    values = cache.get_many([f"{KEY_PREFIX}:stats:{name}" for name in STAT_NAMES])
+    stats = {name: values.get(f"{KEY_PREFIX}:stats:{name}", 0) for name in STAT_NAMES}
+    requests = stats["hits"] + stats["misses"] + stats["coalesced"]
+    stats["hit_ratio"] = (
+        (stats["hits"] + stats["coalesced"]) / requests if requests else 0.0
+    )
+    return stats
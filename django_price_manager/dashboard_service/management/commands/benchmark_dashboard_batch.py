@@ -0,0 +1,113 @@
+"""
+This module implements a benchmark of the dashboard endpoint for portfolio views. It seeds a year of dashboard data for
+a number of hotels, then compares the latency of fetching their monthly data with one request per hotel, with a single
+GET listing the hotels and with a single POST. The seeded rows are rolled back at the end of the run.
+"""
+
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Callable
+
+from dashboard_service.models import DashboardData
+from dashboard_service.rollups import rollup
+from dashboard_service.tasks import apply_deltas
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+from rest_framework.test import APIClient
+
+
+def seed_dashboard_data(hotels: int, year: int) -> None:
+    """
+    Insert one booking per day of a year for each hotel, with its rollups.
+
+    Args:
+        hotels (int): The number of hotels, with IDs from 1 to `hotels`.
+        year (int): The year of the data.
+    """
+    days = (date(year + 1, 1, 1) - date(year, 1, 1)).days
+    for hotel_id in range(1, hotels + 1):
+        day_deltas = Counter()
+        for offset in range(days):
+            day = date(year, 1, 1) + timedelta(days=offset)
+            day_deltas[(hotel_id, day.year, day.month, day.day, "day")] += 1
+        apply_deltas(rollup(day_deltas))
+
+
+class Command(BaseCommand):
+    """
+    Django management command to benchmark multi-hotel dashboard queries.
+    """
+
+    help = "Compares the latency of per-hotel and batched dashboard requests"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--hotels",
+            type=lambda value: [int(count) for count in value.split(",")],
+            default=[1, 10, 100, 500],
+            help="Comma separated numbers of hotels to query.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Seeds the dashboard data and times the three ways of querying it.
+        """
+        client = APIClient()
+        year = 2021
+        database = router.db_for_write(DashboardData)
+        with transaction.atomic(using=database):
+            seed_dashboard_data(max(options["hotels"]), year)
+
+            self.stdout.write(
+                f"{'hotels':>8} {'per-hotel GET':>15} {'batch GET':>12} {'batch POST':>12}"
+            )
+            for hotels in options["hotels"]:
+                hotel_ids = list(range(1, hotels + 1))
+                per_hotel = self.time(
+                    lambda: [
+                        client.get(
+                            "/dashboard/",
+                            {"hotel_id": hotel_id, "period": "month", "year": year},
+                        )
+                        for hotel_id in hotel_ids
+                    ]
+                )
+                batch_get = self.time(
+                    lambda: client.get(
+                        "/dashboard/",
+                        {
+                            "hotel_id": ",".join(map(str, hotel_ids)),
+                            "period": "month",
+                            "year": year,
+                        },
+                    )
+                )
+                batch_post = self.time(
+                    lambda: client.post(
+                        "/dashboard/",
+                        {"hotel_ids": hotel_ids, "periods": ["month"], "year": year},
+                        format="json",
+                    )
+                )
+                self.stdout.write(
+                    f"{hotels:>8} {per_hotel:>12.1f} ms {batch_get:>9.1f} ms {batch_post:>9.1f} ms"
+                )
+
+            # Leave the database untouched
+            transaction.set_rollback(True, using=database)
+
+    @staticmethod
+    def time(run: Callable[[], Any]) -> float:
+        """
+        Time a run of requests.
+
+        Args:
+            run (Callable[[], Any]): Sends the requests.
+
+        Returns:
+            float: The duration of the run in milliseconds.
+        """
+        start = time.perf_counter()
+        run()
+        return (time.perf_counter() - start) * 1000
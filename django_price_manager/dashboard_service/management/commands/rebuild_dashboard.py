@@ -0,0 +1,534 @@
+"""
+This module implements a full rebuild of the dashboard data from the events. The daily booking counts are computed by
+the data provider database with `GROUP BY` queries, one per hotel and year, run in parallel by a process pool, and the
+week, month, quarter and year counts are rolled up from the daily ones. Like in the incremental updates, cancellations
+count on the day of the booking they cancel, found with a correlated subquery. The same queries group the events by
+night of stay, which yields the booking curve rows. The rows of each partition are written to shadow tables as soon as
+it is aggregated, in a short transaction of its own, so the incremental updates are not blocked by the rebuild; the
+daily rows of a hotel are rolled up once all its years are aggregated. The reservation index, the last booking of each
+reservation, is selected by the data provider database and streamed into its shadow table. The shadow tables are then
+copied over the dashboard tables in a single transaction that also moves the dashboard checkpoints to the last rebuilt
+event, so the incremental updates resume from there.
+
+Only the events up to the last event ID at the start of the run are rebuilt; events inserted during the run are left
+to the incremental updates.
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from itertools import islice
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple, Type
+
+import django
+from dashboard_service.cache import bump_epoch
+from dashboard_service.models import (
+    BookingCurve,
+    DashboardCheckpoint,
+    DashboardData,
+    ReservationIndex,
+)
+from dashboard_service.rollups import rollup
+from dashboard_service.tasks import CHECKPOINT_NAME, INITIAL_WATERMARK, Watermark
+from data_provider.models import Event
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, models, router, transaction
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, TruncDay
+from django.utils.timezone import get_current_timezone, make_aware, now
+
+logger = logging.getLogger("django_price_manager")
+
+# A booking curve row, as `(hotel_id, night_of_stay, lead_time_days, net_bookings)`
+CurveRow = Tuple[int, date, int, int]
+
+# The rebuilt tables and the columns of their rows
+REBUILT_COLUMNS: Dict[Type[models.Model], Tuple[str, ...]] = {
+    DashboardData: ("hotel_id", "period", "year", "month", "day", "booking_count"),
+    BookingCurve: ("hotel_id", "night_of_stay", "lead_time_days", "net_bookings"),
+    ReservationIndex: ("room_reservation_id", "hotel_id", "booked_at", "night_of_stay"),
+}
+
+# Number of shadow rows inserted per query
+INSERT_BATCH_SIZE: int = 10_000
+
+# Minimum number of seconds between two progress reports
+PROGRESS_INTERVAL: float = 1.0
+
+
+class PartitionAggregate(NamedTuple):
+    """
+    The aggregated events of a hotel and year partition.
+
+    Attributes:
+        hotel_id (int): The ID of the hotel.
+        day_deltas (Counter): The booking counts of the daily dashboard rows, keyed by
+        `(hotel_id, year, month, day, "day")`. Cancelled bookings may fall in an
+        earlier year of the hotel.
+        curve_rows (List[CurveRow]): The booking curve rows.
+        events (int): The number of events.
+    """
+
+    hotel_id: int
+    day_deltas: Counter
+    curve_rows: List[CurveRow]
+    events: int
+
+
+class Command(BaseCommand):
+    """
+    Django management command to rebuild the dashboard data from the events.
+    """
+
+    help = "Rebuilds the dashboard data of every period from the events"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of processes aggregating the events, 1 to aggregate in-process.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Aggregates the events into the shadow table and swaps it in.
+        """
+        start = time.perf_counter()
+        watermark = snapshot_watermark()
+        partitions = list_partitions(watermark)
+        self.stdout.write(
+            f"Rebuilding {len(partitions)} hotel/year partitions up to "
+            f"#{watermark} with {options['workers']} workers"
+        )
+
+        database = router.db_for_write(DashboardData)
+        events = 0
+        curve_rows = 0
+        dashboard_rows = 0
+        # Cancellations and weeks cross years, so the daily rows of a hotel are kept
+        # until all its partitions are aggregated
+        remaining = Counter(hotel_id for hotel_id, _ in partitions)
+        day_deltas: Dict[int, Counter] = defaultdict(Counter)
+        last_report = start
+        try:
+            create_shadow_tables(database)
+            for done, partition in enumerate(
+                aggregate_partitions(partitions, watermark, options["workers"]),
+                start=1,
+            ):
+                hotel_id = partition.hotel_id
+                day_deltas[hotel_id].update(partition.day_deltas)
+                remaining[hotel_id] -= 1
+                with transaction.atomic(using=database):
+                    write_shadow_rows(database, BookingCurve, partition.curve_rows)
+                    if not remaining[hotel_id]:
+                        dashboard_rows += write_dashboard_rows(
+                            database, day_deltas.pop(hotel_id)
+                        )
+                events += partition.events
+                curve_rows += len(partition.curve_rows)
+                if (
+                    time.perf_counter() - last_report >= PROGRESS_INTERVAL
+                    or done == len(partitions)
+                ):
+                    last_report = time.perf_counter()
+                    self.report(done, len(partitions), events, last_report - start)
+
+            write_reservation_index(database, watermark)
+            swap_shadow_tables(database, watermark)
+        except Exception as e:
+            raise CommandError(f"Error rebuilding the dashboard data: {e}")
+        finally:
+            drop_shadow_tables(database)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {dashboard_rows:,} dashboard rows and {curve_rows:,} booking curve rows "
+                f"from {events:,} events in {elapsed:.1f}s "
+                f"({events / elapsed:,.0f} events/sec)"
+            )
+        )
+
+    def report(self, done: int, total: int, events: int, elapsed: float) -> None:
+        """
+        Print the progress of the aggregation.
+
+        Args:
+            done (int): The number of aggregated partitions.
+            total (int): The total number of partitions.
+            events (int): The number of aggregated events.
+            elapsed (float): The seconds elapsed since the start of the run.
+        """
+        throughput = events / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f"{done}/{total} partitions, {events:,} events ({throughput:,.0f} events/sec)"
+        )
+
+
+def snapshot_watermark() -> Watermark:
+    """
+    Return the ID of the last event, the end of the rebuild.
+
+    Returns:
+        Watermark: The ID of the last event, or the initial watermark without events.
+    """
+    last_event_id = (
+        Event.objects.using(router.db_for_read(Event))
+        .order_by("-id")
+        .values_list("id", flat=True)
+        .first()
+    )
+    return last_event_id or INITIAL_WATERMARK
+
+
+def events_up_to(queryset: QuerySet, watermark: Watermark) -> QuerySet:
+    """
+    Filter events up to the event with the given ID.
+
+    Args:
+        queryset (QuerySet): The events to filter.
+        watermark (Watermark): The ID of the last event to keep.
+
+    Returns:
+        QuerySet: The events with an ID up to the watermark.
+    """
+    return queryset.filter(id__lte=watermark)
+
+
+def list_partitions(watermark: Watermark) -> List[Tuple[int, int]]:
+    """
+    List the hotel and year partitions of the events to rebuild.
+
+    Args:
+        watermark (Watermark): The ID of the last event to rebuild.
+
+    Returns:
+        List[Tuple[int, int]]: The `(hotel_id, year)` partitions.
+    """
+    events = events_up_to(Event.objects.using(router.db_for_read(Event)), watermark)
+    timestamps = events.aggregate(first=Min("timestamp"), last=Max("timestamp"))
+    if timestamps["first"] is None:
+        return []
+    first_year = timestamps["first"].astimezone(get_current_timezone()).year
+    last_year = timestamps["last"].astimezone(get_current_timezone()).year
+    hotel_ids = (
+        events.order_by("hotel_id").values_list("hotel_id", flat=True).distinct()
+    )
+    return [
+        (hotel_id, year)
+        for hotel_id in hotel_ids
+        for year in range(first_year, last_year + 1)
+    ]
+
+
+def aggregate_partitions(
+    partitions: List[Tuple[int, int]], watermark: Watermark, workers: int
+) -> Iterable[PartitionAggregate]:
+    """
+    Aggregate the partitions, in a process pool when more than one worker is requested.
+
+    Args:
+        partitions (List[Tuple[int, int]]): The `(hotel_id, year)` partitions.
+        watermark (Watermark): The ID of the last event to rebuild.
+        workers (int): The number of worker processes.
+
+    Yields:
+        PartitionAggregate: The aggregated events of each partition, in completion
+        order.
+    """
+    if workers <= 1:
+        for hotel_id, year in partitions:
+            yield aggregate_partition(hotel_id, year, watermark)
+        return
+
+    # Spawned workers do not inherit the database connections of this process
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    ) as executor:
+        futures = [
+            executor.submit(aggregate_partition, hotel_id, year, watermark)
+            for hotel_id, year in partitions
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def aggregate_partition(
+    hotel_id: int, year: int, watermark: Watermark
+) -> PartitionAggregate:
+    """
+    Aggregate the events of a hotel for a year.
+
+    Bookings count as one and cancellations as minus one, summed by the database over
+    the events grouped by day, night of stay and day of the cancelled booking: the last
+    booking of the reservation before the cancellation, or the cancellation itself if
+    there is none. Each group adds to the daily dashboard row of its booking day, and
+    the groups of a day and night of stay are a booking curve row.
+
+    Args:
+        hotel_id (int): The ID of the hotel.
+        year (int): The year.
+        watermark (Watermark): The ID of the last event to rebuild.
+
+    Returns:
+        PartitionAggregate: The aggregated events.
+    """
+    events = events_up_to(
+        Event.objects.using(router.db_for_read(Event)).filter(
+            hotel_id=hotel_id,
+            timestamp__gte=make_aware(datetime(year, 1, 1)),
+            timestamp__lt=make_aware(datetime(year + 1, 1, 1)),
+        ),
+        watermark,
+    )
+    booked_at = Subquery(
+        Event.objects.filter(
+            Q(timestamp__lt=OuterRef("timestamp"))
+            | Q(timestamp=OuterRef("timestamp"), id__lt=OuterRef("id")),
+            room_reservation_id=OuterRef("room_reservation_id"),
+            rpg_status=Event.BOOKING,
+            id__lte=watermark,
+        )
+        .order_by("-timestamp", "-id")
+        .values("timestamp")[:1]
+    )
+    groups = (
+        events.order_by()
+        .annotate(
+            bucket=TruncDay("timestamp"),
+            booking_bucket=TruncDay(
+                Case(
+                    When(
+                        rpg_status=Event.CANCELLATION,
+                        then=Coalesce(booked_at, F("timestamp")),
+                    ),
+                    default=F("timestamp"),
+                )
+            ),
+        )
+        .values("bucket", "booking_bucket", "night_of_stay")
+        .annotate(
+            net_bookings=Sum(
+                Case(When(rpg_status=Event.BOOKING, then=Value(1)), default=Value(-1))
+            ),
+            events=Count("id"),
+        )
+    )
+
+    day_deltas: Counter = Counter()
+    curve_deltas: Counter = Counter()
+    event_count = 0
+    for group in groups:
+        booking_day = group["booking_bucket"]
+        day_deltas[
+            (hotel_id, booking_day.year, booking_day.month, booking_day.day, "day")
+        ] += group["net_bookings"]
+        night_of_stay = group["night_of_stay"]
+        lead_time_days = (night_of_stay - group["bucket"].date()).days
+        curve_deltas[(night_of_stay, lead_time_days)] += group["net_bookings"]
+        event_count += group["events"]
+
+    return PartitionAggregate(
+        hotel_id,
+        day_deltas,
+        [(hotel_id, *key, net_bookings) for key, net_bookings in curve_deltas.items()],
+        event_count,
+    )
+
+
+def write_dashboard_rows(database: str, day_deltas: Counter) -> int:
+    """
+    Roll up the daily rows of a hotel and insert them into the shadow dashboard table.
+
+    Args:
+        database (str): The alias of the dashboard database.
+        day_deltas (Counter): The booking counts of the daily rows of the hotel, keyed
+        by `(hotel_id, year, month, day, "day")`.
+
+    Returns:
+        int: The number of dashboard rows of every period.
+    """
+    rows = rollup(day_deltas)
+    # Rollup keys end with the period, shadow rows start with it
+    write_shadow_rows(
+        database,
+        DashboardData,
+        [
+            (key[0], key[4], *key[1:4], booking_count)
+            for key, booking_count in rows.items()
+        ],
+    )
+    return len(rows)
+
+
+def write_reservation_index(database: str, watermark: Watermark) -> int:
+    """
+    Insert the last booking of each reservation into the shadow reservation index.
+
+    The last bookings, in `(timestamp, id)` order, are selected by the data provider
+    database and streamed in chunks, each inserted in its own transaction.
+
+    Args:
+        database (str): The alias of the dashboard database.
+        watermark (Watermark): The ID of the last event to rebuild.
+
+    Returns:
+        int: The number of indexed reservations.
+    """
+    bookings = events_up_to(
+        Event.objects.using(router.db_for_read(Event)), watermark
+    ).filter(rpg_status=Event.BOOKING)
+    later_bookings = bookings.filter(
+        Q(timestamp__gt=OuterRef("timestamp"))
+        | Q(timestamp=OuterRef("timestamp"), id__gt=OuterRef("id")),
+        room_reservation_id=OuterRef("room_reservation_id"),
+    )
+    rows = (
+        bookings.filter(~Exists(later_bookings))
+        .values_list("room_reservation_id", "hotel_id", "timestamp", "night_of_stay")
+        .iterator(chunk_size=INSERT_BATCH_SIZE)
+    )
+    indexed = 0
+    while True:
+        chunk = list(islice(rows, INSERT_BATCH_SIZE))
+        if not chunk:
+            return indexed
+        with transaction.atomic(using=database):
+            write_shadow_rows(database, ReservationIndex, chunk)
+        indexed += len(chunk)
+
+
+def shadow_table(model: Type[models.Model]) -> str:
+    """
+    Return the name of the shadow table of a rebuilt table.
+
+    Args:
+        model (Type[models.Model]): The model of the rebuilt table.
+
+    Returns:
+        str: The name of the shadow table.
+    """
+    return f"{model._meta.db_table}_rebuild"
+
+
+def create_shadow_tables(database: str) -> None:
+    """
+    Create empty shadow tables with the columns of the rebuilt tables.
+
+    Args:
+        database (str): The alias of the dashboard database.
+    """
+    connection = connections[database]
+    with connection.cursor() as cursor:
+        for model, columns in REBUILT_COLUMNS.items():
+            table = connection.ops.quote_name(shadow_table(model))
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(
+                f"CREATE TABLE {table} AS SELECT {', '.join(columns)} "
+                f"FROM {connection.ops.quote_name(model._meta.db_table)} WHERE 1 = 0"
+            )
+
+
+def write_shadow_rows(
+    database: str, model: Type[models.Model], rows: Sequence[tuple]
+) -> None:
+    """
+    Insert rows into the shadow table of a rebuilt table.
+
+    Args:
+        database (str): The alias of the dashboard database.
+        model (Type[models.Model]): The model of the rebuilt table.
+        rows (Sequence[tuple]): The rows to insert, in the order of `REBUILT_COLUMNS`.
+    """
+    connection = connections[database]
+    columns = REBUILT_COLUMNS[model]
+    fields = [model._meta.get_field(column) for column in columns]
+    placeholders = ", ".join(["%s"] * len(columns))
+    sql = (
+        f"INSERT INTO {connection.ops.quote_name(shadow_table(model))} "
+        f"({', '.join(columns)}) VALUES ({placeholders})"
+    )
+    with connection.cursor() as cursor:
+        for offset in range(0, len(rows), INSERT_BATCH_SIZE):
+            # Values are converted like the ORM does, UUIDs in particular
+            cursor.executemany(
+                sql,
+                [
+                    tuple(
+                        field.get_db_prep_value(value, connection)
+                        for field, value in zip(fields, row)
+                    )
+                    for row in rows[offset : offset + INSERT_BATCH_SIZE]
+                ],
+            )
+
+
+def swap_shadow_tables(database: str, watermark: Watermark) -> None:
+    """
+    Replace the rebuilt tables with their shadow tables and move the checkpoints, atomically.
+
+    Readers keep seeing the previous dashboard data until the transaction commits, and
+    every cached dashboard response is invalidated once it does. Every checkpoint is
+    moved to the end of the rebuild, so an incremental update running concurrently
+    fails its checkpoint check and is rolled back.
+
+    Args:
+        database (str): The alias of the dashboard database.
+        watermark (Watermark): The ID of the last rebuilt event.
+    """
+    connection = connections[database]
+    with transaction.atomic(using=database):
+        with connection.cursor() as cursor:
+            for model, columns in REBUILT_COLUMNS.items():
+                table = connection.ops.quote_name(model._meta.db_table)
+                column_list = ", ".join(columns)
+                cursor.execute(f"DELETE FROM {table}")
+                cursor.execute(
+                    f"INSERT INTO {table} ({column_list}) SELECT {column_list} "
+                    f"FROM {connection.ops.quote_name(shadow_table(model))}"
+                )
+        DashboardCheckpoint.objects.using(database).update(
+            last_event_id=watermark, updated_at=now()
+        )
+        DashboardCheckpoint.objects.using(database).get_or_create(
+            name=CHECKPOINT_NAME, defaults={"last_event_id": watermark}
+        )
+        transaction.on_commit(bump_epoch, using=database)
+    logger.info(f"Swapped in the rebuilt dashboard data up to #{watermark}")
+
+
+def drop_shadow_tables(database: str) -> None:
+    """
+    Drop the shadow tables.
+
+    Args:
+        database (str): The alias of the dashboard database.
+    """
+    connection = connections[database]
+    with connection.cursor() as cursor:
+        for model in REBUILT_COLUMNS:
+            cursor.execute(
+                f"DROP TABLE IF EXISTS {connection.ops.quote_name(shadow_table(model))}"
+            )
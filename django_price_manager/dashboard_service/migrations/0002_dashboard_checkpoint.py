@@ -0,0 +1,58 @@
+# Generated by Django 5.0.7 on 2026-10-17 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard_service", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="The name of the checkpoint.",
+                        max_length=50,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "last_timestamp",
+                    models.DateTimeField(
+                        help_text="The timestamp of the last aggregated event."
+                    ),
+                ),
+                (
+                    "last_event_id",
+                    models.BigIntegerField(
+                        default=0, help_text="The ID of the last aggregated event."
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="When the checkpoint was last advanced.",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Dashboard Checkpoint",
+                "verbose_name_plural": "Dashboard Checkpoints",
+            },
+        ),
+    ]
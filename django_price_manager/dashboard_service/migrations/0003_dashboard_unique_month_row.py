@@ -0,0 +1,21 @@
+# Generated by Django 5.0.7 on 2026-10-17 22:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard_service", "0002_dashboard_checkpoint"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="dashboarddata",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("day__isnull", True)),
+                fields=("hotel_id", "year", "month", "period"),
+                name="dashboard_unique_month_row",
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.7 on 2026-10-17 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard_service", "0003_dashboard_unique_month_row"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="dashboarddata",
+            name="day",
+            field=models.IntegerField(
+                blank=True,
+                help_text="The day of the start of the period, only for the 'week' and 'day' periods.",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="dashboarddata",
+            name="month",
+            field=models.IntegerField(
+                help_text="The month of the start of the period."
+            ),
+        ),
+        migrations.AlterField(
+            model_name="dashboarddata",
+            name="period",
+            field=models.CharField(
+                choices=[
+                    ("year", "Yearly"),
+                    ("quarter", "Quarterly"),
+                    ("month", "Monthly"),
+                    ("week", "Weekly"),
+                    ("day", "Daily"),
+                ],
+                help_text="The period of aggregation ('year', 'quarter', 'month', 'week' or 'day').",
+                max_length=10,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="dashboarddata",
+            name="year",
+            field=models.IntegerField(help_text="The year of the start of the period."),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-17 23:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard_service", "0004_dashboard_rollup_periods"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dashboarddata",
+            index=models.Index(
+                fields=["hotel_id", "period", "year", "month", "day"],
+                name="dashboard_series_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.7 on 2026-10-17 23:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard_service", "0005_dashboard_series_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookingCurve",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hotel_id", models.IntegerField(help_text="The ID of the hotel.")),
+                ("night_of_stay", models.DateField(help_text="The night of stay.")),
+                (
+                    "lead_time_days",
+                    models.IntegerField(
+                        help_text="The number of days between the day the events were recorded and the night of stay."
+                    ),
+                ),
+                (
+                    "net_bookings",
+                    models.IntegerField(
+                        default=0,
+                        help_text="The bookings minus the cancellations recorded that day.",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Booking Curve",
+                "verbose_name_plural": "Booking Curves",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="bookingcurve",
+            constraint=models.UniqueConstraint(
+                fields=("hotel_id", "night_of_stay", "lead_time_days"),
+                name="booking_curve_unique_row",
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.7 on 2026-10-17 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard_service", "0006_booking_curve"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReservationIndex",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "room_reservation_id",
+                    models.UUIDField(
+                        help_text="The UUID of the room reservation.", unique=True
+                    ),
+                ),
+                ("hotel_id", models.IntegerField(help_text="The ID of the hotel.")),
+                (
+                    "booked_at",
+                    models.DateTimeField(
+                        help_text="The timestamp of the last booking of the reservation."
+                    ),
+                ),
+                (
+                    "night_of_stay",
+                    models.DateField(
+                        help_text="The night of stay of the last booking."
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Reservation Index",
+                "verbose_name_plural": "Reservation Index",
+            },
+        ),
+    ]
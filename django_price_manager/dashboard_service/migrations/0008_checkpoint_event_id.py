@@ -0,0 +1,27 @@
+# Generated by Django 5.0.7 on 2026-10-18 09:12
+
+from django.db import migrations
+
+
+def delete_checkpoints(apps, schema_editor):
+    """
+    Delete the `(timestamp, id)` checkpoints, which cannot be converted to event IDs:
+    the dashboard updates wait for `rebuild_dashboard` to create the new ones.
+    """
+    DashboardCheckpoint = apps.get_model("dashboard_service", "DashboardCheckpoint")
+    DashboardCheckpoint.objects.using(schema_editor.connection.alias).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dashboard_service", "0007_reservation_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_checkpoints, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="dashboardcheckpoint",
+            name="last_timestamp",
+        ),
+    ]
@@ -1,8 +1,11 @@
 """
-Module defining the DashboardData model for the Django Price Manager project.
+Module defining the dashboard models for the Django Price Manager project.
 
 This module contains the DashboardData model which represents aggregated booking data
-for hotels over different periods.
+for hotels over different periods, the BookingCurve model which represents the net
+bookings of each stay date by lead time, the ReservationIndex model which locates the
+booking of each reservation, and the DashboardCheckpoint model which records how far the
+events have been aggregated.
 """
 
 from typing import Tuple
@@ -16,31 +19,37 @@ class DashboardData(models.Model):
 
     Attributes:
         hotel_id (IntegerField): The ID of the hotel.
-        period (CharField): The period of aggregation ('month' or 'day').
-        year (IntegerField): The year of the data.
-        month (IntegerField): The month of the data (optional if period is 'day').
-        day (IntegerField): The day of the data (optional if period is 'month').
+        period (CharField): The period of aggregation ('year', 'quarter', 'month', 'week' or 'day').
+        year (IntegerField): The year of the start of the period.
+        month (IntegerField): The month of the start of the period.
+        day (IntegerField): The day of the start of the period, only for the 'week' and 'day' periods.
         booking_count (IntegerField): The count of bookings for the specified period.
 
     Meta:
         unique_together (Tuple[Tuple[str, ...], ...]): Ensures that each combination of hotel_id, year, month, day, and period is unique.
+        indexes (List[Index]): Indexes matching the date range reads of the series endpoint.
+        constraints (List[UniqueConstraint]): Ensures the same for the rows without a day.
     """
 
     # Model fields
     hotel_id: int = models.IntegerField(help_text="The ID of the hotel.")
     period: str = models.CharField(
         max_length=10,
-        choices=[("month", "Monthly"), ("day", "Daily")],
-        help_text="The period of aggregation ('month' or 'day').",
-    )
-    year: int = models.IntegerField(help_text="The year of the data.")
-    month: int = models.IntegerField(
-        help_text="The month of the data (optional if period is 'day')."
+        choices=[
+            ("year", "Yearly"),
+            ("quarter", "Quarterly"),
+            ("month", "Monthly"),
+            ("week", "Weekly"),
+            ("day", "Daily"),
+        ],
+        help_text="The period of aggregation ('year', 'quarter', 'month', 'week' or 'day').",
     )
+    year: int = models.IntegerField(help_text="The year of the start of the period.")
+    month: int = models.IntegerField(help_text="The month of the start of the period.")
     day: int = models.IntegerField(
         null=True,
         blank=True,
-        help_text="The day of the data (optional if period is 'month').",
+        help_text="The day of the start of the period, only for the 'week' and 'day' periods.",
     )
     booking_count: int = models.IntegerField(
         default=0, help_text="The count of bookings for the specified period."
@@ -50,6 +59,21 @@ class DashboardData(models.Model):
         unique_together: Tuple[Tuple[str, ...], ...] = (
             ("hotel_id", "year", "month", "day", "period"),
         )
+        indexes = [
+            # Date range reads of the series of a hotel and period
+            models.Index(
+                fields=["hotel_id", "period", "year", "month", "day"],
+                name="dashboard_series_idx",
+            )
+        ]
+        # Rows without a day never conflict on NULL, so they need their own constraint
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hotel_id", "year", "month", "period"],
+                condition=models.Q(day__isnull=True),
+                name="dashboard_unique_month_row",
+            )
+        ]
         verbose_name = "Dashboard Data"
         verbose_name_plural = "Dashboard Data"
 
@@ -61,3 +85,129 @@ class DashboardData(models.Model):
             str: A string describing the dashboard data, including the hotel ID and period.
         """
         return f"DashboardData for Hotel {self.hotel_id} - {self.period.capitalize()} {self.year}-{self.month or ''}-{self.day or ''}"
+
+
+class BookingCurve(models.Model):
+    """
+    A Django model that represents the booking curve of a hotel's stay dates.
+
+    Each row holds the net bookings (bookings minus cancellations) of a night of stay
+    recorded a given number of days before that night, so the curve of a stay date is
+    the range of its rows ordered by lead time.
+
+    Attributes:
+        hotel_id (IntegerField): The ID of the hotel.
+        night_of_stay (DateField): The night of stay.
+        lead_time_days (IntegerField): The number of days between the day the events were recorded and the night of stay.
+        net_bookings (IntegerField): The bookings minus the cancellations recorded that day.
+
+    Meta:
+        constraints (List[UniqueConstraint]): One row per hotel, night of stay and lead time, also indexing the curve reads.
+    """
+
+    hotel_id: int = models.IntegerField(help_text="The ID of the hotel.")
+    night_of_stay = models.DateField(help_text="The night of stay.")
+    lead_time_days: int = models.IntegerField(
+        help_text="The number of days between the day the events were recorded and the night of stay."
+    )
+    net_bookings: int = models.IntegerField(
+        default=0, help_text="The bookings minus the cancellations recorded that day."
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hotel_id", "night_of_stay", "lead_time_days"],
+                name="booking_curve_unique_row",
+            )
+        ]
+        verbose_name = "Booking Curve"
+        verbose_name_plural = "Booking Curves"
+
+    def __str__(self) -> str:
+        """
+        Returns a human-readable string representation of the model instance.
+
+        Returns:
+            str: A string describing the hotel, the night of stay and the lead time.
+        """
+        return f"BookingCurve for Hotel {self.hotel_id} - {self.night_of_stay.isoformat()} at {self.lead_time_days} days"
+
+
+class ReservationIndex(models.Model):
+    """
+    A Django model that locates the last booking of each room reservation.
+
+    The dashboard updater records the bookings it aggregates, so that cancellations are
+    subtracted from the bucket of the booking they cancel, looked up in bulk by
+    reservation.
+
+    Attributes:
+        room_reservation_id (UUIDField): The UUID of the room reservation.
+        hotel_id (IntegerField): The ID of the hotel.
+        booked_at (DateTimeField): The timestamp of the last booking of the reservation.
+        night_of_stay (DateField): The night of stay of the last booking.
+    """
+
+    room_reservation_id = models.UUIDField(
+        unique=True, help_text="The UUID of the room reservation."
+    )
+    hotel_id: int = models.IntegerField(help_text="The ID of the hotel.")
+    booked_at = models.DateTimeField(
+        help_text="The timestamp of the last booking of the reservation."
+    )
+    night_of_stay = models.DateField(help_text="The night of stay of the last booking.")
+
+    class Meta:
+        verbose_name = "Reservation Index"
+        verbose_name_plural = "Reservation Index"
+
+    def __str__(self) -> str:
+        """
+        Returns a human-readable string representation of the model instance.
+
+        Returns:
+            str: A string describing the reservation and its booking.
+        """
+        return f"ReservationIndex {self.room_reservation_id} booked at {self.booked_at.isoformat()}"
+
+
+class DashboardCheckpoint(models.Model):
+    """
+    A Django model that records the last event aggregated into the dashboard data.
+
+    Events are aggregated in ID order, so the ID of the last aggregated event is a
+    high-water mark: no event is counted twice, and every event with a lower ID has been
+    counted. IDs follow the commit order of the events, as SQLite serializes the writing
+    transactions, so an event committed late (a retried event, a batch of a slower
+    consumer, a reloaded file with old timestamps) still gets an ID above the mark. The
+    checkpoint is advanced in the same transaction as the dashboard data.
+
+    Attributes:
+        name (CharField): The name of the checkpoint.
+        last_event_id (BigIntegerField): The ID of the last aggregated event.
+        updated_at (DateTimeField): When the checkpoint was last advanced.
+    """
+
+    name: str = models.CharField(
+        max_length=50, unique=True, help_text="The name of the checkpoint."
+    )
+    last_event_id: int = models.BigIntegerField(
+        default=0, help_text="The ID of the last aggregated event."
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True, help_text="When the checkpoint was last advanced."
+    )
+
+    class Meta:
+        verbose_name = "Dashboard Checkpoint"
+        verbose_name_plural = "Dashboard Checkpoints"
+
+    def __str__(self) -> str:
+        """
+        Returns a human-readable string representation of the model instance.
+
+        Returns:
+            str: A string describing the checkpoint and its high-water mark.
+        """
+        return f"DashboardCheckpoint {self.name} at #{self.last_event_id}"
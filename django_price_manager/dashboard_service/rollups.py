@@ -0,0 +1,135 @@
+"""
+Module defining the rollup periods of the dashboard data.
+
+Booking counts are aggregated per day, and every coarser period is derived from the
+daily buckets: a change of a day's count is applied to the week, month, quarter and
+year containing it. Each bucket is stored as one DashboardData row keyed by the start
+of its period:
+
+- "day": the date itself.
+- "week": the Monday starting the ISO week, which may fall in the previous month or year.
+- "month": the month, without a day.
+- "quarter": the first month of the quarter, without a day.
+- "year": January, without a day.
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+# A dashboard bucket, as `(hotel_id, year, month, day, period)`
+BucketKey = Tuple[int, int, int, Optional[int], str]
+
+PERIODS: Tuple[str, ...] = ("day", "week", "month", "quarter", "year")
+
+
+def quarter_start_month(month: int) -> int:
+    """
+    Return the first month of the quarter containing a month.
+
+    Args:
+        month (int): The month, from 1 to 12.
+
+    Returns:
+        int: 1, 4, 7 or 10.
+    """
+    return (month - 1) // 3 * 3 + 1
+
+
+def rollup_keys(hotel_id: int, day: date) -> List[BucketKey]:
+    """
+    Return the keys of the coarser buckets containing a day.
+
+    Args:
+        hotel_id (int): The ID of the hotel.
+        day (date): The day.
+
+    Returns:
+        List[BucketKey]: The week, month, quarter and year buckets of the day.
+    """
+    monday = day - timedelta(days=day.weekday())
+    return [
+        (hotel_id, monday.year, monday.month, monday.day, "week"),
+        (hotel_id, day.year, day.month, None, "month"),
+        (hotel_id, day.year, quarter_start_month(day.month), None, "quarter"),
+        (hotel_id, day.year, 1, None, "year"),
+    ]
+
+
+def rollup(day_deltas: Counter) -> Counter:
+    """
+    Extend booking count deltas of day buckets to every period containing them.
+
+    Args:
+        day_deltas (Counter): The deltas of day buckets, keyed by `BucketKey`.
+
+    Returns:
+        Counter: The deltas of the day buckets and of their week, month, quarter and
+        year buckets.
+    """
+    deltas = Counter(day_deltas)
+    for (hotel_id, year, month, day, _), delta in day_deltas.items():
+        for key in rollup_keys(hotel_id, date(year, month, day)):
+            deltas[key] += delta
+    return deltas
+
+
+def bucket_start(day: date, period: str) -> date:
+    """
+    Return the first day of the bucket of a period containing a day.
+
+    Args:
+        day (date): The day.
+        period (str): The period, one of `PERIODS`.
+
+    Returns:
+        date: The first day of the bucket.
+    """
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    if period == "quarter":
+        return date(day.year, quarter_start_month(day.month), 1)
+    if period == "year":
+        return date(day.year, 1, 1)
+    return day
+
+
+def next_bucket_start(start: date, period: str) -> date:
+    """
+    Return the first day of the bucket following the bucket starting on a day.
+
+    Args:
+        start (date): The first day of a bucket.
+        period (str): The period, one of `PERIODS`.
+
+    Returns:
+        date: The first day of the next bucket.
+    """
+    if period == "week":
+        return start + timedelta(weeks=1)
+    if period in ("month", "quarter"):
+        months = start.month - 1 + (3 if period == "quarter" else 1)
+        return date(start.year + months // 12, months % 12 + 1, 1)
+    if period == "year":
+        return date(start.year + 1, 1, 1)
+    return start + timedelta(days=1)
+
+
+def bucket_starts(start: date, end: date, period: str) -> Iterator[date]:
+    """
+    Iterate over the first days of the buckets of a period overlapping a date range.
+
+    Args:
+        start (date): The first day of the range.
+        end (date): The last day of the range, inclusive.
+        period (str): The period, one of `PERIODS`.
+
+    Yields:
+        date: The first day of each bucket, in order.
+    """
+    current = bucket_start(start, period)
+    while current <= end:
+        yield current
+        current = next_bucket_start(current, period)
@@ -2,14 +2,18 @@
 Serializer module for DashboardData model.
 
 This module contains the serializer class for the DashboardData model which is responsible for
-validating and transforming model instances into JSON format and vice versa.
+validating and transforming model instances into JSON format and vice versa. It also contains
+the fast read path used by the dashboard endpoint.
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 
+from django.conf import settings
+from django.db.models import QuerySet
 from rest_framework import serializers
 
 from .models import DashboardData
+from .rollups import PERIODS
 
 
 class DashboardDataSerializer(serializers.ModelSerializer):
@@ -19,7 +23,7 @@ class DashboardDataSerializer(serializers.ModelSerializer):
     Provides validation and serialization for DashboardData instances.
 
     Attributes:
-        day (IntegerField): An optional field for the day, required only if the period is 'day'.
+        day (IntegerField): An optional field for the day, required only if the period is 'day' or 'week'.
     """
 
     day = serializers.IntegerField(required=False, allow_null=True)
@@ -38,8 +42,8 @@ class DashboardDataSerializer(serializers.ModelSerializer):
         Returns:
             Dict[str, Any]: The validated internal data.
         """
-        if data.get("period") == "month":
-            data["day"] = None  # Set day to None if the period is 'month'
+        if data.get("period") in ("month", "quarter", "year"):
+            data["day"] = None  # Set day to None if the period has no day
         return super().to_internal_value(data)
 
     def validate(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -55,8 +59,79 @@ class DashboardDataSerializer(serializers.ModelSerializer):
         Raises:
             serializers.ValidationError: If any constraints are violated.
         """
-        if data["period"] == "day" and not data.get("day"):
+        if data["period"] in ("day", "week") and not data.get("day"):
             raise serializers.ValidationError(
-                "Day is required when the period is 'day'."
+                "Day is required when the period is 'day' or 'week'."
             )
         return data
+
+
+class DashboardBatchQuerySerializer(serializers.Serializer):
+    """
+    Serializer validating a query of the dashboard data of several hotels.
+
+    Attributes:
+        hotel_ids (ListField): The IDs of the hotels, at most `DASHBOARD_BATCH_MAX_HOTELS`.
+        periods (ListField): The periods to retrieve, every period if omitted.
+        year (IntegerField): The year of the data to retrieve.
+        quarter (IntegerField): The quarter of the data to retrieve, for the 'quarter' period.
+        month (IntegerField): The month of the data to retrieve.
+        day (IntegerField): The day of the data to retrieve, for the 'day' and 'week' periods.
+    """
+
+    hotel_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.DASHBOARD_BATCH_MAX_HOTELS,
+    )
+    periods = serializers.ListField(
+        child=serializers.ChoiceField(choices=PERIODS), required=False
+    )
+    year = serializers.IntegerField(min_value=1950, max_value=2050, required=False)
+    quarter = serializers.IntegerField(min_value=1, max_value=4, required=False)
+    month = serializers.IntegerField(min_value=1, max_value=12, required=False)
+    day = serializers.IntegerField(min_value=1, max_value=31, required=False)
+
+
+# Model fields read by the fast read path, in the order of the DashboardDataSerializer output
+DASHBOARD_ROW_FIELDS = (
+    "id",
+    "day",
+    "hotel_id",
+    "period",
+    "year",
+    "month",
+    "booking_count",
+)
+
+
+def dashboard_rows(dashboard_objects: QuerySet) -> List[Dict[str, Any]]:
+    """
+    Fast read path equivalent of `DashboardDataSerializer(dashboard_objects, many=True).data`.
+
+    Args:
+        dashboard_objects (QuerySet): The dashboard data to serialize.
+
+    Returns:
+        List[Dict[str, Any]]: The serialized dashboard data.
+    """
+    return list(dashboard_objects.values(*DASHBOARD_ROW_FIELDS))
+
+
+def dashboard_rows_by_hotel(
+    dashboard_objects: QuerySet, hotel_ids: List[int]
+) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Serialize dashboard data through the fast read path, grouped by hotel.
+
+    Args:
+        dashboard_objects (QuerySet): The dashboard data to serialize.
+        hotel_ids (List[int]): The queried hotel IDs, included even without data.
+
+    Returns:
+        Dict[int, List[Dict[str, Any]]]: The serialized dashboard data of each hotel.
+    """
+    grouped: Dict[int, List[Dict[str, Any]]] = {hotel_id: [] for hotel_id in hotel_ids}
+    for row in dashboard_rows(dashboard_objects):
+        grouped[row["hotel_id"]].append(row)
+    return grouped
@@ -0,0 +1,46 @@
+"""
+Module defining the signal receivers of the dashboard service.
+
+In the "push" refresh mode (`DASHBOARD_REFRESH_MODE`), the dashboard is updated when
+events are ingested rather than on a fixed schedule. Notifications are debounced: the
+first one schedules an update `DASHBOARD_REFRESH_DEBOUNCE_MS` milliseconds later and
+the following ones are absorbed by it until the window closes, so a burst of inserts
+costs one update and no update runs while no events arrive.
+"""
+
+import logging
+from typing import Any
+
+import redis
+from django.conf import settings
+
+from .tasks import update_dashboard_data
+
+logger = logging.getLogger(__name__)
+
+r = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+refresh_key = "dashboard_refresh_pending"
+
+
+def schedule_dashboard_update(sender: Any, **kwargs: Any) -> None:
+    """
+    Schedule a dashboard update for newly ingested events, unless one is pending.
+
+    The pending window is a Redis key set only if absent, expiring when the scheduled
+    update starts, so every worker and web process shares the same window.
+
+    Args:
+        sender (Any): The model class of the ingested events.
+        **kwargs (Any): The signal arguments.
+    """
+    if settings.DASHBOARD_REFRESH_MODE != "push":
+        return
+    window = settings.DASHBOARD_REFRESH_DEBOUNCE_MS
+    try:
+        if not r.set(refresh_key, 1, nx=True, px=window):
+            return
+        update_dashboard_data.apply_async(countdown=window / 1000)
+        logger.debug(f"Scheduled a dashboard update in {window} ms")
+    except Exception as e:
+        # The events are committed already, the next notification schedules the update
+        logger.error(f"Failed to schedule a dashboard update: {str(e)}")
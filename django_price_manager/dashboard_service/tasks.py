@@ -1,116 +1,740 @@
 """
 Module for updating dashboard data using Celery.
 
-This module defines tasks and helper functions to update or create daily and monthly
-dashboard entries from new events fetched via an API.
+This module defines tasks and helper functions to update or create the dashboard entries
+of every period from new events. Events are read according to `DASHBOARD_EVENT_SOURCE`:
+
+- "http": fetched from the events API, walking its cursor pagination. Use this when the
+  dashboard service is deployed separately from the data provider.
+- "orm": read from the data provider database directly, in chunks.
+
+Each page of events is folded into per-row deltas of the dashboard data and of the
+booking curves, applied in a single transaction which also advances a checkpoint, the
+ID of the last aggregated event, past the page. Cancellations are subtracted from the
+bucket of the booking they cancel, found in a reservation index maintained in the same
+transaction. Events are read strictly after the checkpoint in ID order, which is the
+order they were committed in (see `DashboardCheckpoint`), so no event is aggregated
+twice or skipped, including events of a run interrupted partway through and events
+with old timestamps, such as retried or reloaded events.
+
+Rows are incremented atomically, so several workers can update the dashboard at once.
+With `DASHBOARD_PARTITIONS` above one, the events are split by hotel into partitions
+with their own checkpoints, updated in parallel by a group of tasks.
+
+A checkpoint is updated by a single run at a time, holding a lock in Redis. A run
+triggered while another one holds the lock sets a rerun flag and returns: the holder
+runs again once it is done, so a burst of triggers is coalesced into one more run.
 """
 
 import logging
 import os
-from datetime import datetime
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
+import redis
 import requests
-from celery import shared_task
+from celery import group, shared_task
 from data_provider.models import Event
+from data_provider.pagination import (
+    encode_id_cursor,
+    events_after_id,
+    in_hotel_partition,
+)
+from django.conf import settings
 from django.core.cache import cache
-from django.db.models import Sum
-from django.utils.timezone import get_current_timezone, make_aware
+from django.db import IntegrityError, OperationalError, router, transaction
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import get_current_timezone, is_naive, make_aware, now
+
+from django_price_manager.locks import LeaseLock
 
-from .models import DashboardData
+from .cache import bump_versions, increment
+from .models import BookingCurve, DashboardCheckpoint, DashboardData, ReservationIndex
+from .rollups import rollup
 
 logger = logging.getLogger(__name__)
 
+r = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+UPDATE_STAT_NAMES = ("runs", "reruns", "coalesced")
+
+# Number of dashboard rows written per bulk query
+DELTA_BATCH_SIZE: int = 500
+
+# The ID of the last aggregated event
+Watermark = int
+# A hotel partition, as `(partition, partitions)`
+Partition = Tuple[int, int]
+
+# Number of times a page is applied before giving up on concurrent row creations and
+# on a database locked by concurrent writers
+APPLY_ATTEMPTS: int = 5
+# Number of seconds before applying a page again on a locked database, doubled on each
+# attempt
+APPLY_RETRY_DELAY: float = 0.5
+
+CHECKPOINT_NAME = "events"
+# Every event is after the initial watermark
+INITIAL_WATERMARK: Watermark = 0
+
+
+class EventRecord(NamedTuple):
+    """
+    The fields of an event used by the dashboard.
+
+    Attributes:
+        id (int): The ID of the event.
+        hotel_id (int): The ID of the hotel.
+        timestamp (datetime): The timestamp of the event.
+        status (int): The status of the event (1 for booking, 2 for cancellation).
+        night_of_stay (date): The night of stay of the event.
+        room_reservation_id (uuid.UUID): The UUID of the room reservation.
+    """
+
+    id: int
+    hotel_id: int
+    timestamp: datetime
+    status: int
+    night_of_stay: date
+    room_reservation_id: uuid.UUID
+
+
+class CheckpointConflict(Exception):
+    """
+    Raised when the checkpoint was advanced by another run while a page was processed.
+    """
+
+
+class CheckpointMissing(Exception):
+    """
+    Raised when the dashboard has data but no checkpoint, so the aggregated events are
+    unknown and must be rebuilt.
+    """
+
+
+def checkpoint_name(partition: Optional[Partition]) -> str:
+    """
+    Return the name of the checkpoint of a hotel partition.
+
+    Args:
+        partition (Optional[Partition]): The partition, None for all the events.
 
-def get_latest_timestamp():
+    Returns:
+        str: The checkpoint name.
     """
-    Retrieve the latest timestamp from the cache or use a fallback.
+    if partition is None:
+        return CHECKPOINT_NAME
+    return f"{CHECKPOINT_NAME}-{partition[0]}-of-{partition[1]}"
+
+
+def get_watermark(name: str = CHECKPOINT_NAME) -> Watermark:
+    """
+    Retrieve the ID of the last aggregated event from a checkpoint.
+
+    A partition without a checkpoint yet starts from the checkpoint of all the events,
+    so switching to partitioned updates does not aggregate the events again.
+
+    Args:
+        name (str): The name of the checkpoint.
+
+    Returns:
+        Watermark: The ID of the last aggregated event, or the initial watermark if no
+        event has been aggregated yet.
+
+    Raises:
+        CheckpointMissing: If there is no checkpoint at all but the dashboard has data,
+        left by a version without checkpoints or with `(timestamp, id)` ones.
     """
-    return cache.get("last_event_timestamp") or datetime(2020, 1, 1).isoformat()
+    checkpoints = {
+        checkpoint.name: checkpoint
+        for checkpoint in DashboardCheckpoint.objects.filter(
+            name__in=[name, CHECKPOINT_NAME]
+        )
+    }
+    checkpoint = checkpoints.get(name) or checkpoints.get(CHECKPOINT_NAME)
+    if checkpoint is not None:
+        return checkpoint.last_event_id
+    # Without any checkpoint, aggregating every event would count existing rows twice
+    if not DashboardCheckpoint.objects.exists() and DashboardData.objects.exists():
+        raise CheckpointMissing(name)
+    return INITIAL_WATERMARK
 
 
 @shared_task()
 def update_dashboard_data() -> None:
     """
-    Update or create daily and monthly dashboard entries from new events.
+    Update or create the dashboard entries of every period from new events.
 
-    This task fetches new events from the API based on the last processed timestamp,
-    processes each event, and updates the dashboard data accordingly.
+    With `DASHBOARD_PARTITIONS` above one, the events are split by `hotel_id` into that
+    many partitions and a group of `update_dashboard_partition` tasks is dispatched, one
+    per partition. Otherwise all the events are aggregated by this task.
+    """
+    partitions = settings.DASHBOARD_PARTITIONS
+    if partitions > 1:
+        group(
+            update_dashboard_partition.s(partition, partitions)
+            for partition in range(partitions)
+        ).apply_async()
+        logger.info(f"Dispatched {partitions} dashboard partition updates")
+        return
+    refresh_dashboard(None)
+
+
+@shared_task()
+def update_dashboard_partition(partition: int, partitions: int) -> None:
+    """
+    Update the dashboard entries of the hotels in one partition from their new events.
+
+    Partitions hold disjoint hotels and have their own checkpoint, so they are updated
+    in parallel by several workers.
+
+    Args:
+        partition (int): The partition, from 0 to `partitions - 1`.
+        partitions (int): The number of partitions.
+    """
+    refresh_dashboard((partition, partitions))
+
+
+def refresh_dashboard(partition: Optional[Partition]) -> None:
+    """
+    Update the dashboard data from the events after the checkpoint of a partition,
+    unless a run of the same partition is in progress.
+
+    A run that finds the lock of the checkpoint held sets its rerun flag, then tries the
+    lock once more: either it takes the lock released in between, or the holder sees
+    the flag before its release and runs again until the flag stays clear.
+
+    Args:
+        partition (Optional[Partition]): The partition, None for all the events.
+    """
+    name = checkpoint_name(partition)
+    lock = LeaseLock(
+        r, f"dashboard:update:{name}:lock", settings.DASHBOARD_UPDATE_LOCK_LEASE
+    )
+    rerun_key = f"dashboard:update:{name}:rerun"
+    while True:
+        if not lock.acquire():
+            r.set(rerun_key, 1)
+            if not lock.acquire():
+                increment("dashboard:stats:updates:coalesced")
+                logger.info(f"Dashboard update of {name} in progress, coalesced")
+                return
+        try:
+            while True:
+                r.delete(rerun_key)
+                aggregate_new_events(partition)
+                increment("dashboard:stats:updates:runs")
+                if lock.lost.is_set() or not r.exists(rerun_key):
+                    break
+                increment("dashboard:stats:updates:reruns")
+        finally:
+            lock.release()
+        # A trigger may have set the flag after the last check, before the release
+        if not r.exists(rerun_key):
+            return
+
+
+def aggregate_new_events(partition: Optional[Partition]) -> None:
+    """
+    Aggregate the events after the checkpoint of a partition into the dashboard data.
+
+    This reads the events page by page from the source selected by
+    `DASHBOARD_EVENT_SOURCE`, folds each page into per-row deltas and applies them to the
+    dashboard data together with the new checkpoint.
+
+    Args:
+        partition (Optional[Partition]): The partition, None for all the events.
     """
     try:
         logger.info("Updating dashboard data...")
-        base_url = os.getenv("EVENTS_API_BASE_URL", "http://127.0.0.1:8000")
-        last_timestamp = get_latest_timestamp()
-        new_last_timestamp = last_timestamp  # Initialize new_last_timestamp here
-        logger.info(f"Fetching events from {last_timestamp}")
+        name = checkpoint_name(partition)
+        watermark = get_watermark(name)
+        logger.info(
+            f"Fetching events after #{watermark} "
+            f"for {name} ({settings.DASHBOARD_EVENT_SOURCE} source)"
+        )
+        if settings.DASHBOARD_EVENT_SOURCE == "orm":
+            pages = read_event_pages(watermark, partition)
+        else:
+            pages = fetch_event_pages(watermark, partition)
+
+        for events in pages:
+            logger.info(f"Received {len(events)} events")
+            watermark = apply_page(events, watermark, name)
+            logger.info(f"New watermark is: #{watermark}")
+    except CheckpointConflict:
+        logger.warning(f"Dashboard checkpoint {name} advanced by another run, stopping")
+    except CheckpointMissing:
+        logger.error(
+            f"Dashboard checkpoint {name} is missing, run rebuild_dashboard to resume "
+            "the dashboard updates"
+        )
+    except Exception as e:
+        logger.exception(f"Unhandled error in update_dashboard_data: {str(e)}")
+
 
-        params = {"updated_gt": last_timestamp}
+def get_update_stats() -> Dict[str, int]:
+    """
+    Return the counters of the dashboard updates.
+
+    Returns:
+        Dict[str, int]: The completed runs, the reruns requested by coalesced triggers
+        and the triggers coalesced into a run in progress.
+    """
+    keys = [f"dashboard:stats:updates:{name}" for name in UPDATE_STAT_NAMES]
+    values = cache.get_many(keys)
+    return {name: values.get(key, 0) for name, key in zip(UPDATE_STAT_NAMES, keys)}
+
+
+def fetch_event_pages(
+    watermark: Watermark, partition: Optional[Partition] = None
+) -> Iterator[List[EventRecord]]:
+    """
+    Fetch the events after a watermark from the events API, one page at a time.
+
+    The watermark is sent as the pagination cursor of the `id` ordering, so the API
+    returns the events strictly after it in ID order.
+
+    Args:
+        watermark (Watermark): The ID of the last aggregated event.
+        partition (Optional[Partition]): The hotel partition, None for all the events.
+
+    Yields:
+        List[EventRecord]: The events of each page. An event that cannot be parsed is
+        logged and ends the page before it, so the checkpoint stops short of it instead
+        of passing it for good.
+    """
+    base_url = os.getenv("EVENTS_API_BASE_URL", "http://127.0.0.1:8000")
+    params = {
+        "cursor": encode_id_cursor(watermark),
+        "ordering": "id",
+        "limit": settings.DASHBOARD_EVENT_PAGE_SIZE,
+    }
+    if partition is not None:
+        params["partition"], params["partitions"] = partition
+    while True:
         response = requests.get(f"{base_url}/events/", params=params)
-        if response.status_code == 200:
-            events = response.json()
-            logger.info(f"Received {len(events)} events from the API")
-
-            if events:
-                latest_timestamp = max(event["event_timestamp"] for event in events)
-                cache.set("last_event_timestamp", latest_timestamp)
-                for event in events:
-                    try:
-                        date = make_aware(
-                            datetime.strptime(
-                                event["event_timestamp"], "%Y-%m-%dT%H:%M:%SZ"
-                            ),
-                            timezone=get_current_timezone(),
-                        )
-                        update_dashboard(date, event, "day")
-                        update_dashboard(date, event, "month")
-                        logger.debug(f"Dashboard updated for {date}")
-                        new_last_timestamp = max(
-                            new_last_timestamp, event["event_timestamp"]
-                        )
-                    except Exception as e:
-                        logger.error(f"Error processing event {event['id']}: {str(e)}")
-                        continue
-                else:
-                    logger.info("No events to process")
-                logger.info(f"New timestamp is: {new_last_timestamp}")
-        else:
+        if response.status_code != 200:
             logger.error(
                 f"Failed to fetch events: {response.status_code} - {response.text}"
             )
-    except Exception as e:
-        logger.error(f"Unhandled error in update_dashboard_data: {str(e)}")
+            return
+
+        page = response.json()
+        events = []
+        for event in page["results"]:
+            try:
+                events.append(parse_event(event))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(
+                    f"Error processing event {event.get('id')}: {str(e)}, stopping"
+                )
+                yield events
+                return
+        yield events
 
+        if not page["next"]:
+            return
+        params = {**params, "cursor": page["next"]}
 
-def update_dashboard(date: datetime, event: dict, period: str) -> None:
+
+def parse_event(event: dict) -> EventRecord:
     """
-    Helper function to update or create dashboard data for a given period.
+    Parse an event of the events API.
 
     Args:
-        date (datetime): The date of the event.
-        event (dict): The event data.
-        period (str): The period to update ("day" or "month").
+        event (dict): The serialized event.
+
+    Returns:
+        EventRecord: The fields of the event used by the dashboard.
+
+    Raises:
+        KeyError: If a field is missing.
+        ValueError: If a field is malformed.
     """
-    try:
-        filter_kwargs = {
-            "hotel_id": event["hotel_id"],
-            "year": date.year,
-            "period": period,
-            "month": date.month,
-            "day": date.day if period == "day" else None,
+    # The API renders timestamps in UTC, with microseconds when they are not zero
+    timestamp = parse_datetime(event["event_timestamp"])
+    if timestamp is None:
+        raise ValueError(f"Invalid timestamp: {event['event_timestamp']}")
+    if is_naive(timestamp):
+        timestamp = make_aware(timestamp, timezone=get_current_timezone())
+    return EventRecord(
+        event["id"],
+        event["hotel_id"],
+        timestamp,
+        event.get("status", 1),
+        date.fromisoformat(event["night_of_stay"]),
+        uuid.UUID(event["room_reservation_id"]),
+    )
+
+
+def read_event_pages(
+    watermark: Watermark, partition: Optional[Partition] = None
+) -> Iterator[List[EventRecord]]:
+    """
+    Read the events after a watermark from the data provider database, one page at a time.
+
+    Events are streamed with a server-side cursor where the database supports it, so
+    only one page is held in memory.
+
+    Args:
+        watermark (Watermark): The ID of the last aggregated event.
+        partition (Optional[Partition]): The hotel partition, None for all the events.
+
+    Yields:
+        List[EventRecord]: The events of each page, in ID order.
+    """
+    page_size = settings.DASHBOARD_EVENT_PAGE_SIZE
+    events = Event.objects.using(router.db_for_read(Event))
+    if partition is not None:
+        events = in_hotel_partition(events, *partition)
+    rows = (
+        events_after_id(events, watermark)
+        .values_list(
+            "id",
+            "hotel_id",
+            "timestamp",
+            "rpg_status",
+            "night_of_stay",
+            "room_reservation_id",
+        )
+        .iterator(chunk_size=page_size)
+    )
+    while True:
+        events = [EventRecord(*row) for row in islice(rows, page_size)]
+        if not events:
+            return
+        yield events
+
+
+def apply_page(events: List[EventRecord], watermark: Watermark, name: str) -> Watermark:
+    """
+    Aggregate a page of events and advance a checkpoint past it, atomically.
+
+    The page updates the dashboard data, the booking curves and the reservation index.
+    Its events are folded in `(timestamp, id)` order, so a cancellation finds a booking
+    of the same page even if the booking was inserted after it. A row created
+    concurrently by another worker makes the transaction fail on the unique constraints;
+    the page is then applied again, incrementing that row. A database locked by the
+    writes of other partitions (SQLite allows a single writer) is retried with an
+    exponential backoff.
+
+    Args:
+        events (List[EventRecord]): The events of the page, in ID order.
+        watermark (Watermark): The checkpoint the page was read from.
+        name (str): The name of the checkpoint.
+
+    Returns:
+        Watermark: The new checkpoint, the ID of the last event of the page.
+
+    Raises:
+        CheckpointConflict: If the checkpoint is no longer at `watermark`. Nothing is
+        written in that case.
+    """
+    if not events:
+        return watermark
+    new_watermark = events[-1].id
+    events = sorted(events, key=lambda event: (event.timestamp, event.id))
+    deltas = fold_events(events, lookup_bookings(events))
+    curve_deltas = fold_booking_curves(events)
+    for attempt in range(1, APPLY_ATTEMPTS + 1):
+        try:
+            with transaction.atomic(using=router.db_for_write(DashboardData)):
+                apply_deltas(deltas)
+                apply_curve_deltas(curve_deltas)
+                index_bookings(events)
+                advance_checkpoint(name, watermark, new_watermark)
+            return new_watermark
+        except IntegrityError:
+            if attempt == APPLY_ATTEMPTS:
+                raise
+            logger.info(
+                f"Dashboard rows created concurrently, retrying page ({attempt})"
+            )
+        except OperationalError as e:
+            if attempt == APPLY_ATTEMPTS:
+                raise
+            delay = APPLY_RETRY_DELAY * 2 ** (attempt - 1)
+            logger.warning(f"{e}, retrying page in {delay:.1f}s ({attempt})")
+            time.sleep(delay)
+
+
+def advance_checkpoint(
+    name: str, watermark: Watermark, new_watermark: Watermark
+) -> None:
+    """
+    Move a checkpoint from `watermark` to `new_watermark`.
+
+    The update only matches a checkpoint still at `watermark`, so two runs reading the
+    same events cannot both aggregate them.
+
+    Args:
+        name (str): The name of the checkpoint.
+        watermark (Watermark): The expected current checkpoint.
+        new_watermark (Watermark): The new checkpoint.
+
+    Raises:
+        CheckpointConflict: If the checkpoint is no longer at `watermark`.
+    """
+    updated = DashboardCheckpoint.objects.filter(
+        name=name, last_event_id=watermark
+    ).update(last_event_id=new_watermark, updated_at=now())
+    if updated:
+        return
+    _, created = DashboardCheckpoint.objects.get_or_create(
+        name=name, defaults={"last_event_id": new_watermark}
+    )
+    if not created:
+        raise CheckpointConflict(name)
+
+
+def lookup_bookings(events: Iterable[EventRecord]) -> Dict[uuid.UUID, datetime]:
+    """
+    Look up the bookings cancelled by events in the reservation index.
+
+    Args:
+        events (Iterable[EventRecord]): The events.
+
+    Returns:
+        Dict[uuid.UUID, datetime]: The timestamp of the last indexed booking of each
+        cancelled reservation that has one.
+    """
+    return find_bookings(
+        {
+            event.room_reservation_id
+            for event in events
+            if event.status == Event.CANCELLATION
         }
-        current_count = (
-            DashboardData.objects.filter(**filter_kwargs).aggregate(
-                total=Sum("booking_count")
-            )["total"]
-            or 0
+    )
+
+
+def find_bookings(reservation_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, datetime]:
+    """
+    Look up reservations in the reservation index.
+
+    Args:
+        reservation_ids (Iterable[uuid.UUID]): The reservations.
+
+    Returns:
+        Dict[uuid.UUID, datetime]: The timestamp of the last indexed booking of each
+        reservation that has one.
+    """
+    reservation_ids = list(reservation_ids)
+    booked_at: Dict[uuid.UUID, datetime] = {}
+    for offset in range(0, len(reservation_ids), DELTA_BATCH_SIZE):
+        booked_at.update(
+            ReservationIndex.objects.filter(
+                room_reservation_id__in=reservation_ids[
+                    offset : offset + DELTA_BATCH_SIZE
+                ]
+            ).values_list("room_reservation_id", "booked_at")
         )
-        updated_count = current_count + (1 if event.get("status", 1) == 1 else -1)
+    return booked_at
+
+
+def fold_events(
+    events: Iterable[EventRecord], booked_at: Optional[Dict[uuid.UUID, datetime]] = None
+) -> Counter:
+    """
+    Fold events into booking count deltas per dashboard row.
+
+    Bookings add one to the daily row of their hotel. Cancellations subtract one from
+    the daily row of the booking they cancel, the last booking of their reservation
+    either earlier in `events` or in `booked_at`, or from their own daily row when the
+    booking is unknown. The daily deltas are rolled up to the week, month, quarter and
+    year rows.
+
+    Args:
+        events (Iterable[EventRecord]): The events to fold, in `(timestamp, id)` order.
+        booked_at (Optional[Dict[uuid.UUID, datetime]]): The timestamps of the bookings
+        of earlier events, by reservation, see `lookup_bookings`.
 
-        _, created = DashboardData.objects.update_or_create(
-            defaults={"booking_count": updated_count}, **filter_kwargs
+    Returns:
+        Counter: The deltas keyed by `(hotel_id, year, month, day, period)`.
+    """
+    booked_at = dict(booked_at or {})
+    day_deltas: Counter = Counter()
+    for event in events:
+        if event.status == Event.BOOKING:
+            booked_at[event.room_reservation_id] = event.timestamp
+            bucket, delta = event.timestamp, 1
+        else:
+            bucket = booked_at.get(event.room_reservation_id, event.timestamp)
+            delta = -1
+        day_deltas[
+            (event.hotel_id, bucket.year, bucket.month, bucket.day, "day")
+        ] += delta
+    return rollup(day_deltas)
+
+
+def fold_booking_curves(events: Iterable[EventRecord]) -> Counter:
+    """
+    Fold events into net booking deltas per booking curve row.
+
+    Bookings add one and cancellations subtract one from the row of their night of stay
+    and lead time, the number of days from the day of the event to the night of stay.
+
+    Args:
+        events (Iterable[EventRecord]): The events to fold.
+
+    Returns:
+        Counter: The deltas keyed by `(hotel_id, night_of_stay, lead_time_days)`.
+    """
+    deltas: Counter = Counter()
+    for event in events:
+        lead_time_days = (event.night_of_stay - event.timestamp.date()).days
+        deltas[(event.hotel_id, event.night_of_stay, lead_time_days)] += (
+            1 if event.status == Event.BOOKING else -1
         )
-        record_type = "created" if created else "updated"
-        logger.info(
-            f"{record_type.capitalize()} {period} record for {filter_kwargs} with updated count {updated_count}"
+    return deltas
+
+
+def apply_deltas(deltas: Counter) -> None:
+    """
+    Apply booking count deltas to the dashboard rows in a single transaction.
+
+    Existing rows are incremented with one `F("booking_count") + delta` update per row,
+    sent as a single bulk update, and missing rows are created in bulk. The number of
+    queries depends on the number of distinct rows, not on the number of events.
+
+    Month, quarter and year rows have no day, and NULL never conflicts in a unique
+    constraint, so the rows to update are looked up rather than upserted with
+    `update_conflicts`.
+
+    The cached dashboard responses of the updated hotels are invalidated once the
+    changes are committed.
+
+    Args:
+        deltas (Counter): The deltas keyed by `(hotel_id, year, month, day, period)`.
+    """
+    if not deltas:
+        return
+    database = router.db_for_write(DashboardData)
+    with transaction.atomic(using=database):
+        existing = DashboardData.objects.select_for_update().filter(
+            hotel_id__in={key[0] for key in deltas},
+            year__in={key[1] for key in deltas},
+            month__in={key[2] for key in deltas},
         )
-    except Exception as e:
-        logger.error(f"Error updating dashboard for {filter_kwargs}: {str(e)}")
+        rows = {
+            (row.hotel_id, row.year, row.month, row.day, row.period): row
+            for row in existing
+        }
+
+        updated = []
+        created = []
+        for key, delta in deltas.items():
+            row = rows.get(key)
+            if row is not None:
+                row.booking_count = F("booking_count") + delta
+                updated.append(row)
+            else:
+                hotel_id, year, month, day, period = key
+                created.append(
+                    DashboardData(
+                        hotel_id=hotel_id,
+                        year=year,
+                        month=month,
+                        day=day,
+                        period=period,
+                        booking_count=delta,
+                    )
+                )
+        DashboardData.objects.bulk_update(
+            updated, ["booking_count"], batch_size=DELTA_BATCH_SIZE
+        )
+        DashboardData.objects.bulk_create(created, batch_size=DELTA_BATCH_SIZE)
+        hotel_ids = {key[0] for key in deltas}
+        transaction.on_commit(lambda: bump_versions(hotel_ids), using=database)
+    logger.info(f"Updated {len(updated)} and created {len(created)} dashboard records")
+
+
+def apply_curve_deltas(deltas: Counter) -> None:
+    """
+    Apply net booking deltas to the booking curve rows in a single transaction.
+
+    Like `apply_deltas`, existing rows are incremented in bulk with `F` expressions and
+    missing rows are created in bulk.
+
+    Args:
+        deltas (Counter): The deltas keyed by
+            `(hotel_id, night_of_stay, lead_time_days)`.
+    """
+    if not deltas:
+        return
+    database = router.db_for_write(BookingCurve)
+    with transaction.atomic(using=database):
+        existing = BookingCurve.objects.select_for_update().filter(
+            hotel_id__in={key[0] for key in deltas},
+            night_of_stay__in={key[1] for key in deltas},
+        )
+        rows = {
+            (row.hotel_id, row.night_of_stay, row.lead_time_days): row
+            for row in existing
+        }
+
+        updated = []
+        created = []
+        for key, delta in deltas.items():
+            row = rows.get(key)
+            if row is not None:
+                row.net_bookings = F("net_bookings") + delta
+                updated.append(row)
+            else:
+                hotel_id, night_of_stay, lead_time_days = key
+                created.append(
+                    BookingCurve(
+                        hotel_id=hotel_id,
+                        night_of_stay=night_of_stay,
+                        lead_time_days=lead_time_days,
+                        net_bookings=delta,
+                    )
+                )
+        BookingCurve.objects.bulk_update(
+            updated, ["net_bookings"], batch_size=DELTA_BATCH_SIZE
+        )
+        BookingCurve.objects.bulk_create(created, batch_size=DELTA_BATCH_SIZE)
+        hotel_ids = {key[0] for key in deltas}
+        transaction.on_commit(lambda: bump_versions(hotel_ids), using=database)
+    logger.info(f"Updated {len(updated)} and created {len(created)} booking curve rows")
+
+
+def index_bookings(events: Iterable[EventRecord]) -> None:
+    """
+    Record the bookings of events in the reservation index.
+
+    Each reservation keeps its last booking, so a reservation booked again after a
+    cancellation is located at its new booking. A booking older than the indexed one,
+    inserted late, does not replace it.
+
+    Args:
+        events (Iterable[EventRecord]): The events, in `(timestamp, id)` order.
+    """
+    bookings = {
+        event.room_reservation_id: ReservationIndex(
+            room_reservation_id=event.room_reservation_id,
+            hotel_id=event.hotel_id,
+            booked_at=event.timestamp,
+            night_of_stay=event.night_of_stay,
+        )
+        for event in events
+        if event.status == Event.BOOKING
+    }
+    indexed_at = find_bookings(bookings)
+    bookings = {
+        reservation_id: booking
+        for reservation_id, booking in bookings.items()
+        if reservation_id not in indexed_at
+        or booking.booked_at >= indexed_at[reservation_id]
+    }
+    ReservationIndex.objects.bulk_create(
+        bookings.values(),
+        batch_size=DELTA_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["room_reservation_id"],
+        update_fields=["hotel_id", "booked_at", "night_of_stay"],
+    )
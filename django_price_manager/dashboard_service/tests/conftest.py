@@ -0,0 +1,18 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Cached dashboard responses must not leak between tests
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def update_lock_redis():
+    # The dashboard updates take their lock in Redis, which is not available in tests
+    with patch("dashboard_service.tasks.r") as mock_redis:
+        mock_redis.exists.return_value = 0
+        yield mock_redis
@@ -0,0 +1,78 @@
+import uuid
+from datetime import date, datetime, timezone
+
+import pytest
+from dashboard_service.models import (
+    BookingCurve,
+    DashboardCheckpoint,
+    DashboardData,
+    ReservationIndex,
+)
+from data_provider.models import Event
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(databases=["dashboard_service", "data_provider"])
+def test_rebuild_dashboard(create_event):
+    for hotel_id, day, status in [(1, 1, 1), (1, 1, 1), (1, 2, 2), (2, 1, 1)]:
+        create_event(
+            hotel_id=hotel_id,
+            timestamp=datetime(2023, 5, day, 12, tzinfo=timezone.utc),
+            rpg_status=status,
+            night_of_stay=date(2023, 6, 1),
+        )
+    # A booking cancelled the next year, counted on the day of the booking
+    reservation_id = uuid.uuid4()
+    for timestamp, status in [
+        (datetime(2022, 12, 31, 12, tzinfo=timezone.utc), Event.BOOKING),
+        (datetime(2023, 1, 2, 12, tzinfo=timezone.utc), Event.CANCELLATION),
+    ]:
+        create_event(
+            hotel_id=4,
+            timestamp=timestamp,
+            rpg_status=status,
+            room_reservation_id=reservation_id,
+            night_of_stay=date(2023, 6, 1),
+        )
+    # Stale rows are replaced by the rebuilt ones
+    DashboardData.objects.create(
+        hotel_id=3, period="day", year=2023, month=5, day=1, booking_count=7
+    )
+
+    call_command("rebuild_dashboard", workers=1)
+
+    counts = {
+        (row.hotel_id, row.period, row.day): row.booking_count
+        for row in DashboardData.objects.all()
+    }
+    assert counts == {
+        (1, "day", 1): 2,
+        (1, "day", 2): -1,
+        (1, "week", 1): 1,
+        (1, "month", None): 1,
+        (1, "quarter", None): 1,
+        (1, "year", None): 1,
+        (2, "day", 1): 1,
+        (2, "week", 1): 1,
+        (2, "month", None): 1,
+        (2, "quarter", None): 1,
+        (2, "year", None): 1,
+        (4, "day", 31): 0,
+        (4, "week", 26): 0,
+        (4, "month", None): 0,
+        (4, "quarter", None): 0,
+        (4, "year", None): 0,
+    }
+    # Night of June 1st, booked 31 and 30 days before
+    assert {
+        (row.hotel_id, row.lead_time_days): row.net_bookings
+        for row in BookingCurve.objects.all()
+    } == {(1, 31): 2, (1, 30): -1, (2, 31): 1, (4, 152): 1, (4, 150): -1}
+    # Every booked reservation is indexed at its last booking
+    assert ReservationIndex.objects.count() == 4
+    assert ReservationIndex.objects.get(
+        room_reservation_id=reservation_id
+    ).booked_at == datetime(2022, 12, 31, 12, tzinfo=timezone.utc)
+    # Incremental updates resume after the last rebuilt event
+    last_event = Event.objects.order_by("id").last()
+    assert DashboardCheckpoint.objects.get().last_event_id == last_event.id
@@ -0,0 +1,19 @@
+from collections import Counter
+
+from dashboard_service.rollups import rollup
+
+
+def test_rollup_day_deltas():
+    deltas = rollup(Counter({(1, 2025, 1, 1, "day"): 2, (1, 2025, 2, 14, "day"): -1}))
+
+    assert deltas == {
+        (1, 2025, 1, 1, "day"): 2,
+        # January 1st, 2025 is a Wednesday, its week starts in the previous year
+        (1, 2024, 12, 30, "week"): 2,
+        (1, 2025, 1, None, "month"): 2,
+        (1, 2025, 2, 14, "day"): -1,
+        (1, 2025, 2, 10, "week"): -1,
+        (1, 2025, 2, None, "month"): -1,
+        (1, 2025, 1, None, "quarter"): 1,
+        (1, 2025, 1, None, "year"): 1,
+    }
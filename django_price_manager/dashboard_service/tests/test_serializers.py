@@ -1,5 +1,9 @@
 import pytest
-from dashboard_service.serializers import DashboardDataSerializer
+from dashboard_service.models import DashboardData
+from dashboard_service.serializers import DashboardDataSerializer, dashboard_rows
+from rest_framework.renderers import JSONRenderer
+
+from django_price_manager.renderers import FastJSONRenderer
 
 
 @pytest.mark.django_db(databases=["dashboard_service"])
@@ -49,3 +53,19 @@ def test_dashboard_data_serializer():
     serializer = DashboardDataSerializer(data=invalid_period_data)
     assert not serializer.is_valid()
     assert "period" in serializer.errors
+
+
+@pytest.mark.django_db(databases=["dashboard_service"])
+def test_dashboard_rows_match_dashboard_data_serializer():
+    DashboardData.objects.create(
+        hotel_id=1, period="month", year=2020, month=1, booking_count=10
+    )
+    DashboardData.objects.create(
+        hotel_id=1, period="day", year=2020, month=1, day=2, booking_count=-1
+    )
+    dashboard_objects = DashboardData.objects.order_by("id")
+
+    expected = JSONRenderer().render(
+        DashboardDataSerializer(dashboard_objects, many=True).data
+    )
+    assert FastJSONRenderer().render(dashboard_rows(dashboard_objects)) == expected
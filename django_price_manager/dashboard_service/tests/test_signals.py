@@ -0,0 +1,28 @@
+from unittest.mock import patch
+
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+@patch("dashboard_service.signals.update_dashboard_data")
+@patch("dashboard_service.signals.r")
+def test_ingested_events_schedule_one_dashboard_update(
+    mock_redis, mock_task, event_data, settings, django_capture_on_commit_callbacks
+):
+    settings.DASHBOARD_REFRESH_MODE = "push"
+    settings.DASHBOARD_REFRESH_DEBOUNCE_MS = 500
+    # The second notification falls in the window opened by the first one
+    mock_redis.set.side_effect = [True, False]
+    event = event_data
+
+    client = APIClient()
+    with django_capture_on_commit_callbacks(using="data_provider", execute=True):
+        assert client.post("/events/", event, format="json").status_code == 201
+    with django_capture_on_commit_callbacks(using="data_provider", execute=True):
+        events = [dict(event, status=2), dict(event, status=2, hotel_id=2)]
+        response = client.post("/events/bulk/", events, format="json")
+        assert response.status_code == 201
+
+    assert mock_redis.set.call_count == 2
+    mock_task.apply_async.assert_called_once_with(countdown=0.5)
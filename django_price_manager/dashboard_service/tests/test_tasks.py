@@ -1,34 +1,286 @@
-from datetime import datetime
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
 from unittest.mock import patch
 
 import pytest
-from dashboard_service.models import DashboardData
-from dashboard_service.tasks import update_dashboard_data
+from dashboard_service.models import (
+    BookingCurve,
+    DashboardCheckpoint,
+    DashboardData,
+    ReservationIndex,
+)
+from dashboard_service.tasks import (
+    APPLY_RETRY_DELAY,
+    EventRecord,
+    apply_curve_deltas,
+    apply_deltas,
+    fold_events,
+    update_dashboard_data,
+    update_dashboard_partition,
+)
+from data_provider.models import Event
+from data_provider.tasks import process_due_retries, process_event_batch
+from django.core.management import call_command
+from django.db import DatabaseError, OperationalError
+from rest_framework.test import APIClient
 
 
 @pytest.mark.django_db(databases=["dashboard_service", "data_provider"])
 @patch("requests.get")
-def test_update_dashboard_data(mock_get):
+def test_update_dashboard_data(mock_get, event_data):
     current_year = datetime.now().year
     mock_response = [
-        {
-            "id": 1,
-            "hotel_id": 1,
-            "event_timestamp": f"{current_year}-01-01T00:00:00Z",
-            "status": 1,
-            "room_reservation_id": "0013e338-0158-4d5c-8698-aebe00cba360",
-            "night_of_stay": f"{current_year}-01-01",
-        }
+        dict(
+            event_data,
+            id=1,
+            event_timestamp=f"{current_year}-01-01T00:00:00Z",
+            night_of_stay=f"{current_year}-01-01",
+        )
     ]
-    mock_get.return_value.json.return_value = mock_response
+    # Timestamps with microseconds are parsed, and a malformed event stops the page
+    mock_response.append(
+        dict(
+            mock_response[0],
+            id=2,
+            event_timestamp=f"{current_year}-01-01T10:00:00.123456Z",
+        )
+    )
+    mock_response.append(dict(mock_response[0], id=3, event_timestamp="invalid"))
+    mock_get.return_value.json.return_value = {"next": None, "results": mock_response}
     mock_get.return_value.status_code = 200
 
     update_dashboard_data()
 
+    # Events are read in insertion order
+    assert mock_get.call_args.kwargs["params"]["ordering"] == "id"
     # Verify that the dashboard data was updated
     dashboard_data = DashboardData.objects.filter(
         hotel_id=1, period="day", year=current_year, month=1, day=1
     )
     assert dashboard_data.exists()
     dashboard_data = dashboard_data.first()
-    assert dashboard_data.booking_count == 1
+    assert dashboard_data.booking_count == 2
+    assert DashboardCheckpoint.objects.get().last_event_id == 2
+
+
+@pytest.mark.django_db(databases=["dashboard_service"])
+def test_apply_deltas_folds_events_per_row():
+    DashboardData.objects.create(
+        hotel_id=1, period="month", year=2023, month=5, day=None, booking_count=10
+    )
+    events = [
+        EventRecord(
+            event_id,
+            hotel_id,
+            datetime(2023, 5, day, hour, tzinfo=timezone.utc),
+            status,
+            date(2023, 6, 1),
+            uuid.uuid4(),
+        )
+        for event_id, (hotel_id, day, hour, status) in enumerate(
+            [(1, 1, 10, 1), (1, 1, 11, 1), (1, 2, 9, 2), (2, 2, 9, 1)]
+        )
+    ]
+
+    apply_deltas(fold_events(events))
+
+    counts = {
+        (row.hotel_id, row.period, row.day): row.booking_count
+        for row in DashboardData.objects.all()
+    }
+    # Day deltas are rolled up to the week starting on Monday, May 1st
+    assert counts == {
+        (1, "year", None): 1,
+        (1, "quarter", None): 1,
+        (1, "month", None): 11,
+        (1, "week", 1): 1,
+        (1, "day", 1): 2,
+        (1, "day", 2): -1,
+        (2, "year", None): 1,
+        (2, "quarter", None): 1,
+        (2, "month", None): 1,
+        (2, "week", 1): 1,
+        (2, "day", 2): 1,
+    }
+
+
+@pytest.mark.django_db(databases=["dashboard_service", "data_provider"])
+@patch("requests.get")
+def test_update_dashboard_data_reads_events_from_database(
+    mock_get, create_event, settings
+):
+    settings.DASHBOARD_EVENT_SOURCE = "orm"
+    settings.DASHBOARD_EVENT_PAGE_SIZE = 2
+    timestamp = datetime(2023, 5, 1, 12, tzinfo=timezone.utc)
+
+    for _ in range(3):
+        create_event(timestamp=timestamp, night_of_stay=date(2023, 6, 1))
+    update_dashboard_data()
+    # An older event, retried or from a slower consumer, is committed after the run
+    last_event = create_event(
+        timestamp=timestamp - timedelta(hours=4), night_of_stay=date(2023, 6, 1)
+    )
+    update_dashboard_data()
+
+    mock_get.assert_not_called()
+    assert DashboardData.objects.get(period="day", day=1).booking_count == 4
+    # Booked 31 days before the night of stay
+    assert BookingCurve.objects.get(lead_time_days=31).net_bookings == 4
+    assert DashboardCheckpoint.objects.get().last_event_id == last_event.id
+
+
+@pytest.mark.django_db(databases=["dashboard_service", "data_provider"])
+@patch("data_provider.queues.r")
+def test_retried_events_are_counted(mock_redis, create_event, event_data, settings):
+    settings.DASHBOARD_EVENT_SOURCE = "orm"
+    settings.EVENT_QUEUE_CONSUMER = "bulk"
+    payload = json.dumps(
+        dict(
+            event_data,
+            event_timestamp="2023-05-01T10:00:00Z",
+            night_of_stay="2023-06-01",
+        )
+    )
+    with patch(
+        "data_provider.serializers.EventListSerializer.create",
+        side_effect=DatabaseError("database is down"),
+    ):
+        assert process_event_batch([payload]) == 0
+    [(_, retries)] = [c.args for c in mock_redis.zadd.call_args_list]
+
+    # The dashboard advances past the failed event before its retry
+    create_event(
+        timestamp=datetime(2023, 5, 2, tzinfo=timezone.utc),
+        night_of_stay=date(2023, 6, 1),
+    )
+    update_dashboard_data()
+    assert not DashboardData.objects.filter(period="day", day=1).exists()
+    mock_redis.zrangebyscore.side_effect = [[member.encode() for member in retries], []]
+    mock_redis.pipeline.return_value.execute.return_value = [1]
+    assert process_due_retries() == 1
+    update_dashboard_data()
+
+    counts = {
+        row.day: row.booking_count for row in DashboardData.objects.filter(period="day")
+    }
+    assert counts == {1: 1, 2: 1}
+    retried_event = Event.objects.get(timestamp__date=date(2023, 5, 1))
+    assert DashboardCheckpoint.objects.get().last_event_id == retried_event.id
+
+
+@pytest.mark.django_db(databases=["dashboard_service", "data_provider"])
+@patch("requests.get")
+def test_update_dashboard_data_requires_checkpoint(mock_get):
+    # Dashboard data aggregated without a checkpoint, before upgrading
+    DashboardData.objects.create(
+        hotel_id=1, period="month", year=2023, month=5, booking_count=1
+    )
+
+    update_dashboard_data()
+
+    # Aggregating every event again would count them twice
+    mock_get.assert_not_called()
+    assert not DashboardCheckpoint.objects.exists()
+
+
+@pytest.mark.django_db(databases=["dashboard_service", "data_provider"])
+def test_update_dashboard_partitions(create_event, settings):
+    settings.DASHBOARD_EVENT_SOURCE = "orm"
+    for hotel_id in [1, 2, 3]:
+        create_event(
+            hotel_id=hotel_id,
+            timestamp=datetime(2023, 5, 1, tzinfo=timezone.utc),
+            night_of_stay=date(2023, 6, 1),
+        )
+
+    update_dashboard_partition(1, 2)
+    assert set(DashboardData.objects.values_list("hotel_id", flat=True)) == {1, 3}
+
+    # The first write of partition 0 finds the database locked by another partition
+    attempts = []
+
+    def apply_curve_deltas_once_locked(deltas):
+        attempts.append(deltas)
+        if len(attempts) == 1:
+            raise OperationalError("database is locked")
+        apply_curve_deltas(deltas)
+
+    with patch(
+        "dashboard_service.tasks.apply_curve_deltas",
+        side_effect=apply_curve_deltas_once_locked,
+    ), patch("dashboard_service.tasks.time.sleep") as mock_sleep:
+        update_dashboard_partition(0, 2)
+    mock_sleep.assert_called_once_with(APPLY_RETRY_DELAY)
+    assert DashboardData.objects.filter(period="day", booking_count=1).count() == 3
+    assert set(DashboardCheckpoint.objects.values_list("name", flat=True)) == {
+        "events-0-of-2",
+        "events-1-of-2",
+    }
+
+
+@pytest.mark.django_db(databases=["dashboard_service", "data_provider"])
+def test_cancellations_decrement_booking_day(create_event, settings):
+    settings.DASHBOARD_EVENT_SOURCE = "orm"
+    settings.DASHBOARD_EVENT_PAGE_SIZE = 1
+    reservation_id = uuid.uuid4()
+    # Booked on the 1st, cancelled on the 3rd and booked again on the 5th
+    for day, status in [
+        (1, Event.BOOKING),
+        (3, Event.CANCELLATION),
+        (5, Event.BOOKING),
+    ]:
+        create_event(
+            timestamp=datetime(2023, 5, day, tzinfo=timezone.utc),
+            rpg_status=status,
+            room_reservation_id=reservation_id,
+            night_of_stay=date(2023, 6, 1),
+        )
+
+    def snapshot():
+        return (
+            {
+                row.day: row.booking_count
+                for row in DashboardData.objects.filter(period="day")
+            },
+            ReservationIndex.objects.get().booked_at,
+        )
+
+    update_dashboard_data()
+    assert snapshot() == ({1: 0, 5: 1}, datetime(2023, 5, 5, tzinfo=timezone.utc))
+
+    # The rebuild resolves cancellations the same way
+    call_command("rebuild_dashboard", workers=1)
+    assert snapshot() == ({1: 0, 5: 1}, datetime(2023, 5, 5, tzinfo=timezone.utc))
+
+
+@pytest.mark.django_db(databases=["dashboard_service", "data_provider"])
+@patch("dashboard_service.tasks.aggregate_new_events")
+def test_update_dashboard_data_coalesces_triggers(mock_aggregate, update_lock_redis):
+    flags = set()
+    update_lock_redis.set.side_effect = lambda key, value: flags.add(key)
+    update_lock_redis.delete.side_effect = lambda key: flags.discard(key)
+    update_lock_redis.exists.side_effect = lambda key: key in flags
+    # Two triggers arrive while the first run holds the lock, and retry it once
+    update_lock_redis.lock.return_value.acquire.side_effect = [True] + [False] * 4
+
+    def aggregate(partition):
+        if mock_aggregate.call_count == 1:
+            update_dashboard_data()
+            update_dashboard_data()
+
+    mock_aggregate.side_effect = aggregate
+
+    update_dashboard_data()
+
+    # Both triggers are coalesced into a single rerun by the lock holder
+    assert mock_aggregate.call_count == 2
+    update_lock_redis.lock.return_value.release.assert_called_once()
+    response = APIClient().get("/dashboard/stats/")
+    assert response.data["updates"] == {"runs": 2, "reruns": 1, "coalesced": 2}
+
+    # A trigger that finds the lock held just before its release runs itself
+    update_lock_redis.lock.return_value.acquire.side_effect = [False, True]
+    update_dashboard_data()
+    assert mock_aggregate.call_count == 3
+    assert not flags
@@ -1,25 +1,25 @@
+import uuid
+from collections import Counter
+from datetime import date, datetime, timezone
 from unittest.mock import patch
 
 import pytest
 from dashboard_service.models import DashboardData
+from dashboard_service.tasks import (
+    EventRecord,
+    apply_curve_deltas,
+    apply_deltas,
+    fold_booking_curves,
+)
+from dashboard_service.views import series_range
 from rest_framework.test import APIClient
 
 
 @pytest.mark.django_db(databases=["dashboard_service"])
 @patch("requests.get")
-def test_dashboard_view(mock_get):
+def test_dashboard_view(mock_get, event_data):
     # Mock response data for GET /events
-    mock_response = [
-        {
-            "id": 1,
-            "hotel_id": 1,
-            "timestamp": "2020-01-01T00:00:00Z",
-            "rpg_status": 1,
-            "room_reservation_id": "0013e338-0158-4d5c-8698-aebe00cba360",
-            "night_of_stay": "2020-01-01",
-        }
-    ]
-    mock_get.return_value.json.return_value = mock_response
+    mock_get.return_value.json.return_value = [dict(event_data, id=1)]
     mock_get.return_value.status_code = 200
 
     client = APIClient()
@@ -33,3 +33,172 @@ def test_dashboard_view(mock_get):
     assert response.status_code == 200
     assert len(response.data) == 1
     assert response.data[0]["booking_count"] == 10
+
+
+@pytest.mark.django_db(databases=["dashboard_service"])
+def test_dashboard_view_rollup_periods():
+    client = APIClient()
+    for month in [1, 4]:
+        DashboardData.objects.create(
+            hotel_id=1, period="quarter", year=2020, month=month, booking_count=month
+        )
+
+    response = client.get(
+        "/dashboard/", {"hotel_id": 1, "period": "quarter", "year": 2020, "quarter": 2}
+    )
+    assert response.status_code == 200
+    assert [row["booking_count"] for row in response.data] == [4]
+
+    response = client.get("/dashboard/", {"period": "decade"})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(databases=["dashboard_service"])
+def test_dashboard_series_view():
+    client = APIClient()
+    for day, booking_count in [(1, 3), (3, 5), (4, 7)]:
+        DashboardData.objects.create(
+            hotel_id=1,
+            period="day",
+            year=2021,
+            month=5,
+            day=day,
+            booking_count=booking_count,
+        )
+
+    response = client.get(
+        "/dashboard/series/",
+        {"hotel_id": 1, "period": "day", "from": "2021-04-30", "to": "2021-05-03"},
+    )
+    assert response.status_code == 200
+    assert response.data["dates"] == [
+        "2021-04-30",
+        "2021-05-01",
+        "2021-05-02",
+        "2021-05-03",
+    ]
+    # Days without dashboard data are filled with zeros
+    assert response.data["booking_count"] == [0, 3, 0, 5]
+    # Only the rows of the range are read
+    rows = DashboardData.objects.filter(
+        series_range(date(2021, 4, 30), date(2021, 5, 3), "day"),
+        hotel_id=1,
+        period="day",
+    )
+    assert rows.count() == 2
+
+    response = client.get(
+        "/dashboard/series/", {"hotel_id": 1, "from": "2021-05-03", "to": "2021-05-01"}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(databases=["dashboard_service"])
+def test_dashboard_view_multiple_hotels():
+    client = APIClient()
+    for hotel_id in [1, 2, 3]:
+        for period in ["month", "year"]:
+            DashboardData.objects.create(
+                hotel_id=hotel_id,
+                period=period,
+                year=2020,
+                month=1,
+                booking_count=hotel_id,
+            )
+
+    response = client.get("/dashboard/", {"hotel_id": "1,3,4", "period": "month"})
+    assert response.status_code == 200
+    assert {
+        hotel_id: [row["booking_count"] for row in rows]
+        for hotel_id, rows in response.data.items()
+    } == {1: [1], 3: [3], 4: []}
+
+    response = client.post(
+        "/dashboard/",
+        {"hotel_ids": [2, 3], "periods": ["month", "year"], "year": 2020},
+        format="json",
+    )
+    assert response.status_code == 200
+    assert {hotel_id: len(rows) for hotel_id, rows in response.data.items()} == {
+        2: 2,
+        3: 2,
+    }
+
+    response = client.post("/dashboard/", {"hotel_ids": []}, format="json")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(databases=["dashboard_service"])
+def test_dashboard_view_cache(django_capture_on_commit_callbacks, settings, tmp_path):
+    # Responses are only cached in a cache shared with the workers
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path),
+        }
+    }
+    client = APIClient()
+    for hotel_id in [1, 2]:
+        DashboardData.objects.create(
+            hotel_id=hotel_id, period="month", year=2020, month=1, booking_count=1
+        )
+    query = {"period": "month", "year": 2020}
+
+    for expected in ["MISS", "HIT"]:
+        response = client.get("/dashboard/", {"hotel_id": 1, **query})
+        assert response["X-Cache"] == expected
+    response = client.get(
+        "/dashboard/", {"hotel_id": 1, **query}, HTTP_IF_NONE_MATCH=response["ETag"]
+    )
+    assert response.status_code == 304
+    assert client.get("/dashboard/", {"hotel_id": 2, **query})["X-Cache"] == "MISS"
+
+    # Updating a bucket of hotel 1 only invalidates the responses of hotel 1
+    with django_capture_on_commit_callbacks(using="dashboard_service", execute=True):
+        apply_deltas(Counter({(1, 2020, 1, None, "month"): 2}))
+    response = client.get("/dashboard/", {"hotel_id": 1, **query})
+    assert response["X-Cache"] == "MISS"
+    assert response.data[0]["booking_count"] == 3
+    assert client.get("/dashboard/", {"hotel_id": 2, **query})["X-Cache"] == "HIT"
+
+    response = client.get("/dashboard/stats/")
+    assert response.data["cache"] == {
+        "hits": 2,
+        "misses": 3,
+        "coalesced": 0,
+        "hit_ratio": 0.4,
+    }
+
+
+@pytest.mark.django_db(databases=["dashboard_service"])
+def test_booking_curve_view():
+    client = APIClient()
+    events = [
+        EventRecord(
+            event_id,
+            1,
+            datetime(2023, month, day, tzinfo=timezone.utc),
+            status,
+            date(2023, 6, night),
+            uuid.uuid4(),
+        )
+        for event_id, (month, day, status, night) in enumerate(
+            [(4, 2, 1, 1), (5, 1, 1, 1), (5, 1, 1, 1), (5, 31, 2, 1), (5, 31, 1, 2)]
+        )
+    ]
+    apply_curve_deltas(fold_booking_curves(events))
+
+    response = client.get(
+        "/dashboard/booking-curve/", {"hotel_id": 1, "night_of_stay": "2023-06-01"}
+    )
+    assert response.status_code == 200
+    assert response.data == {
+        "hotel_id": 1,
+        "night_of_stay": "2023-06-01",
+        "lead_time_days": [60, 31, 1],
+        "net_bookings": [1, 2, -1],
+        "on_the_books": [1, 3, 2],
+    }
+
+    response = client.get("/dashboard/booking-curve/", {"hotel_id": 1})
+    assert response.status_code == 400
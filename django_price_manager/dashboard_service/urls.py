@@ -9,10 +9,21 @@ from typing import List
 from django.urls import path
 from django.urls.resolvers import URLPattern
 
-from .views import DashboardView
+from .views import (
+    BookingCurveView,
+    DashboardSeriesView,
+    DashboardStatsView,
+    DashboardView,
+)
 
 # Define the URL patterns for the Dashboard related views.
 urlpatterns: List[URLPattern] = [
     # Endpoint for accessing and manipulating dashboard data via the DashboardView.
     path("dashboard/", DashboardView.as_view(), name="dashboard"),
+    # Endpoint for the booking counts of a hotel over a date range, in columns.
+    path("dashboard/series/", DashboardSeriesView.as_view(), name="dashboard-series"),
+    # Endpoint for the booking curve of a night of stay, in columns.
+    path("dashboard/booking-curve/", BookingCurveView.as_view(), name="booking-curve"),
+    # Endpoint for the counters of the dashboard response cache.
+    path("dashboard/stats/", DashboardStatsView.as_view(), name="dashboard-stats"),
 ]
@@ -1,9 +1,20 @@
 """
 Module for handling dashboard views in the Django Price Manager project.
 
-This module defines the views for retrieving dashboard data for specific hotels.
+This module defines the views for retrieving dashboard data for specific hotels, as rows
+or as columnar time series, and the booking curves of their stay dates. Responses are
+cached until the dashboard data of their hotels changes, and conditional GET requests
+are answered without reading the data.
 """
 
+from datetime import date
+from itertools import accumulate, islice
+from typing import Any, Callable, List, Optional, Union
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.http import HttpResponseBase
+from django.utils.dateparse import parse_date
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, response, status
@@ -11,19 +22,180 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from .models import DashboardData
-from .serializers import DashboardDataSerializer
+from django_price_manager.renderers import FastJSONRenderer
+from django_price_manager.versions import (
+    not_modified,
+    set_validators,
+    versions_etag,
+    versions_last_modified,
+)
+
+from .cache import cached_response, get_stats, get_versions
+from .models import BookingCurve, DashboardData
+from .rollups import PERIODS, bucket_starts, quarter_start_month
+from .serializers import (
+    DashboardBatchQuerySerializer,
+    DashboardDataSerializer,
+    dashboard_rows,
+    dashboard_rows_by_hotel,
+)
+from .tasks import get_update_stats
+
+
+def parse_hotel_ids(value: str) -> List[int]:
+    """
+    Parse a comma separated list of hotel IDs.
+
+    Args:
+        value (str): The `hotel_id` query parameter.
+
+    Returns:
+        List[int]: The hotel IDs.
+
+    Raises:
+        ValueError: If an ID is not an integer or there are too many IDs.
+    """
+    try:
+        hotel_ids = [int(part) for part in value.split(",")]
+    except ValueError:
+        raise ValueError("hotel_id must be a comma separated list of integers.")
+    if len(hotel_ids) > settings.DASHBOARD_BATCH_MAX_HOTELS:
+        raise ValueError(
+            f"At most {settings.DASHBOARD_BATCH_MAX_HOTELS} hotels can be queried at once."
+        )
+    return hotel_ids
+
+
+def filter_dashboard_data(
+    hotel_ids: Optional[List[int]],
+    periods: Optional[List[str]],
+    year: Optional[Union[int, str]] = None,
+    month: Optional[Union[int, str]] = None,
+    day: Optional[Union[int, str]] = None,
+    quarter: Optional[Union[int, str]] = None,
+) -> QuerySet:
+    """
+    Filter the dashboard data of hotels and periods.
+
+    The day filter only applies when every period starts on a given day ('day' or
+    'week'), and the quarter filter when the only period is 'quarter'.
+
+    Args:
+        hotel_ids (Optional[List[int]]): The hotel IDs, None for every hotel.
+        periods (Optional[List[str]]): The periods, None for every period.
+        year (Optional[Union[int, str]]): The year.
+        month (Optional[Union[int, str]]): The month.
+        day (Optional[Union[int, str]]): The day.
+        quarter (Optional[Union[int, str]]): The quarter, from 1 to 4.
+
+    Returns:
+        QuerySet: The matching dashboard data.
+    """
+    dashboard_objects = DashboardData.objects.all()
+    if hotel_ids:
+        if len(hotel_ids) == 1:
+            dashboard_objects = dashboard_objects.filter(hotel_id=hotel_ids[0])
+        else:
+            dashboard_objects = dashboard_objects.filter(hotel_id__in=hotel_ids)
+    if periods:
+        dashboard_objects = dashboard_objects.filter(period__in=periods)
+    if year:
+        dashboard_objects = dashboard_objects.filter(year=year)
+    if month:
+        dashboard_objects = dashboard_objects.filter(month=month)
+    # Ensure 'day' is considered only for the periods starting on a given day
+    if day and periods and set(periods) <= {"day", "week"}:
+        dashboard_objects = dashboard_objects.filter(day=day)
+    # Quarters are stored under their first month
+    if quarter and periods == ["quarter"]:
+        dashboard_objects = dashboard_objects.filter(
+            month=quarter_start_month(int(quarter) * 3)
+        )
+    return dashboard_objects
+
+
+def series_range(first: date, last: date, period: str) -> Q:
+    """
+    Filter the dashboard rows whose bucket starts between two bucket starts.
+
+    The rows are compared on their `(year, month, day)` key, or `(year, month)` for the
+    periods without a day, so a short series does not read the rows of whole years.
+
+    Args:
+        first (date): The start of the first bucket.
+        last (date): The start of the last bucket.
+        period (str): The period of the buckets.
+
+    Returns:
+        Q: The filter of the rows of the range.
+    """
+    in_first_month = Q(year=first.year, month=first.month)
+    starts_after = Q(year__gt=first.year) | Q(year=first.year, month__gt=first.month)
+    in_last_month = Q(year=last.year, month=last.month)
+    ends_before = Q(year__lt=last.year) | Q(year=last.year, month__lt=last.month)
+    if period in ("day", "week"):
+        in_first_month &= Q(day__gte=first.day)
+        in_last_month &= Q(day__lte=last.day)
+    # The year (and month) bounds keep the read an index range, the others trim its ends
+    if first.year == last.year:
+        index_range = Q(year=first.year, month__gte=first.month, month__lte=last.month)
+    else:
+        index_range = Q(year__gte=first.year, year__lte=last.year)
+    return index_range & (starts_after | in_first_month) & (ends_before | in_last_month)
+
+
+def cache_response(
+    request: Request,
+    query: dict,
+    hotel_ids: Optional[List[int]],
+    compute: Callable[[], Any],
+) -> HttpResponseBase:
+    """
+    Respond to a dashboard query, from the cache when possible.
+
+    The response carries an ETag and a Last-Modified date derived from the versions of
+    the queried hotels, so conditional GET requests for unchanged data are answered with
+    304 Not Modified without reading any row. Otherwise the response data is read from
+    the cache or computed on a miss, and the `X-Cache` header tells which.
+
+    Args:
+        request (Request): The HTTP request object.
+        query (dict): The normalized query, JSON serializable.
+        hotel_ids (Optional[List[int]]): The queried hotel IDs, None for every hotel.
+        compute (Callable[[], Any]): Computes the response data.
+
+    Returns:
+        HttpResponseBase: The response.
+    """
+    versions = get_versions(hotel_ids)
+    etag = versions_etag(query, versions)
+    last_modified = versions_last_modified(versions)
+    not_modified_response = not_modified(request, etag, last_modified)
+    if not_modified_response is not None:
+        return not_modified_response
+
+    data, hit = cached_response(etag, compute)
+    return set_validators(
+        response.Response(data, headers={"X-Cache": "HIT" if hit else "MISS"}),
+        etag,
+        last_modified,
+    )
 
 
 class DashboardView(generics.ListAPIView):
     """
     API view to retrieve dashboard data for a specific hotel and period.
 
-    This view supports querying dashboard data based on hotel ID, period (month or day),
-    year, month, and day. The data is returned in JSON format.
+    This view supports querying dashboard data based on hotel ID, period (year, quarter,
+    month, week or day), year, quarter, month, and day. Coarser periods are served from
+    their own rollup rows, one row per period. The data is returned in JSON format.
+
+    Several hotels can be queried at once, with comma separated IDs in GET requests or a
+    POST body; the data is then read with a single query and grouped by hotel.
     """
 
     serializer_class = DashboardDataSerializer
+    renderer_classes = [FastJSONRenderer]
 
     @swagger_auto_schema(
         operation_description="Retrieve dashboard data for a specific hotel and period",
@@ -31,15 +203,15 @@ class DashboardView(generics.ListAPIView):
             openapi.Parameter(
                 "hotel_id",
                 in_=openapi.IN_QUERY,
-                description="Hotel ID for which to retrieve data",
-                type=openapi.TYPE_INTEGER,
+                description="Hotel ID for which to retrieve data, or comma separated hotel IDs to group the data by hotel",
+                type=openapi.TYPE_STRING,
             ),
             openapi.Parameter(
                 "period",
                 in_=openapi.IN_QUERY,
-                description="Period of the data ('month' or 'day')",
+                description="Period of the data ('year', 'quarter', 'month', 'week' or 'day')",
                 type=openapi.TYPE_STRING,
-                enum=["month", "day"],
+                enum=list(PERIODS),
             ),
             openapi.Parameter(
                 "year",
@@ -49,6 +221,15 @@ class DashboardView(generics.ListAPIView):
                 minimum=1950,
                 maximum=2050,
             ),
+            openapi.Parameter(
+                "quarter",
+                in_=openapi.IN_QUERY,
+                description="Quarter of the data to retrieve, only relevant if period is 'quarter'",
+                type=openapi.TYPE_INTEGER,
+                minimum=1,
+                maximum=4,
+                required=False,
+            ),
             openapi.Parameter(
                 "month",
                 in_=openapi.IN_QUERY,
@@ -60,7 +241,7 @@ class DashboardView(generics.ListAPIView):
             openapi.Parameter(
                 "day",
                 in_=openapi.IN_QUERY,
-                description="Day of the data to retrieve, optional, only relevant if period is 'day'",
+                description="Day of the data to retrieve, optional, only relevant if period is 'day' or 'week'",
                 type=openapi.TYPE_INTEGER,
                 minimum=1,
                 maximum=31,
@@ -73,7 +254,7 @@ class DashboardView(generics.ListAPIView):
         Handle GET requests to retrieve dashboard data.
 
         This method retrieves dashboard data based on the provided query parameters,
-        such as hotel ID, period, year, month, and day. It validates the parameters
+        such as hotel ID, period, year, quarter, month, and day. It validates the parameters
         and filters the data accordingly.
 
         Args:
@@ -87,8 +268,22 @@ class DashboardView(generics.ListAPIView):
         year = request.query_params.get("year")
         month = request.query_params.get("month")
         day = request.query_params.get("day")
+        quarter = request.query_params.get("quarter")
 
-        # Validate year, month, and day within the view
+        try:
+            hotel_ids = parse_hotel_ids(hotel_id) if hotel_id else None
+        except ValueError as e:
+            return response.Response(
+                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if period and period not in PERIODS:
+            return response.Response(
+                {"error": f"Period must be one of {', '.join(PERIODS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Validate year, month, quarter and day within the view
         try:
             if year and (int(year) < 1950 or int(year) > 2050):
                 raise ValidationError("Year must be between 1950 and 2050.")
@@ -96,25 +291,294 @@ class DashboardView(generics.ListAPIView):
                 raise ValidationError("Month must be between 1 and 12.")
             if day and (int(day) < 1 or int(day) > 31):
                 raise ValidationError("Day must be between 1 and 31.")
+            if quarter and (int(quarter) < 1 or int(quarter) > 4):
+                raise ValidationError("Quarter must be between 1 and 4.")
         except ValueError:
             return response.Response(
                 {"error": "Invalid input for date parameters"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Filter dashboard data based on provided query parameters
-        dashboard_objects = DashboardData.objects.all()
-        if hotel_id:
-            dashboard_objects = dashboard_objects.filter(hotel_id=hotel_id)
-        if period:
-            dashboard_objects = dashboard_objects.filter(period=period)
-        if year:
-            dashboard_objects = dashboard_objects.filter(year=year)
-        if month:
-            dashboard_objects = dashboard_objects.filter(month=month)
-        if day and period == "day":  # Ensure 'day' is considered only for 'day' period
-            dashboard_objects = dashboard_objects.filter(day=day)
-
-        # Serialize the filtered data
-        serializer = DashboardDataSerializer(dashboard_objects, many=True)
-        return response.Response(serializer.data)
+        grouped = bool(hotel_id and "," in hotel_id)
+
+        def compute() -> Union[list, dict]:
+            # Filter dashboard data based on provided query parameters
+            dashboard_objects = filter_dashboard_data(
+                hotel_ids, [period] if period else None, year, month, day, quarter
+            )
+            # Serialize the filtered data through the fast read path
+            if grouped:
+                return dashboard_rows_by_hotel(dashboard_objects, hotel_ids)
+            return dashboard_rows(dashboard_objects)
+
+        query = {
+            "hotel_ids": hotel_ids,
+            "grouped": grouped,
+            "period": period,
+            **{
+                name: int(value) if value else None
+                for name, value in [
+                    ("year", year),
+                    ("month", month),
+                    ("day", day),
+                    ("quarter", quarter),
+                ]
+            },
+        }
+        return cache_response(request, query, hotel_ids, compute)
+
+    @swagger_auto_schema(
+        operation_description="Retrieve dashboard data for several hotels and periods",
+        request_body=DashboardBatchQuerySerializer,
+    )
+    def post(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Handle POST requests to retrieve dashboard data of several hotels at once.
+
+        The body lists the hotels and optionally the periods, with the same date filters
+        as the query parameters of GET requests. The rows of every hotel are read with a
+        single query and returned grouped by hotel.
+
+        Args:
+            request (Request): The HTTP request object containing the query in its body.
+
+        Returns:
+            Response: A response object containing the dashboard data of each hotel.
+        """
+        serializer = DashboardBatchQuerySerializer(data=request.data)
+        if not serializer.is_valid():
+            return response.Response(
+                serializer.errors, status=status.HTTP_400_BAD_REQUEST
+            )
+        query = serializer.validated_data
+
+        def compute() -> dict:
+            dashboard_objects = filter_dashboard_data(
+                query["hotel_ids"],
+                query.get("periods"),
+                query.get("year"),
+                query.get("month"),
+                query.get("day"),
+                query.get("quarter"),
+            )
+            return dashboard_rows_by_hotel(dashboard_objects, query["hotel_ids"])
+
+        return cache_response(
+            request, {"grouped": True, **query}, query["hotel_ids"], compute
+        )
+
+
+class DashboardSeriesView(generics.GenericAPIView):
+    """
+    API view to retrieve the booking counts of a hotel over a date range as a time series.
+
+    The series is returned in a columnar format: one array with the first day of each
+    bucket of the period, and one array with their booking counts. Buckets without
+    dashboard data are filled with zeros.
+    """
+
+    renderer_classes = [FastJSONRenderer]
+
+    @swagger_auto_schema(
+        operation_description="Retrieve the booking counts of a hotel over a date range",
+        manual_parameters=[
+            openapi.Parameter(
+                "hotel_id",
+                in_=openapi.IN_QUERY,
+                description="Hotel ID for which to retrieve data",
+                type=openapi.TYPE_INTEGER,
+                required=True,
+            ),
+            openapi.Parameter(
+                "period",
+                in_=openapi.IN_QUERY,
+                description="Period of the buckets, 'day' by default",
+                type=openapi.TYPE_STRING,
+                enum=list(PERIODS),
+            ),
+            openapi.Parameter(
+                "from",
+                in_=openapi.IN_QUERY,
+                description="First day of the range",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+                required=True,
+            ),
+            openapi.Parameter(
+                "to",
+                in_=openapi.IN_QUERY,
+                description="Last day of the range, inclusive",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+                required=True,
+            ),
+        ],
+    )
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Handle GET requests to retrieve a dashboard series.
+
+        The range is extended to whole buckets: the first bucket is the one containing
+        the `from` day, and the last one the bucket containing the `to` day.
+
+        Args:
+            request (Request): The HTTP request object containing query parameters.
+
+        Returns:
+            Response: A response object containing the `dates` and `booking_count` arrays.
+        """
+        period = request.query_params.get("period", "day")
+        try:
+            hotel_id = int(request.query_params["hotel_id"])
+            start = parse_date(request.query_params["from"])
+            end = parse_date(request.query_params["to"])
+            if start is None or end is None:
+                raise ValueError("Dates must be formatted as YYYY-MM-DD.")
+        except (KeyError, ValueError):
+            return response.Response(
+                {"error": "hotel_id, from and to are required, dates as YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if period not in PERIODS:
+            return response.Response(
+                {"error": f"Period must be one of {', '.join(PERIODS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if start > end:
+            return response.Response(
+                {"error": "from must not be after to."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_points = settings.DASHBOARD_SERIES_MAX_POINTS
+        dates = list(islice(bucket_starts(start, end, period), max_points + 1))
+        if len(dates) > max_points:
+            return response.Response(
+                {"error": f"The series is limited to {max_points} points."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def compute() -> dict:
+            # One index range read over the buckets of the series
+            rows = DashboardData.objects.filter(
+                series_range(dates[0], dates[-1], period),
+                hotel_id=hotel_id,
+                period=period,
+            ).values_list("year", "month", "day", "booking_count")
+            counts = {
+                date(year, month, day or 1): booking_count
+                for year, month, day, booking_count in rows
+            }
+            return {
+                "hotel_id": hotel_id,
+                "period": period,
+                "dates": [day.isoformat() for day in dates],
+                "booking_count": [counts.get(day, 0) for day in dates],
+            }
+
+        query = {
+            "series": hotel_id,
+            "period": period,
+            "from": dates[0].isoformat(),
+            "to": dates[-1].isoformat(),
+        }
+        return cache_response(request, query, [hotel_id], compute)
+
+
+class BookingCurveView(generics.GenericAPIView):
+    """
+    API view to retrieve the booking curve of a hotel's night of stay.
+
+    The curve is returned in a columnar format, ordered from the longest lead time to
+    the night of stay: the lead times in days, the net bookings recorded at each lead
+    time and the cumulative bookings on the books. Lead times without events are
+    omitted.
+    """
+
+    renderer_classes = [FastJSONRenderer]
+
+    @swagger_auto_schema(
+        operation_description="Retrieve the booking curve of a night of stay",
+        manual_parameters=[
+            openapi.Parameter(
+                "hotel_id",
+                in_=openapi.IN_QUERY,
+                description="Hotel ID for which to retrieve data",
+                type=openapi.TYPE_INTEGER,
+                required=True,
+            ),
+            openapi.Parameter(
+                "night_of_stay",
+                in_=openapi.IN_QUERY,
+                description="Night of stay of the curve",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+                required=True,
+            ),
+        ],
+    )
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Handle GET requests to retrieve a booking curve.
+
+        The curve is read from its precomputed rows with a single index range read.
+
+        Args:
+            request (Request): The HTTP request object containing query parameters.
+
+        Returns:
+            Response: A response object containing the `lead_time_days`, `net_bookings`
+            and `on_the_books` arrays.
+        """
+        try:
+            hotel_id = int(request.query_params["hotel_id"])
+            night_of_stay = parse_date(request.query_params["night_of_stay"])
+            if night_of_stay is None:
+                raise ValueError("Dates must be formatted as YYYY-MM-DD.")
+        except (KeyError, ValueError):
+            return response.Response(
+                {"error": "hotel_id and night_of_stay are required, as YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def compute() -> dict:
+            rows = list(
+                BookingCurve.objects.filter(
+                    hotel_id=hotel_id, night_of_stay=night_of_stay
+                )
+                .order_by("-lead_time_days")
+                .values_list("lead_time_days", "net_bookings")
+            )
+            net_bookings = [bookings for _, bookings in rows]
+            return {
+                "hotel_id": hotel_id,
+                "night_of_stay": night_of_stay.isoformat(),
+                "lead_time_days": [lead_time_days for lead_time_days, _ in rows],
+                "net_bookings": net_bookings,
+                "on_the_books": list(accumulate(net_bookings)),
+            }
+
+        query = {"booking_curve": hotel_id, "night_of_stay": night_of_stay.isoformat()}
+        return cache_response(request, query, [hotel_id], compute)
+
+
+class DashboardStatsView(generics.GenericAPIView):
+    """
+    API view to retrieve the counters of the dashboard response cache and updates.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Retrieve the hits, misses and coalesced requests of the dashboard cache, and the runs and coalesced triggers of the dashboard updates",
+    )
+    def get(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Handle GET requests to retrieve the dashboard cache and update counters.
+
+        Args:
+            request (Request): The HTTP request object.
+
+        Returns:
+            Response: A response object containing the cache counters and hit ratio,
+            and the update counters.
+        """
+        return response.Response({"cache": get_stats(), "updates": get_update_stats()})
@@ -0,0 +1,136 @@
+"""
+Module implementing the duplicate suppression of event ingestion.
+
+An event is identified by its idempotency key `(room_reservation_id, rpg_status,
+timestamp)`, unique in the database, so ingesting the same events again (a reloaded CSV
+file, a retried request) does not insert them twice. The bulk ingestion paths drop
+duplicates in three steps:
+
+- the keys of recently ingested events are remembered in the cache (Redis) for
+  `EVENT_DEDUP_TTL` seconds, so obvious duplicates are dropped without a query;
+- the remaining keys are looked up in the database with one query per batch;
+- the insert ignores conflicts, for duplicates ingested concurrently.
+
+Suppressed duplicates are counted in the cache.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Event
+
+# The idempotency key of an event, as `(room_reservation_id, rpg_status, timestamp)`
+EventKey = Tuple[uuid.UUID, int, datetime]
+
+SEEN_KEY_PREFIX = "events:seen"
+DUPLICATES_KEY = "events:stats:duplicates"
+
+# Number of keys looked up per database query
+LOOKUP_BATCH_SIZE: int = 500
+
+
+def event_key(event: Event) -> EventKey:
+    """
+    Return the idempotency key of an event.
+
+    Args:
+        event (Event): The event.
+
+    Returns:
+        EventKey: The key of the event.
+    """
+    return (event.room_reservation_id, event.rpg_status, event.timestamp)
+
+
+def seen_cache_key(key: EventKey) -> str:
+    """
+    Return the cache key remembering an ingested event.
+
+    Args:
+        key (EventKey): The idempotency key of the event.
+
+    Returns:
+        str: The cache key.
+    """
+    room_reservation_id, rpg_status, timestamp = key
+    return f"{SEEN_KEY_PREFIX}:{room_reservation_id.hex}:{rpg_status}:{timestamp.timestamp()}"
+
+
+def drop_duplicates(events: List[Event]) -> List[Event]:
+    """
+    Drop the events of a batch that were already ingested or repeat an earlier event.
+
+    Args:
+        events (List[Event]): The events to ingest.
+
+    Returns:
+        List[Event]: The new events, in their original order.
+    """
+    unique_events: Dict[EventKey, Event] = {}
+    for event in events:
+        unique_events.setdefault(event_key(event), event)
+
+    if settings.EVENT_DEDUP_TTL and unique_events:
+        seen = cache.get_many(seen_cache_key(key) for key in unique_events)
+        unique_events = {
+            key: event
+            for key, event in unique_events.items()
+            if seen_cache_key(key) not in seen
+        }
+
+    keys = list(unique_events)
+    for offset in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        batch = keys[offset : offset + LOOKUP_BATCH_SIZE]
+        existing = Event.objects.filter(
+            room_reservation_id__in={key[0] for key in batch}
+        ).values_list("room_reservation_id", "rpg_status", "timestamp")
+        for key in existing:
+            unique_events.pop(key, None)
+    return list(unique_events.values())
+
+
+def remember_events(events: Iterable[Event]) -> None:
+    """
+    Remember ingested events in the cache, so their duplicates are dropped without a
+    database query.
+
+    Args:
+        events (Iterable[Event]): The ingested events, including their duplicates.
+    """
+    if settings.EVENT_DEDUP_TTL:
+        cache.set_many(
+            {seen_cache_key(event_key(event)): 1 for event in events},
+            timeout=settings.EVENT_DEDUP_TTL,
+        )
+
+
+def count_duplicates(count: int) -> None:
+    """
+    Add suppressed duplicates to their counter.
+
+    Args:
+        count (int): The number of suppressed duplicates.
+    """
+    if not count:
+        return
+    if cache.add(DUPLICATES_KEY, count, timeout=None):
+        return
+    try:
+        cache.incr(DUPLICATES_KEY, count)
+    except ValueError:
+        # Evicted between the two calls
+        cache.add(DUPLICATES_KEY, count, timeout=None)
+
+
+def get_duplicate_count() -> int:
+    """
+    Return the number of duplicates suppressed since the counter was created.
+
+    Returns:
+        int: The number of suppressed duplicates.
+    """
+    return cache.get(DUPLICATES_KEY, 0)
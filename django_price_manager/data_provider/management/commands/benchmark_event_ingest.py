@@ -0,0 +1,98 @@
+"""
+This module implements a benchmark comparing the single-event and the bulk event ingestion endpoints. It generates
+synthetic events, posts them through `POST /events/` one by one and through `POST /events/bulk/` in batches, and
+reports the throughput of each path in events per second. All inserted rows are rolled back at the end of the run.
+"""
+
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from data_provider.models import Event
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+from rest_framework.test import APIClient
+
+
+def generate_events(count: int) -> List[Dict[str, Any]]:
+    """
+    Generate synthetic event payloads in the format accepted by the events API.
+
+    Args:
+        count (int): The number of events to generate.
+
+    Returns:
+        List[Dict[str, Any]]: The generated event payloads.
+    """
+    start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    events = []
+    for i in range(count):
+        timestamp = start + timedelta(minutes=i)
+        events.append(
+            {
+                "hotel_id": random.randint(1, 100),
+                "event_timestamp": timestamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "status": random.choice([Event.BOOKING, Event.CANCELLATION]),
+                "room_reservation_id": str(uuid.uuid4()),
+                "night_of_stay": (timestamp + timedelta(days=30)).date().isoformat(),
+            }
+        )
+    return events
+
+
+class Command(BaseCommand):
+    """
+    Django management command to benchmark the single-event and bulk ingestion paths.
+    """
+
+    help = "Benchmarks events/sec of POST /events/ against POST /events/bulk/"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--events",
+            type=int,
+            default=2000,
+            help="Number of events posted through each path.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of events per bulk request.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Runs both ingestion paths against the same synthetic events and prints the results.
+        """
+        events = generate_events(options["events"])
+        batch_size = options["batch_size"]
+        client = APIClient()
+
+        with transaction.atomic(using=router.db_for_write(Event)):
+            start = time.perf_counter()
+            for event in events:
+                client.post("/events/", event, format="json")
+            single_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for offset in range(0, len(events), batch_size):
+                client.post(
+                    "/events/bulk/", events[offset : offset + batch_size], format="json"
+                )
+            bulk_elapsed = time.perf_counter() - start
+
+            # Leave the database untouched
+            transaction.set_rollback(True, using=router.db_for_write(Event))
+
+        single_rate = len(events) / single_elapsed
+        bulk_rate = len(events) / bulk_elapsed
+        self.stdout.write(f"Single-event path: {single_rate:,.0f} events/sec")
+        self.stdout.write(
+            f"Bulk path (batch size {batch_size}): {bulk_rate:,.0f} events/sec"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Speedup: {bulk_rate / single_rate:.1f}x")
+        )
@@ -0,0 +1,172 @@
+"""
+This module implements a benchmark of the Event queries issued by the events API. It seeds synthetic events, then
+prints the query plan and the latency of each filter combination supported by `GET /events/`, flagging the queries
+that fall back to a full table scan. The seeded rows are rolled back at the end of the run unless `--keep` is given.
+"""
+
+import random
+import re
+import statistics
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict
+
+from data_provider.models import Event
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+from django.db.models import QuerySet
+
+# Plan fragments reported by SQLite and PostgreSQL for a full table scan. SQLite reports
+# index scans as "SCAN <table> USING [COVERING] INDEX", which are not full table scans.
+FULL_SCAN_PATTERN = re.compile(r"SCAN data_provider_event(?! USING)|Seq Scan")
+
+# Columns fetched by the events API
+EVENT_FIELDS = (
+    "id",
+    "hotel_id",
+    "timestamp",
+    "rpg_status",
+    "room_reservation_id",
+    "night_of_stay",
+)
+
+
+def seed_events(count: int, hotels: int, batch_size: int = 10_000) -> None:
+    """
+    Insert synthetic events spread over two years and `hotels` hotels.
+
+    Args:
+        count (int): The number of events to insert.
+        hotels (int): The number of distinct hotels.
+        batch_size (int): The number of events inserted per query.
+    """
+    start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    span = int(timedelta(days=730).total_seconds())
+    for offset in range(0, count, batch_size):
+        events = []
+        for _ in range(min(batch_size, count - offset)):
+            timestamp = start + timedelta(seconds=random.randrange(span))
+            events.append(
+                Event(
+                    hotel_id=random.randint(1, hotels),
+                    timestamp=timestamp,
+                    rpg_status=random.choice([Event.BOOKING, Event.CANCELLATION]),
+                    room_reservation_id=uuid.uuid4(),
+                    night_of_stay=timestamp.date()
+                    + timedelta(days=random.randint(0, 365)),
+                )
+            )
+        Event.objects.bulk_create(events)
+
+
+def build_queries(reservation_id: uuid.UUID) -> Dict[str, QuerySet]:
+    """
+    Build one queryset per filter combination of the events API, ordered like the API.
+
+    Args:
+        reservation_id (uuid.UUID): An existing room reservation ID.
+
+    Returns:
+        Dict[str, QuerySet]: The querysets, keyed by a description of their filters.
+    """
+    recent = datetime(2022, 12, 31, 23, tzinfo=timezone.utc)
+    month_start = datetime(2022, 6, 1, tzinfo=timezone.utc)
+    month_end = datetime(2022, 7, 1, tzinfo=timezone.utc)
+    events = Event.objects.all()
+    queries = {
+        "updated_gt (dashboard poller)": events.filter(timestamp__gt=recent),
+        "updated_gte + updated_lte": events.filter(
+            timestamp__gte=month_start, timestamp__lte=month_end
+        ),
+        "hotel_id": events.filter(hotel_id=1),
+        "hotel_id + updated_gt": events.filter(hotel_id=1, timestamp__gt=recent),
+        "hotel_id + updated_gte + updated_lte": events.filter(
+            hotel_id=1, timestamp__gte=month_start, timestamp__lte=month_end
+        ),
+        "hotel_id + night_of_stay range": events.filter(
+            hotel_id=1,
+            night_of_stay__gte=date(2022, 6, 1),
+            night_of_stay__lte=date(2022, 6, 30),
+        ),
+        "hotel_id + rpg_status": events.filter(hotel_id=1, rpg_status=Event.BOOKING),
+        "room_reservation_id": events.filter(room_reservation_id=reservation_id),
+    }
+    return {name: query.order_by("timestamp") for name, query in queries.items()}
+
+
+class Command(BaseCommand):
+    """
+    Django management command to benchmark the query plans and latencies of the events API filters.
+    """
+
+    help = "Seeds events and prints EXPLAIN plans and latencies for each GET /events/ filter"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--events",
+            type=int,
+            default=1_000_000,
+            help="Number of events to seed.",
+        )
+        parser.add_argument(
+            "--hotels",
+            type=int,
+            default=500,
+            help="Number of distinct hotels in the seeded events.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of timed runs per query.",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the seeded events instead of rolling them back.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Seeds the events, then explains and times every filter combination.
+        """
+        database = router.db_for_write(Event)
+        with transaction.atomic(using=database):
+            start = time.perf_counter()
+            seed_events(options["events"], options["hotels"])
+            self.stdout.write(
+                f"Seeded {options['events']:,} events in {time.perf_counter() - start:.1f}s"
+            )
+
+            reservation_id = Event.objects.values_list(
+                "room_reservation_id", flat=True
+            ).first()
+            scans = []
+            for name, query in build_queries(reservation_id).items():
+                plan = query.explain()
+                timings = []
+                for _ in range(options["repeat"]):
+                    start = time.perf_counter()
+                    rows = len(query.values_list(*EVENT_FIELDS))
+                    timings.append(time.perf_counter() - start)
+
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(plan)
+                self.stdout.write(
+                    f"{rows:,} rows, median {statistics.median(timings) * 1000:.1f} ms\n"
+                )
+                if FULL_SCAN_PATTERN.search(plan):
+                    scans.append(name)
+
+            if not options["keep"]:
+                transaction.set_rollback(True, using=database)
+
+        if scans:
+            self.stdout.write(
+                self.style.WARNING(f"Full table scans: {', '.join(scans)}")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS("No query falls back to a full table scan")
+            )
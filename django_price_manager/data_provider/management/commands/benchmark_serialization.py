@@ -0,0 +1,127 @@
+"""
+This module implements a benchmark of the read paths of the events and dashboard endpoints. It seeds synthetic events
+and dashboard rows, renders them through the DRF serializers and through the fast read path, checks that both produce
+the same bytes and reports the rows per second of each path. The seeded rows are rolled back at the end of the run.
+"""
+
+import time
+from typing import Callable
+
+from dashboard_service.models import DashboardData
+from dashboard_service.serializers import DashboardDataSerializer, dashboard_rows
+from data_provider.management.commands.benchmark_event_queries import seed_events
+from data_provider.models import Event
+from data_provider.serializers import EventSerializer, event_rows
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+from rest_framework.renderers import JSONRenderer
+
+from django_price_manager.renderers import FastJSONRenderer
+
+
+def seed_dashboard_data(count: int, batch_size: int = 10_000) -> None:
+    """
+    Insert synthetic daily dashboard rows.
+
+    Args:
+        count (int): The number of rows to insert.
+        batch_size (int): The number of rows inserted per query.
+    """
+    rows = (
+        DashboardData(
+            hotel_id=index // 336 + 1,
+            period="day",
+            year=2021 + index % 336 // 28 // 12,
+            month=index % 336 // 28 % 12 + 1,
+            day=index % 28 + 1,
+            booking_count=index % 50,
+        )
+        for index in range(count)
+    )
+    DashboardData.objects.bulk_create(rows, batch_size=batch_size)
+
+
+class Command(BaseCommand):
+    """
+    Django management command to benchmark the DRF serializers against the fast read path.
+    """
+
+    help = "Compares rows/sec of the DRF serializers and the fast read path on large responses"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=100_000,
+            help="Number of rows in each rendered response.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Seeds the rows and times both read paths of both endpoints.
+        """
+        rows = options["rows"]
+        events_database = router.db_for_write(Event)
+        dashboard_database = router.db_for_write(DashboardData)
+        with transaction.atomic(using=events_database), transaction.atomic(
+            using=dashboard_database
+        ):
+            seed_events(rows, hotels=500)
+            seed_dashboard_data(rows)
+
+            events = Event.objects.order_by("timestamp", "id")
+            self.compare(
+                "GET /events/",
+                rows,
+                lambda: JSONRenderer().render(EventSerializer(events, many=True).data),
+                lambda: FastJSONRenderer().render(list(event_rows(events))),
+            )
+            dashboard_objects = DashboardData.objects.all()
+            self.compare(
+                "GET /dashboard/",
+                rows,
+                lambda: JSONRenderer().render(
+                    DashboardDataSerializer(dashboard_objects, many=True).data
+                ),
+                lambda: FastJSONRenderer().render(dashboard_rows(dashboard_objects)),
+            )
+
+            # Leave the databases untouched
+            transaction.set_rollback(True, using=events_database)
+            transaction.set_rollback(True, using=dashboard_database)
+
+    def compare(
+        self,
+        name: str,
+        rows: int,
+        serializer_path: Callable[[], bytes],
+        fast_path: Callable[[], bytes],
+    ) -> None:
+        """
+        Time both read paths of an endpoint and print their throughput.
+
+        Args:
+            name (str): The name of the endpoint.
+            rows (int): The number of rows rendered by each path.
+            serializer_path (Callable[[], bytes]): Renders the rows through the DRF serializer.
+            fast_path (Callable[[], bytes]): Renders the rows through the fast read path.
+        """
+        start = time.perf_counter()
+        expected = serializer_path()
+        serializer_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        content = fast_path()
+        fast_elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(f"DRF serializer: {rows / serializer_elapsed:,.0f} rows/sec")
+        self.stdout.write(f"Fast read path: {rows / fast_elapsed:,.0f} rows/sec")
+        if content == expected:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Identical output, speedup {serializer_elapsed / fast_elapsed:.1f}x"
+                )
+            )
+        else:
+            self.stdout.write(self.style.ERROR("The outputs differ"))
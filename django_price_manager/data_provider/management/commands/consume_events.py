@@ -0,0 +1,138 @@
+"""
+This module implements a long-running consumer of the event queue. Instead of draining the queue every few seconds
+from a periodic task, the consumer blocks on the queue (BLPOP for the list transport, XREADGROUP for the stream one),
+so events are processed as soon as they are pushed and an idle queue costs nothing.
+
+With the list transport, the consumer holds the consumer lock while it runs, so the periodic task skips its runs and a
+second consumer waits on standby, taking over when the lease of the first one expires. With the stream transport, every
+thread reads as its own consumer of the group, so consumers run side by side without the lock. SIGTERM and SIGINT stop
+it gracefully: every thread finishes and acknowledges the events it is processing before the lock is released.
+"""
+
+import logging
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from data_provider.queues import consumer_lock, get_event_queue
+from data_provider.tasks import consume_events
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+# Configure logger
+logger = logging.getLogger("django_price_manager")
+
+
+def run_consumers(
+    concurrency: int, block: float, should_stop: Callable[[], bool]
+) -> int:
+    """
+    Consume the event queue from several threads until `should_stop` returns True.
+
+    Args:
+        concurrency (int): The number of consumer threads.
+        block (float): The maximum number of seconds a pop waits for events.
+        should_stop (Callable[[], bool]): Returns True when the consumers must stop.
+
+    Returns:
+        int: The number of events processed.
+
+    Raises:
+        Exception: The error of a consumer thread that failed, once every thread has
+        stopped.
+    """
+    failed = threading.Event()
+
+    def consume() -> int:
+        try:
+            return consume_events(lambda: failed.is_set() or should_stop(), block)
+        except Exception:
+            # Stop the other threads, so the lock is released rather than held by a
+            # consumer missing a thread
+            failed.set()
+            raise
+        finally:
+            # Database connections are per thread
+            connections.close_all()
+
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="event-consumer"
+    ) as executor:
+        futures = [executor.submit(consume) for _ in range(concurrency)]
+        return sum(future.result() for future in futures)
+
+
+def run_exclusive_consumers(
+    concurrency: int, block: float, stop: threading.Event
+) -> int:
+    """
+    Consume the event queue while holding the consumer lock, until `stop` is set.
+
+    The consumers wait on standby while the lock is held by another process, and stop
+    consuming if the lock is lost.
+
+    Args:
+        concurrency (int): The number of consumer threads.
+        block (float): The maximum number of seconds a pop or a lock acquisition waits.
+        stop (threading.Event): Set when the consumers must stop.
+
+    Returns:
+        int: The number of events processed.
+    """
+    lock = consumer_lock()
+    processed = 0
+    while not stop.is_set():
+        if not lock.acquire(timeout=block):
+            continue
+        logger.info(f"Consuming events with {concurrency} threads...")
+        try:
+            processed += run_consumers(
+                concurrency, block, lambda: stop.is_set() or lock.lost.is_set()
+            )
+        finally:
+            lock.release()
+    return processed
+
+
+class Command(BaseCommand):
+    """
+    Django management command to consume the event queue continuously.
+    """
+
+    help = "Consumes the event queue with blocking reads until stopped"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.EVENT_CONSUMER_CONCURRENCY,
+            help="Number of consumer threads.",
+        )
+        parser.add_argument(
+            "--block-timeout",
+            type=float,
+            default=settings.EVENT_CONSUMER_BLOCK_TIMEOUT,
+            help="Maximum number of seconds a read waits for events.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Executes the management command, consuming events until SIGTERM or SIGINT.
+        """
+        stop = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+
+        concurrency = options["concurrency"]
+        block = options["block_timeout"]
+        try:
+            if get_event_queue().exclusive:
+                processed = run_exclusive_consumers(concurrency, block, stop)
+            else:
+                logger.info(f"Consuming events with {concurrency} threads...")
+                processed = run_consumers(concurrency, block, stop.is_set)
+        except Exception as e:
+            raise CommandError(f"Error consuming events: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Consumed {processed} events"))
@@ -0,0 +1,97 @@
+"""
+This module implements a command to inspect and replay the dead letters of the event queue, the events that could not
+be processed after all their retries (see `data_provider.retries`). Dead letters can be listed with their last error,
+pushed back to the event queue once the cause of the failures is fixed, or purged.
+"""
+
+import json
+import logging
+from typing import Any, Dict, List
+
+from data_provider.queues import get_event_queue, r
+from data_provider.retries import dead_letter_key
+from django.core.management.base import BaseCommand, CommandError
+
+# Configure logger
+logger = logging.getLogger("django_price_manager")
+
+
+def list_dead_letters(count: int) -> List[Dict[str, Any]]:
+    """
+    Return the oldest dead letters, without removing them.
+
+    Args:
+        count (int): The maximum number of dead letters to return.
+
+    Returns:
+        List[Dict[str, Any]]: The dead letters, with their payload, attempts, last error
+        and failure time.
+    """
+    return [json.loads(entry) for entry in r.lrange(dead_letter_key, 0, count - 1)]
+
+
+def replay_dead_letters(count: int) -> int:
+    """
+    Move the oldest dead letters back to the event queue, with their retries reset.
+
+    Args:
+        count (int): The maximum number of dead letters to replay.
+
+    Returns:
+        int: The number of dead letters replayed.
+    """
+    entries = r.lpop(dead_letter_key, count) or []
+    if not entries:
+        return 0
+    try:
+        get_event_queue().push([json.loads(entry)["payload"] for entry in entries])
+    except Exception:
+        # Put the dead letters back at the head of the list, in their original order
+        r.lpush(dead_letter_key, *reversed(entries))
+        raise
+    logger.info(f"Replayed {len(entries)} dead letters.")
+    return len(entries)
+
+
+class Command(BaseCommand):
+    """
+    Django management command to inspect, replay or purge the dead letters of the event queue.
+    """
+
+    help = "Lists, replays or purges the events that exhausted their retries"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "action",
+            choices=["list", "replay", "purge"],
+            help="List the dead letters, push them back to the queue, or delete them.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=100,
+            help="Maximum number of dead letters listed or replayed.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """
+        Executes the management command on the dead-letter list.
+        """
+        try:
+            if options["action"] == "list":
+                self.stdout.write(f"{r.llen(dead_letter_key)} dead letters")
+                for entry in list_dead_letters(options["limit"]):
+                    self.stdout.write(
+                        f"[{entry['attempts']} attempts] {entry['error']}: "
+                        f"{entry['payload']}"
+                    )
+            elif options["action"] == "replay":
+                replayed = replay_dead_letters(options["limit"])
+                self.stdout.write(self.style.SUCCESS(f"Replayed {replayed} events"))
+            else:
+                purged, _ = (
+                    r.pipeline().llen(dead_letter_key).delete(dead_letter_key).execute()
+                )
+                self.stdout.write(self.style.SUCCESS(f"Purged {purged} events"))
+        except Exception as e:
+            raise CommandError(f"Error handling dead letters: {e}")
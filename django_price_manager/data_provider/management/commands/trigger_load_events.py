@@ -4,16 +4,22 @@ of UUIDs in the data, segregates valid and invalid records, and facilitates the
 further processing. The module integrates with Django's command infrastructure to allow manual triggering of the
 event loading process through management commands. It is designed to work with Celery for task scheduling and Redis
 for queue management.
+
+The CSV file is streamed in chunks so memory stays bounded regardless of the file size. Each chunk is validated and
+serialized as a whole, sorted by `event_timestamp` and spilled to a temporary run file; the runs are then merged
+(external merge sort) so events are enqueued in global chronological order.
 """
 
-import json
+import heapq
 import logging
 import os
-import uuid
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Iterator, List
 
 import pandas as pd
-import redis
-from django.conf import settings
+from data_provider.queues import get_event_queue
 from django.core.management.base import BaseCommand, CommandError
 
 # Configure logger
@@ -21,27 +27,57 @@ logger = logging.getLogger("django_price_manager")
 
 # Constants for file paths
 DATA_FILE_PATH: str = os.path.join(os.path.dirname(__file__), "data", "data.csv")
+INVALID_ROWS_FILE_PATH: str = os.path.join(
+    os.path.dirname(__file__), "data", "invalid_rows.csv"
+)
+
+# Number of CSV rows read, sorted and enqueued at a time
+DEFAULT_CHUNK_SIZE: int = 100_000
+
+# Canonical UUID, with optional hyphens and braces
+UUID_PATTERN: str = (
+    r"^\{?[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?"
+    r"[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}\}?$"
+)
+
+
+@dataclass
+class LoadStats:
+    """
+    Statistics of a load_events_to_queue run.
 
-# Configure Redis connection
-r = redis.Redis.from_url(settings.CELERY_BROKER_URL)
-queue_key = "event_queue"
+    Attributes:
+        rows (int): The number of rows read from the CSV file.
+        invalid_rows (int): The number of rows rejected because of an invalid UUID.
+        enqueued (int): The number of events pushed to the queue.
+        elapsed (float): The duration of the run in seconds.
+    """
+
+    rows: int = 0
+    invalid_rows: int = 0
+    enqueued: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """
+        Returns:
+            float: The number of CSV rows processed per second.
+        """
+        return self.rows / self.elapsed if self.elapsed else 0.0
 
 
-def is_valid_uuid(value: str) -> bool:
+def valid_uuid_mask(values: pd.Series) -> pd.Series:
     """
-    Validate whether the provided string is a valid UUID.
+    Validate a whole column of UUID strings at once.
 
     Args:
-        value (str): The string to be validated.
+        values (pd.Series): The values to be validated.
 
     Returns:
-        bool: True if the string is a valid UUID, otherwise False.
+        pd.Series: A boolean mask, True where the value is a valid UUID.
     """
-    try:
-        uuid.UUID(str(value))
-        return True
-    except ValueError:
-        return False
+    return values.astype(str).str.match(UUID_PATTERN).fillna(False).astype(bool)
 
 
 class Command(BaseCommand):
@@ -51,12 +87,31 @@ class Command(BaseCommand):
 
     help = "Triggers the load_events_to_queue Celery task"
 
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Number of CSV rows processed at a time.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate and sort the events without pushing them to Redis.",
+        )
+
     def handle(self, *args, **options) -> None:
         """
         Executes the management command which triggers the Celery task to load events.
         """
         try:
-            load_events_to_queue()
+            stats = load_events_to_queue(
+                chunk_size=options["chunk_size"], dry_run=options["dry_run"]
+            )
+            self.stdout.write(
+                f"Processed {stats.rows} rows ({stats.invalid_rows} invalid) in "
+                f"{stats.elapsed:.2f}s ({stats.rows_per_second:,.0f} rows/sec)"
+            )
             self.stdout.write(
                 self.style.SUCCESS("Successfully triggered load_events_to_queue")
             )
@@ -64,35 +119,127 @@ class Command(BaseCommand):
             raise CommandError(f"Error triggering task: {e}")
 
 
-def load_events_to_queue() -> None:
+def load_events_to_queue(
+    chunk_size: int = DEFAULT_CHUNK_SIZE, dry_run: bool = False
+) -> LoadStats:
     """
     Load events from a CSV file, validate UUIDs, and enqueue valid events for processing.
     It also logs and saves any invalid rows to a separate CSV file for further investigation.
+
+    Args:
+        chunk_size (int): The number of CSV rows processed at a time.
+        dry_run (bool): If True, the events are validated and sorted but not enqueued.
+
+    Returns:
+        LoadStats: The statistics of the run.
     """
-    data = pd.read_csv(DATA_FILE_PATH)
-    logger.info(f"Read {len(data)} rows from CSV file.")
+    stats = LoadStats()
+    start = time.perf_counter()
+
+    if os.path.exists(INVALID_ROWS_FILE_PATH):
+        os.remove(INVALID_ROWS_FILE_PATH)
+
+    with tempfile.TemporaryDirectory() as run_dir:
+        run_paths = []
+        for index, chunk in enumerate(
+            pd.read_csv(DATA_FILE_PATH, chunksize=chunk_size)
+        ):
+            stats.rows += len(chunk)
+
+            # Validate UUIDs and separate valid from invalid data
+            is_valid_uuid = valid_uuid_mask(chunk["room_reservation_id"])
+            invalid_rows = chunk[~is_valid_uuid]
+            if not invalid_rows.empty:
+                invalid_rows.to_csv(
+                    INVALID_ROWS_FILE_PATH,
+                    mode="a",
+                    header=stats.invalid_rows == 0,
+                    index=False,
+                )
+                stats.invalid_rows += len(invalid_rows)
+
+            # Sort the chunk by event timestamp and spill it to a sorted run file
+            valid_data = chunk[is_valid_uuid].sort_values(
+                by="event_timestamp", ascending=True, kind="stable"
+            )
+            if valid_data.empty:
+                continue
+            run_path = os.path.join(run_dir, f"run_{index}.tsv")
+            write_run(run_path, valid_data)
+            run_paths.append(run_path)
+
+        if stats.invalid_rows:
+            logger.info(
+                f"Logged {stats.invalid_rows} invalid rows with invalid UUIDs to {INVALID_ROWS_FILE_PATH}"
+            )
+        logger.info(
+            f"Filtered data to {stats.rows - stats.invalid_rows} rows with valid UUIDs."
+        )
 
-    # Apply UUID validation and separate valid from invalid data
-    data["is_valid_uuid"] = data["room_reservation_id"].apply(is_valid_uuid)
-    valid_data = data[data["is_valid_uuid"]].copy()
-    invalid_rows = data[~data["is_valid_uuid"]].copy()
+        # Merge the sorted runs and enqueue valid events into the Redis queue
+        batch: List[str] = []
+        for payload in merge_runs(run_paths):
+            batch.append(payload)
+            if len(batch) >= chunk_size:
+                stats.enqueued += enqueue_events(batch, dry_run)
+                batch = []
+        stats.enqueued += enqueue_events(batch, dry_run)
 
-    # Sort valid data by event timestamp in ascending order
-    valid_data.sort_values(by="event_timestamp", ascending=True, inplace=True)
+    stats.elapsed = time.perf_counter() - start
+    if dry_run:
+        logger.info(f"Dry run: {stats.enqueued} events would have been enqueued.")
+    else:
+        logger.info(f"Enqueued {stats.enqueued} events to Redis.")
+    return stats
 
-    # Log and save invalid rows if present
-    if not invalid_rows.empty:
-        invalid_csv_file_path = os.path.join(
-            os.path.dirname(__file__), "data", "invalid_rows.csv"
-        )
-        invalid_rows.to_csv(invalid_csv_file_path, index=False)
-        logger.info(
-            f"Logged {len(invalid_rows)} invalid rows with invalid UUIDs to {invalid_csv_file_path}"
+
+def write_run(run_path: str, data: pd.DataFrame) -> None:
+    """
+    Write a sorted chunk to a run file, one `<event_timestamp>\\t<event JSON>` line per row.
+
+    Args:
+        run_path (str): The path of the run file.
+        data (pd.DataFrame): The chunk, sorted by event timestamp.
+    """
+    keys = data["event_timestamp"].astype(str)
+    payloads = data.to_json(orient="records", lines=True).splitlines()
+    with open(run_path, "w") as run_file:
+        run_file.writelines(
+            f"{key}\t{payload}\n" for key, payload in zip(keys, payloads)
         )
 
-    logger.info(f"Filtered data to {len(valid_data)} rows with valid UUIDs.")
 
-    # Enqueue valid events into the Redis queue
-    for _, row in valid_data.iterrows():
-        r.rpush(queue_key, json.dumps(row.to_dict()))
-    logger.info(f"Enqueued {len(valid_data)} events to Redis.")
+def merge_runs(run_paths: List[str]) -> Iterator[str]:
+    """
+    Merge sorted run files into a single stream ordered by event timestamp.
+
+    Args:
+        run_paths (List[str]): The paths of the sorted run files.
+
+    Yields:
+        str: The JSON encoded events in chronological order.
+    """
+    run_files = [open(run_path) for run_path in run_paths]
+    try:
+        for line in heapq.merge(*run_files, key=lambda line: line.split("\t", 1)[0]):
+            yield line.split("\t", 1)[1].rstrip("\n")
+    finally:
+        for run_file in run_files:
+            run_file.close()
+
+
+def enqueue_events(payloads: List[str], dry_run: bool = False) -> int:
+    """
+    Push JSON encoded events to the Redis queue of the configured transport.
+
+    Args:
+        payloads (List[str]): The JSON encoded events, in queue order.
+        dry_run (bool): If True, nothing is pushed.
+
+    Returns:
+        int: The number of events enqueued (or that would have been enqueued).
+    """
+    if not payloads or dry_run:
+        return len(payloads)
+    get_event_queue().push(payloads)
+    return len(payloads)
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.7 on 2026-10-17 22:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data_provider", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["timestamp"], name="event_timestamp_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["hotel_id", "timestamp"], name="event_hotel_timestamp_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["hotel_id", "night_of_stay"], name="event_hotel_night_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["room_reservation_id"], name="event_reservation_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-17 22:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data_provider", "0002_event_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="event",
+            name="event_timestamp_idx",
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["timestamp", "id"], name="event_timestamp_id_idx"
+            ),
+        ),
+    ]
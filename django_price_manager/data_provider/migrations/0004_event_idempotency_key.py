@@ -0,0 +1,40 @@
+# Generated by Django 5.0.7 on 2026-10-17 23:30
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def delete_duplicate_events(apps, schema_editor):
+    """
+    Keep the first event of each idempotency key, so the unique constraint can be added.
+    """
+    Event = apps.get_model("data_provider", "Event")
+    events = Event.objects.using(schema_editor.connection.alias)
+    first_ids = (
+        events.values("room_reservation_id", "rpg_status", "timestamp")
+        .annotate(first_id=Min("id"))
+        .values("first_id")
+    )
+    events.exclude(id__in=first_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data_provider", "0003_event_timestamp_id_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_events, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="event",
+            constraint=models.UniqueConstraint(
+                fields=("room_reservation_id", "rpg_status", "timestamp"),
+                name="event_unique_idempotency_key",
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="event",
+            name="event_reservation_idx",
+        ),
+    ]
@@ -27,6 +27,10 @@ class Event(models.Model):
 
     Choices:
         RPG_STATUS_CHOICES (list of tuples): Defines permissible choices for the `rpg_status` field.
+
+    Meta:
+        indexes (list of Index): Indexes matching the filters and ordering of the events API.
+        constraints (list of UniqueConstraint): The idempotency key of ingestion, `(room_reservation_id, rpg_status, timestamp)`.
     """
 
     # Defining constants for readability and maintainability of event status
@@ -58,6 +62,27 @@ class Event(models.Model):
         help_text="The date of stay for which the event is booked or canceled."
     )
 
+    class Meta:
+        indexes: list[models.Index] = [
+            # Ordering, keyset pagination and updated_gt/updated_gte/updated_lte range scans
+            models.Index(fields=["timestamp", "id"], name="event_timestamp_id_idx"),
+            # hotel_id filter combined with a timestamp range and ordering
+            models.Index(
+                fields=["hotel_id", "timestamp"], name="event_hotel_timestamp_idx"
+            ),
+            # hotel_id filter combined with a night_of_stay range
+            models.Index(
+                fields=["hotel_id", "night_of_stay"], name="event_hotel_night_idx"
+            ),
+        ]
+        constraints: list[models.UniqueConstraint] = [
+            # Idempotent ingestion, also indexing the room_reservation_id lookups
+            models.UniqueConstraint(
+                fields=["room_reservation_id", "rpg_status", "timestamp"],
+                name="event_unique_idempotency_key",
+            )
+        ]
+
     def __str__(self) -> str:
         """
         Returns a human-readable string representation of the model instance.
@@ -0,0 +1,236 @@
+"""
+Pagination module for the Event API.
+
+This module contains the keyset (cursor) pagination of the events listing. Pages are
+ordered by `(timestamp, id)`, or by `id` alone, which follows the insertion order, for
+incremental consumers. The cursor encodes the key of the last event of the previous
+page, so every page is an index range read regardless of how deep it is. Event scans
+can also be split into partitions by hotel, to be consumed in parallel.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.db.models.functions import Mod
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .serializers import event_rows
+
+
+def encode_cursor(timestamp: datetime, event_id: int) -> str:
+    """
+    Encode the key of an event into an opaque cursor.
+
+    Args:
+        timestamp (datetime): The timestamp of the event.
+        event_id (int): The ID of the event.
+
+    Returns:
+        str: The cursor.
+    """
+    key = f"{timestamp.isoformat()}|{event_id}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def encode_id_cursor(event_id: int) -> str:
+    """
+    Encode the ID of an event into an opaque cursor of the `id` ordering.
+
+    Args:
+        event_id (int): The ID of the event.
+
+    Returns:
+        str: The cursor.
+    """
+    return base64.urlsafe_b64encode(str(event_id).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor into the key of the event it points to.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        Tuple[datetime, int]: The timestamp and the ID of the event.
+
+    Raises:
+        ValidationError: If the cursor is malformed.
+    """
+    try:
+        timestamp, event_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        parsed_timestamp = parse_datetime(timestamp)
+        if parsed_timestamp is None:
+            raise ValueError(timestamp)
+        return parsed_timestamp, int(event_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+
+
+def decode_id_cursor(cursor: str) -> int:
+    """
+    Decode a cursor of the `id` ordering into the ID of the event it points to.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        int: The ID of the event.
+
+    Raises:
+        ValidationError: If the cursor is malformed.
+    """
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+
+
+def events_after(queryset: QuerySet, timestamp: datetime, event_id: int) -> QuerySet:
+    """
+    Filter events strictly after the `(timestamp, id)` key, in key order.
+
+    Args:
+        queryset (QuerySet): The events to filter.
+        timestamp (datetime): The timestamp of the key.
+        event_id (int): The event ID of the key.
+
+    Returns:
+        QuerySet: The events after the key, ordered by `(timestamp, id)`.
+    """
+    return queryset.filter(
+        Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=event_id)
+    ).order_by("timestamp", "id")
+
+
+def events_after_id(queryset: QuerySet, event_id: int) -> QuerySet:
+    """
+    Filter events inserted after the event with the given ID, in ID order.
+
+    Args:
+        queryset (QuerySet): The events to filter.
+        event_id (int): The ID of the event.
+
+    Returns:
+        QuerySet: The events with a higher ID, ordered by ID.
+    """
+    return queryset.filter(id__gt=event_id).order_by("id")
+
+
+def in_hotel_partition(queryset: QuerySet, partition: int, partitions: int) -> QuerySet:
+    """
+    Filter events of the hotels in one of `partitions` partitions, split by `hotel_id`.
+
+    Args:
+        queryset (QuerySet): The events to filter.
+        partition (int): The partition to keep, from 0 to `partitions - 1`.
+        partitions (int): The number of partitions.
+
+    Returns:
+        QuerySet: The events whose `hotel_id` modulo `partitions` is `partition`.
+    """
+    return queryset.annotate(hotel_partition=Mod("hotel_id", partitions)).filter(
+        hotel_partition=partition
+    )
+
+
+class EventCursorPagination(BasePagination):
+    """
+    Keyset pagination of events on `(timestamp, id)`, or on `id` with `ordering=id`.
+
+    Listings are always paginated, `EVENT_PAGE_DEFAULT_LIMIT` events at a time unless a
+    `limit` query parameter is given. The response contains the page of events under
+    `results` and the cursor of the next page under `next`, which is null on the last
+    page. Full listings are streamed instead, see `EventView.get`.
+    """
+
+    limit_query_param = "limit"
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    orderings = ("timestamp", "id")
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view=None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return a page of serialized events.
+
+        Args:
+            queryset (QuerySet): The filtered events.
+            request (Request): The HTTP request object.
+
+        Returns:
+            List[Dict[str, Any]]: The serialized events of the page.
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        self.limit = self.get_limit(request.query_params.get(self.limit_query_param))
+        ordering = request.query_params.get(self.ordering_query_param, "timestamp")
+        if ordering not in self.orderings:
+            raise ValidationError({"ordering": "Ordering must be 'timestamp' or 'id'."})
+        if ordering == "id":
+            queryset = events_after_id(
+                queryset, decode_id_cursor(cursor) if cursor else 0
+            )
+        elif cursor:
+            queryset = events_after(queryset, *decode_cursor(cursor))
+        else:
+            queryset = queryset.order_by("timestamp", "id")
+
+        # Fetch one extra event to know whether there is a next page
+        page = list(event_rows(queryset[: self.limit + 1]))
+        self.next_cursor = None
+        if len(page) > self.limit:
+            page = page[: self.limit]
+            if ordering == "id":
+                self.next_cursor = encode_id_cursor(page[-1]["id"])
+            else:
+                self.next_cursor = encode_cursor(
+                    parse_datetime(page[-1]["event_timestamp"]), page[-1]["id"]
+                )
+        return page
+
+    def get_limit(self, limit: Optional[str]) -> int:
+        """
+        Validate the requested page size.
+
+        Args:
+            limit (Optional[str]): The `limit` query parameter.
+
+        Returns:
+            int: The page size, capped at `EVENT_PAGE_MAX_LIMIT`.
+
+        Raises:
+            ValidationError: If the limit is not a positive integer.
+        """
+        if limit is None:
+            return settings.EVENT_PAGE_DEFAULT_LIMIT
+        try:
+            parsed_limit = int(limit)
+        except ValueError:
+            parsed_limit = 0
+        if parsed_limit < 1:
+            raise ValidationError({"limit": "Limit must be a positive integer."})
+        return min(parsed_limit, settings.EVENT_PAGE_MAX_LIMIT)
+
+    def get_paginated_response(self, data: List[dict]) -> Response:
+        """
+        Wrap a serialized page with the cursor of the next page.
+
+        Args:
+            data (List[dict]): The serialized events of the page.
+
+        Returns:
+            Response: The paginated response.
+        """
+        return Response({"next": self.next_cursor, "results": data})
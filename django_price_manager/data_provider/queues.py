@@ -0,0 +1,237 @@
+"""
+Module defining the Redis transports of the event queue.
+
+The CSV loader pushes JSON encoded events to the queue and the Celery consumers pop them.
+Two transports are available, selected by the `EVENT_QUEUE_TRANSPORT` setting:
+
+- "list": a Redis list with RPUSH/LPOP. Popping removes the event, so an event is lost if
+  the consumer dies before processing it.
+- "stream": a Redis stream with a consumer group (XADD/XREADGROUP/XACK). Events stay
+  pending until they are acknowledged, and entries left pending by a dead consumer are
+  reclaimed by the others, so several workers share the load without losing events.
+
+A list is drained by one process at a time, holding the consumer lock: either the
+long-running `consume_events` command, or the periodic task when no consumer runs. A
+stream needs no lock: every thread reads as its own consumer of the group, so the
+periodic task and any number of consumers share the entries.
+"""
+
+import logging
+import os
+import socket
+import threading
+from typing import List, NamedTuple, Optional, Union
+
+import redis
+from django.conf import settings
+
+from django_price_manager.locks import LeaseLock
+
+logger = logging.getLogger("django_price_manager")
+
+r = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+queue_key = "event_queue"
+stream_key = "event_stream"
+stream_group = "event_consumers"
+consumer_lock_key = "event_queue:consumer"
+
+# Number of values sent by a single RPUSH/XADD batch
+PUSH_BATCH_SIZE: int = 1_000
+
+
+class QueuedEvent(NamedTuple):
+    """
+    An event popped from the queue.
+
+    Attributes:
+        entry_id (Optional[bytes]): The stream entry ID, None for the list transport.
+        payload (bytes): The JSON encoded event.
+    """
+
+    entry_id: Optional[bytes]
+    payload: bytes
+
+
+class ListEventQueue:
+    """
+    Event queue backed by a Redis list.
+
+    Attributes:
+        exclusive (bool): Whether the queue is drained by a single consumer at a time,
+            holding the consumer lock.
+    """
+
+    exclusive: bool = True
+
+    def push(self, payloads: List[str]) -> None:
+        """
+        Append events to the queue using pipelined multi-value RPUSH commands.
+
+        Args:
+            payloads (List[str]): The JSON encoded events, in queue order.
+        """
+        pipe = r.pipeline(transaction=False)
+        for offset in range(0, len(payloads), PUSH_BATCH_SIZE):
+            pipe.rpush(queue_key, *payloads[offset : offset + PUSH_BATCH_SIZE])
+        pipe.execute()
+
+    def pop(self, count: int, block: float = 0) -> List[QueuedEvent]:
+        """
+        Remove and return up to `count` events from the head of the queue.
+
+        Args:
+            count (int): The maximum number of events to pop.
+            block (float): The number of seconds to wait with BLPOP for an event if the
+                queue is empty, 0 to return immediately.
+
+        Returns:
+            List[QueuedEvent]: The popped events, empty if the queue is empty.
+        """
+        payloads = r.lpop(queue_key, count) or []
+        if not payloads and block:
+            popped = r.blpop([queue_key], timeout=block)
+            if popped:
+                payloads = [popped[1]]
+                if count > 1:
+                    payloads.extend(r.lpop(queue_key, count - 1) or [])
+        return [QueuedEvent(None, payload) for payload in payloads]
+
+    def ack(self, events: List[QueuedEvent]) -> None:
+        """
+        Acknowledge processed events. Events are removed when popped, so this is a no-op.
+
+        Args:
+            events (List[QueuedEvent]): The processed events.
+        """
+
+
+class StreamEventQueue:
+    """
+    Event queue backed by a Redis stream read through a consumer group.
+
+    Attributes:
+        exclusive (bool): Whether the queue is drained by a single consumer at a time,
+            False as the consumer group shares the entries between its consumers.
+        consumer (str): The name of the consumer in the group, unique per thread.
+    """
+
+    exclusive: bool = False
+
+    def __init__(self) -> None:
+        # Entries stay pending on the consumer that read them, so every thread reads
+        # under its own name and the pending entries of a stuck thread are its own
+        thread = threading.current_thread().name
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}-{thread}"
+        self._group_ready = False
+
+    def push(self, payloads: List[str]) -> None:
+        """
+        Append events to the stream using pipelined XADD commands.
+
+        Args:
+            payloads (List[str]): The JSON encoded events, in queue order.
+        """
+        for offset in range(0, len(payloads), PUSH_BATCH_SIZE):
+            pipe = r.pipeline(transaction=False)
+            for payload in payloads[offset : offset + PUSH_BATCH_SIZE]:
+                pipe.xadd(stream_key, {"data": payload})
+            pipe.execute()
+
+    def pop(self, count: int, block: float = 0) -> List[QueuedEvent]:
+        """
+        Read up to `count` events for this consumer.
+
+        Entries that have been pending on another consumer for longer than
+        `EVENT_STREAM_CLAIM_IDLE_MS` are reclaimed first, then new entries are read.
+
+        Args:
+            count (int): The maximum number of events to read.
+            block (float): The number of seconds XREADGROUP waits for new entries if
+                there are none, 0 to return immediately.
+
+        Returns:
+            List[QueuedEvent]: The events read, empty if there is nothing to process.
+        """
+        self._ensure_group()
+        claimed = r.xautoclaim(
+            stream_key,
+            stream_group,
+            self.consumer,
+            min_idle_time=settings.EVENT_STREAM_CLAIM_IDLE_MS,
+            start_id="0-0",
+            count=count,
+        )[1]
+        # Entries deleted while pending are returned without fields
+        events = [
+            QueuedEvent(entry_id, fields[b"data"])
+            for entry_id, fields in claimed
+            if fields
+        ]
+        if events:
+            logger.info(f"Reclaimed {len(events)} pending events from dead consumers.")
+
+        if len(events) < count:
+            response = r.xreadgroup(
+                stream_group,
+                self.consumer,
+                {stream_key: ">"},
+                count=count - len(events),
+                # Block only if nothing was reclaimed, 0 would block forever
+                block=max(int(block * 1000), 1) if block and not events else None,
+            )
+            for _, entries in response or []:
+                events.extend(
+                    QueuedEvent(entry_id, fields[b"data"])
+                    for entry_id, fields in entries
+                )
+        return events
+
+    def ack(self, events: List[QueuedEvent]) -> None:
+        """
+        Acknowledge processed events and delete them from the stream.
+
+        Args:
+            events (List[QueuedEvent]): The processed events.
+        """
+        entry_ids = [event.entry_id for event in events]
+        if not entry_ids:
+            return
+        pipe = r.pipeline(transaction=False)
+        pipe.xack(stream_key, stream_group, *entry_ids)
+        pipe.xdel(stream_key, *entry_ids)
+        pipe.execute()
+
+    def _ensure_group(self) -> None:
+        """
+        Create the stream and its consumer group if they do not exist yet.
+        """
+        if self._group_ready:
+            return
+        try:
+            r.xgroup_create(stream_key, stream_group, id="0", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+
+def get_event_queue() -> Union[ListEventQueue, StreamEventQueue]:
+    """
+    Return the event queue of the transport selected by `EVENT_QUEUE_TRANSPORT`.
+
+    Returns:
+        Union[ListEventQueue, StreamEventQueue]: The event queue.
+    """
+    if settings.EVENT_QUEUE_TRANSPORT == "stream":
+        return StreamEventQueue()
+    return ListEventQueue()
+
+
+def consumer_lock() -> LeaseLock:
+    """
+    Return the lock held by the process draining an exclusive event queue.
+
+    Returns:
+        LeaseLock: The consumer lock, with a lease of `EVENT_CONSUMER_LOCK_LEASE` seconds.
+    """
+    return LeaseLock(r, consumer_lock_key, settings.EVENT_CONSUMER_LOCK_LEASE)
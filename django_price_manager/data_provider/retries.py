@@ -0,0 +1,135 @@
+"""
+Module implementing the retries and the dead letters of the event queue.
+
+An event that fails to be processed is acknowledged to the queue anyway, so it does not
+block the events behind it, and scheduled for a retry instead:
+
+- retries are kept in a Redis sorted set scored by their due time, with an exponential
+  backoff of `EVENT_RETRY_BASE_DELAY * 2 ** (attempts - 1)` seconds, capped at
+  `EVENT_RETRY_MAX_DELAY` and jittered so retries of a failed batch spread out;
+- events failing `EVENT_RETRY_MAX_ATTEMPTS` times, and events that can never succeed
+  (invalid data), are pushed to a dead-letter list along with their last error, to be
+  inspected and replayed with the `dead_letters` command.
+
+A transient outage of the database or the events API therefore delays events instead of
+losing them.
+"""
+
+import json
+import logging
+import random
+import time
+from typing import List, NamedTuple, Union
+
+from django.conf import settings
+
+from . import queues
+
+logger = logging.getLogger("django_price_manager")
+
+retry_key = "event_queue:retry"
+dead_letter_key = "event_queue:dead"
+
+
+class RetryEvent(NamedTuple):
+    """
+    An event whose retry is due.
+
+    Attributes:
+        payload (bytes): The JSON encoded event.
+        attempts (int): The number of failed attempts to process the event.
+    """
+
+    payload: bytes
+    attempts: int
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Return the number of seconds to wait before retrying an event.
+
+    Args:
+        attempts (int): The number of failed attempts to process the event.
+
+    Returns:
+        float: The delay, between half and all of the capped exponential backoff.
+    """
+    delay = min(
+        settings.EVENT_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        settings.EVENT_RETRY_MAX_DELAY,
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def schedule_retry(
+    payload: Union[bytes, str], attempts: int, error: str, permanent: bool = False
+) -> None:
+    """
+    Schedule the retry of a failed event, or dead-letter it if it cannot succeed.
+
+    Args:
+        payload (Union[bytes, str]): The JSON encoded event.
+        attempts (int): The number of failed attempts to process the event, this one
+            included.
+        error (str): The error of the last attempt.
+        permanent (bool): Whether retrying the event cannot succeed.
+    """
+    if isinstance(payload, bytes):
+        payload = payload.decode()
+    if permanent or attempts >= settings.EVENT_RETRY_MAX_ATTEMPTS:
+        dead_letter(payload, attempts, error)
+        return
+    member = json.dumps({"payload": payload, "attempts": attempts})
+    queues.r.zadd(retry_key, {member: time.time() + retry_delay(attempts)})
+
+
+def pop_due_retries(count: int) -> List[RetryEvent]:
+    """
+    Remove and return up to `count` events whose retry is due.
+
+    An event is only returned to the consumer that removed it from the sorted set, so
+    concurrent consumers do not retry the same event.
+
+    Args:
+        count (int): The maximum number of events to pop.
+
+    Returns:
+        List[RetryEvent]: The due events, oldest first.
+    """
+    members = queues.r.zrangebyscore(retry_key, "-inf", time.time(), start=0, num=count)
+    if not members:
+        return []
+    pipe = queues.r.pipeline(transaction=False)
+    for member in members:
+        pipe.zrem(retry_key, member)
+    events = []
+    for member, removed in zip(members, pipe.execute()):
+        if removed:
+            retry = json.loads(member)
+            events.append(RetryEvent(retry["payload"].encode(), retry["attempts"]))
+    return events
+
+
+def dead_letter(payload: Union[bytes, str], attempts: int, error: str) -> None:
+    """
+    Push an event that cannot be processed to the dead-letter list.
+
+    Args:
+        payload (Union[bytes, str]): The JSON encoded event.
+        attempts (int): The number of failed attempts to process the event.
+        error (str): The error of the last attempt.
+    """
+    if isinstance(payload, bytes):
+        payload = payload.decode()
+    logger.error(f"Dead-lettering event after {attempts} attempts: {error}")
+    queues.r.rpush(
+        dead_letter_key,
+        json.dumps(
+            {
+                "payload": payload,
+                "attempts": attempts,
+                "error": error,
+                "failed_at": time.time(),
+            }
+        ),
+    )
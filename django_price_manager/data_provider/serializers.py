@@ -3,14 +3,89 @@ Serializer module for Event model.
 
 This module contains the serializer class for the Event model which is responsible for
 transforming model instances into JSON format and validating incoming data against the
-model's definition before saving.
+model's definition before saving. It also contains the fast read path used by the
+listing endpoints, which produces the same representation from raw database rows.
+
+Ingestion is idempotent: an event repeating the `(room_reservation_id, rpg_status,
+timestamp)` key of an existing event is not inserted again (see `data_provider.dedup`).
 """
 
-from typing import Any, Dict
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
 from rest_framework import serializers
 
+from .dedup import count_duplicates, drop_duplicates, remember_events
 from .models import Event
+from .signals import notify_events_ingested
+
+
+class EventListSerializer(serializers.ListSerializer):
+    """
+    List serializer for the Event model used by the bulk ingestion paths.
+
+    Unlike the default ListSerializer, items are validated independently so that a
+    single invalid event does not reject the whole batch, and valid events are
+    written with `bulk_create` instead of one INSERT per event. Duplicates of ingested
+    events are dropped, and their number is stored in `duplicates` by `create`.
+    """
+
+    duplicates: int = 0
+
+    def validate_items(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Validate each item of the incoming batch on its own.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: The validated data of the
+            valid items, and one `{"index": ..., "errors": ...}` entry per invalid item.
+        """
+        valid_items: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        for index, item in enumerate(self.initial_data):
+            try:
+                valid_items.append(self.child.run_validation(item))
+            except serializers.ValidationError as e:
+                errors.append({"index": index, "errors": e.detail})
+        return valid_items, errors
+
+    def create(self, validated_data: List[Dict[str, Any]]) -> List[Event]:
+        """
+        Insert the new validated events in chunks of `EVENT_BULK_BATCH_SIZE` within a
+        single transaction.
+
+        Duplicates are dropped before the insert, which also ignores the conflicts of
+        duplicates inserted concurrently. These are not detected, so they are still
+        returned and notified as created: the returned events are an upper bound of the
+        inserted rows. Every event of the batch is remembered as ingested once the
+        transaction commits.
+
+        Args:
+            validated_data (List[Dict[str, Any]]): The validated data of the events.
+
+        Returns:
+            List[Event]: The events not found as duplicates, created unless a concurrent
+            request inserted them first.
+        """
+        batch = [Event(**item) for item in validated_data]
+        database = router.db_for_write(Event)
+        with transaction.atomic(using=database):
+            events = drop_duplicates(batch)
+            Event.objects.bulk_create(
+                events,
+                batch_size=settings.EVENT_BULK_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            notify_events_ingested(events)
+            transaction.on_commit(lambda: remember_events(batch), using=database)
+        self.duplicates = len(batch) - len(events)
+        count_duplicates(self.duplicates)
+        return events
 
 
 class EventSerializer(serializers.ModelSerializer):
@@ -26,6 +101,8 @@ class EventSerializer(serializers.ModelSerializer):
         model (Model): The model class that this serializer will serialize.
         fields (list of str): Specifies the fields to be included in the serialized output.
         read_only_fields (list of str): Specifies the fields that should be read-only.
+        list_serializer_class (type): The list serializer used when `many=True`.
+        validators (list): No unique validators, duplicates are handled by `create`.
     """
 
     # Field redefinitions to provide more meaningful key names in the API output
@@ -43,6 +120,35 @@ class EventSerializer(serializers.ModelSerializer):
             "night_of_stay",
         ]
         read_only_fields = ["id"]  # Making 'id' field read-only for additional safety
+        list_serializer_class = EventListSerializer
+        # Duplicates are not invalid, they are ingested idempotently
+        validators: list = []
+
+    def create(self, validated_data: Dict[str, Any]) -> Event:
+        """
+        Create an event and notify the `events_ingested` receivers once it is committed.
+
+        An event with the idempotency key of an existing event is not created again;
+        the existing event is returned and `created` is set to False.
+
+        Args:
+            validated_data (Dict[str, Any]): The validated data of the event.
+
+        Returns:
+            Event: The created or existing event.
+        """
+        validated_data.setdefault("room_reservation_id", uuid.uuid4())
+        event, self.created = Event.objects.get_or_create(
+            room_reservation_id=validated_data["room_reservation_id"],
+            rpg_status=validated_data["rpg_status"],
+            timestamp=validated_data["timestamp"],
+            defaults=validated_data,
+        )
+        if self.created:
+            notify_events_ingested([event])
+        else:
+            count_duplicates(1)
+        return event
 
     def validate(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -62,3 +168,63 @@ class EventSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"status": "Invalid status provided."})
 
         return data
+
+
+# Model fields read by the fast read path, in the order of the EventSerializer output
+EVENT_ROW_FIELDS = (
+    "id",
+    "hotel_id",
+    "timestamp",
+    "rpg_status",
+    "room_reservation_id",
+    "night_of_stay",
+)
+
+
+def format_datetime(value: datetime, tz: Any) -> str:
+    """
+    Format a datetime like the DateTimeField of the REST framework.
+
+    Args:
+        value (datetime): The aware datetime to format.
+        tz (Any): The timezone the datetime is represented in.
+
+    Returns:
+        str: The ISO 8601 representation, with 'Z' for UTC.
+    """
+    representation = value.astimezone(tz).isoformat()
+    if representation.endswith("+00:00"):
+        representation = representation[:-6] + "Z"
+    return representation
+
+
+def event_rows(
+    events: QuerySet, chunk_size: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Fast read path equivalent of `EventSerializer(events, many=True).data`.
+
+    Rows are fetched with `values_list` and mapped to the `event_timestamp`/`status`
+    representation directly, without instantiating models or serializer fields.
+
+    Args:
+        events (QuerySet): The events to serialize.
+        chunk_size (Optional[int]): If given, rows are streamed with `.iterator()` in
+            chunks of this size instead of being fetched at once.
+
+    Yields:
+        Dict[str, Any]: The serialized events.
+    """
+    rows = events.values_list(*EVENT_ROW_FIELDS)
+    if chunk_size:
+        rows = rows.iterator(chunk_size=chunk_size)
+    tz = timezone.get_current_timezone()
+    for event_id, hotel_id, timestamp, rpg_status, reservation_id, night in rows:
+        yield {
+            "id": event_id,
+            "hotel_id": hotel_id,
+            "event_timestamp": format_datetime(timestamp, tz),
+            "status": rpg_status,
+            "room_reservation_id": str(reservation_id),
+            "night_of_stay": night.isoformat(),
+        }
@@ -0,0 +1,44 @@
+"""
+Module defining the signals sent by the data provider.
+
+`events_ingested` is sent once new events are committed, by every ingestion path: the
+events API, the bulk endpoint and the queue consumers. Receivers get the number of
+events and the IDs of their hotels, and must be cheap: they run in the request or the
+task that inserted the events. The versions of the events of their hotels are bumped
+first, so event listings are never answered with 304 Not Modified once they changed.
+"""
+
+from typing import List
+
+from django.db import router, transaction
+from django.dispatch import Signal
+
+from django_price_manager.versions import bump_versions
+
+from .models import Event
+
+# Namespace of the versions of the events, see `django_price_manager.versions`
+EVENTS_VERSION_NAMESPACE = "events"
+
+# Sent with `count` (int) and `hotel_ids` (Set[int]) keyword arguments
+events_ingested = Signal()
+
+
+def notify_events_ingested(events: List[Event]) -> None:
+    """
+    Bump the versions of the events of their hotels and send `events_ingested` for new
+    events, when the current transaction commits.
+
+    Args:
+        events (List[Event]): The inserted events.
+    """
+    if not events:
+        return
+    count = len(events)
+    hotel_ids = {event.hotel_id for event in events}
+
+    def notify() -> None:
+        bump_versions(EVENTS_VERSION_NAMESPACE, hotel_ids)
+        events_ingested.send(sender=Event, count=count, hotel_ids=hotel_ids)
+
+    transaction.on_commit(notify, using=router.db_for_write(Event))
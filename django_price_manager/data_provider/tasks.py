@@ -5,50 +5,297 @@ This module defines a periodic Celery task that simulates the creation of bookin
 cancellation events from CSV data, ensuring events are sent in chronological order.
 It uses Redis via Django's caching framework to track the last processed record
 to avoid reprocessing data on subsequent runs.
+
+Events are either posted one by one to the events API ("http" consumer), or popped in
+batches and inserted in-process with `bulk_create` ("bulk" consumer), depending on the
+`EVENT_QUEUE_CONSUMER` setting. Events are only acknowledged to the queue transport
+(see `data_provider.queues`) once they have been processed, or scheduled for a retry if
+they failed (see `data_provider.retries`).
 """
 
 import json
 import logging
 import os
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
 
-import redis
 import requests
 from celery import shared_task
 from django.conf import settings
+from django.db import DatabaseError
+from redis.exceptions import RedisError
 
-logger = logging.getLogger("django_price_manager")
+from .queues import QueuedEvent, consumer_lock, get_event_queue
+from .retries import pop_due_retries, schedule_retry
+from .serializers import EventSerializer
 
-r = redis.Redis.from_url(settings.CELERY_BROKER_URL)
-queue_key = "event_queue"
+logger = logging.getLogger("django_price_manager")
 
 
 @shared_task
 def process_event_from_queue():
     """
     Dequeue events from Redis and process them by posting to the data_provider database.
-    This task continuously polls the queue for new events.
+    This task continuously polls the queue for new events, after retrying the failed
+    events whose retry is due.
+
+    With the list transport, the run is skipped if the queue is already drained by
+    another run or by the `consume_events` command, which hold the consumer lock.
+    Stream consumers read concurrently, without the lock.
+    """
+    if not get_event_queue().exclusive:
+        drain_event_queue()
+        return
+    lock = consumer_lock()
+    if not lock.acquire():
+        logger.info("Skipping the run, the queue is drained by another consumer.")
+        return
+    try:
+        drain_event_queue()
+    finally:
+        lock.release()
+
+
+def drain_event_queue() -> None:
+    """
+    Retry the due failed events, then process the queued events until the queue is
+    empty, with the consumer selected by `EVENT_QUEUE_CONSUMER`.
     """
+    process_due_retries()
+    if settings.EVENT_QUEUE_CONSUMER == "bulk":
+        process_event_batches_from_queue()
+        return
+
+    queue = get_event_queue()
     while True:
         logger.info("Waiting for new events...")
-        event_data_json = r.lpop(queue_key)
-        logger.info("Event data is: %s", event_data_json)
-        if event_data_json is None:
+        queued_events = queue.pop(1)
+        if not queued_events:
             break
-        process_event(event_data_json)
+        logger.info("Event data is: %s", queued_events[0].payload)
+        # Failed events are scheduled for a retry, so they do not block the queue
+        process_event(queued_events[0].payload)
+        queue.ack(queued_events)
+
+
+def consume_events(should_stop: Callable[[], bool], block: float) -> int:
+    """
+    Process the queued events as they arrive, until `should_stop` returns True.
+
+    Unlike `drain_event_queue`, the queue is read with blocking pops, so an event is
+    processed as soon as it is pushed and an empty queue costs no polling.
+
+    Errors are logged and the consumer carries on after a pause, so it only stops when
+    `should_stop` returns True.
+
+    Args:
+        should_stop (Callable[[], bool]): Returns True when the consumer must stop.
+        block (float): The maximum number of seconds a pop waits for events, which
+            bounds the shutdown time and the delay of due retries.
+
+    Returns:
+        int: The number of events processed.
+    """
+    queue = get_event_queue()
+    bulk = settings.EVENT_QUEUE_CONSUMER == "bulk"
+    count = settings.EVENT_QUEUE_BATCH_SIZE if bulk else 1
+    processed = 0
+    retries_checked = 0.0
+    while not should_stop():
+        try:
+            if time.monotonic() - retries_checked >= block:
+                process_due_retries()
+                retries_checked = time.monotonic()
+            queued_events = queue.pop(count, block=block)
+            if not queued_events:
+                continue
+            if bulk:
+                process_event_batch([event.payload for event in queued_events])
+            else:
+                process_event(queued_events[0].payload)
+            queue.ack(queued_events)
+            processed += len(queued_events)
+        except RedisError as e:
+            logger.error(f"Failed to consume events: {e}")
+            time.sleep(block or 1.0)
+        except Exception:
+            # A dead thread would leave the queue unconsumed while the lock is held
+            logger.exception("Unexpected error while consuming events")
+            time.sleep(block or 1.0)
+    return processed
+
+
+def process_due_retries() -> int:
+    """
+    Process the failed events whose retry is due, with the configured consumer.
+
+    Returns:
+        int: The number of events retried.
+    """
+    retried = 0
+    while True:
+        retries = pop_due_retries(settings.EVENT_QUEUE_BATCH_SIZE)
+        if not retries:
+            return retried
+        logger.info(f"Retrying {len(retries)} failed events.")
+        if settings.EVENT_QUEUE_CONSUMER == "bulk":
+            payloads_by_attempts: Dict[int, List[bytes]] = defaultdict(list)
+            for retry in retries:
+                payloads_by_attempts[retry.attempts].append(retry.payload)
+            for attempts, payloads in payloads_by_attempts.items():
+                process_event_batch(payloads, attempts)
+        else:
+            for retry in retries:
+                process_event(retry.payload, retry.attempts)
+        retried += len(retries)
+
+
+def is_permanent_failure(error: requests.exceptions.RequestException) -> bool:
+    """
+    Return whether a failed post cannot succeed when retried.
+
+    Args:
+        error (requests.exceptions.RequestException): The error of the post.
+
+    Returns:
+        bool: True for client errors, except timeouts and rate limiting.
+    """
+    response = error.response
+    return (
+        response is not None
+        and 400 <= response.status_code < 500
+        and response.status_code not in (408, 429)
+    )
 
 
-def process_event(event_data_json):
+def process_event(event_data_json, attempts: int = 0) -> bool:
     """
     Process a single event by posting it to the data_provider database.
+
+    A failed event is scheduled for a retry, or dead-lettered if it is invalid or has
+    exhausted its retries.
+
+    Args:
+        event_data_json (Union[bytes, str]): The JSON encoded event.
+        attempts (int): The number of earlier failed attempts to process the event.
+
+    Returns:
+        bool: True if the event was posted successfully.
     """
     logger.debug("Processing event...")
-    event_data = json.loads(event_data_json)
+    try:
+        event_data = json.loads(event_data_json)
+    except json.JSONDecodeError as e:
+        schedule_retry(event_data_json, attempts + 1, str(e), permanent=True)
+        return False
     try:
         base_url = os.getenv("EVENTS_API_BASE_URL", "http://127.0.0.1:8000")
         response = requests.post(f"{base_url}/events/", json=event_data)
         response.raise_for_status()
         logger.info(f"Event {event_data.get('id', 'Unknown')} successfully posted.")
+        return True
     except requests.exceptions.RequestException as e:
         logger.error(
             f"Failed to post event {event_data.get('id', 'Unknown')}: {str(e)}"
         )
+        schedule_retry(
+            event_data_json, attempts + 1, str(e), permanent=is_permanent_failure(e)
+        )
+        return False
+
+
+def process_event_batches_from_queue() -> int:
+    """
+    Dequeue events from Redis in batches and insert them in-process.
+
+    Up to `EVENT_QUEUE_BATCH_SIZE` events are popped per Redis round trip. A batch is
+    flushed once it is full, or once `EVENT_QUEUE_FLUSH_INTERVAL` seconds have passed
+    since its first event was popped, and the task returns when the queue is drained.
+
+    Returns:
+        int: The number of events inserted.
+    """
+    queue = get_event_queue()
+    batch_size = settings.EVENT_QUEUE_BATCH_SIZE
+    flush_interval = settings.EVENT_QUEUE_FLUSH_INTERVAL
+    batch: List[QueuedEvent] = []
+    batch_started = time.monotonic()
+    inserted = 0
+
+    while True:
+        queued_events = queue.pop(batch_size - len(batch))
+        if queued_events and not batch:
+            batch_started = time.monotonic()
+        batch.extend(queued_events)
+
+        if len(batch) >= batch_size or (
+            batch and time.monotonic() - batch_started >= flush_interval
+        ):
+            inserted += process_event_batch([event.payload for event in batch])
+            queue.ack(batch)
+            batch = []
+        elif not queued_events:
+            if not batch:
+                break
+            # Give the producer a moment to fill the batch before flushing it
+            time.sleep(min(0.05, flush_interval))
+
+    return inserted
+
+
+def process_event_batch(event_data_jsons: List[bytes], attempts: int = 0) -> int:
+    """
+    Validate a batch of events with the EventSerializer and insert the valid ones with
+    a single bulk insert, skipping the duplicates of ingested events.
+
+    Invalid events are dead-lettered. If the insert fails, the valid events are
+    scheduled for a retry.
+
+    Args:
+        event_data_jsons (List[bytes]): The JSON encoded events popped from the queue.
+        attempts (int): The number of earlier failed attempts to process the events.
+
+    Returns:
+        int: The number of events inserted.
+    """
+    logger.debug(f"Processing a batch of {len(event_data_jsons)} events...")
+    payloads = []
+    events_data = []
+    for event_data_json in event_data_jsons:
+        try:
+            events_data.append(json.loads(event_data_json))
+            payloads.append(event_data_json)
+        except json.JSONDecodeError as e:
+            schedule_retry(event_data_json, attempts + 1, str(e), permanent=True)
+    serializer = EventSerializer(data=events_data, many=True)
+    valid_items, errors = serializer.validate_items()
+    for error in errors:
+        event_data = events_data[error["index"]]
+        event_id = (
+            event_data.get("id", "Unknown")
+            if isinstance(event_data, dict)
+            else "Unknown"
+        )
+        logger.error(f"Failed to insert event {event_id}: {error['errors']}")
+        schedule_retry(
+            payloads[error["index"]],
+            attempts + 1,
+            json.dumps(error["errors"]),
+            permanent=True,
+        )
+
+    try:
+        events = serializer.create(valid_items) if valid_items else []
+    except DatabaseError as e:
+        logger.error(f"Failed to insert a batch of {len(valid_items)} events: {e}")
+        failed = {error["index"] for error in errors}
+        for index, payload in enumerate(payloads):
+            if index not in failed:
+                schedule_retry(payload, attempts + 1, str(e))
+        return 0
+    logger.info(
+        f"Inserted {len(events)} of {len(events_data)} events, "
+        f"suppressed {serializer.duplicates} duplicates."
+    )
+    return len(events)
@@ -0,0 +1,54 @@
+import json
+from unittest.mock import patch
+
+from data_provider.management.commands import dead_letters, trigger_load_events
+
+
+@patch("data_provider.queues.r")
+def test_load_events_to_queue(mock_redis, tmp_path):
+    data_file = tmp_path / "data.csv"
+    invalid_rows_file = tmp_path / "invalid_rows.csv"
+    data_file.write_text(
+        "id,hotel_id,event_timestamp,status,room_reservation_id,night_of_stay\n"
+        "1,1,2021-03-01 00:00:00,1,0013e338-0158-4d5c-8698-aebe00cba360,2021-04-01\n"
+        "2,1,2021-01-01 00:00:00,1,not-a-uuid,2021-04-01\n"
+        "3,2,2021-02-01 00:00:00,2,0013e338-0158-4d5c-8698-aebe00cba361,2021-04-01\n"
+        "4,2,2021-01-15 00:00:00,1,0013e338-0158-4d5c-8698-aebe00cba362,2021-04-01\n"
+    )
+
+    with patch.object(
+        trigger_load_events, "DATA_FILE_PATH", str(data_file)
+    ), patch.object(
+        trigger_load_events, "INVALID_ROWS_FILE_PATH", str(invalid_rows_file)
+    ):
+        stats = trigger_load_events.load_events_to_queue(chunk_size=2)
+
+    assert stats.rows == 4
+    assert stats.invalid_rows == 1
+    assert stats.enqueued == 3
+    assert "not-a-uuid" in invalid_rows_file.read_text()
+
+    # Events are enqueued in chronological order across chunks
+    pushed = [
+        json.loads(payload)
+        for call in mock_redis.pipeline.return_value.rpush.call_args_list
+        for payload in call.args[1:]
+    ]
+    assert [event["id"] for event in pushed] == [4, 3, 1]
+
+
+@patch("data_provider.management.commands.dead_letters.r")
+def test_replay_dead_letters(mock_redis):
+    mock_redis.lpop.return_value = [
+        json.dumps({"payload": '{"id": 1}', "attempts": 5, "error": "timeout"}),
+        json.dumps({"payload": '{"id": 2}', "attempts": 5, "error": "timeout"}),
+    ]
+
+    with patch("data_provider.queues.r") as mock_queue_redis:
+        replayed = dead_letters.replay_dead_letters(count=10)
+
+    assert replayed == 2
+    mock_redis.lpop.assert_called_once_with("event_queue:dead", 10)
+    mock_queue_redis.pipeline.return_value.rpush.assert_called_once_with(
+        "event_queue", '{"id": 1}', '{"id": 2}'
+    )
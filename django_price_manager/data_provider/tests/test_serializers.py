@@ -1,24 +1,36 @@
 import pytest
-from data_provider.serializers import EventSerializer
+from data_provider.models import Event
+from data_provider.serializers import EventSerializer, event_rows
 from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from django_price_manager.renderers import FastJSONRenderer
 
 
 @pytest.mark.django_db(databases=["data_provider"])
-def test_event_serializer():
-    data = {
-        "hotel_id": 1,
-        "event_timestamp": "2020-01-01T00:00:00Z",
-        "status": 1,
-        "room_reservation_id": "0013e338-0158-4d5c-8698-aebe00cba360",
-        "night_of_stay": "2020-01-01",
-    }
-    serializer = EventSerializer(data=data)
+def test_event_serializer(event_data):
+    serializer = EventSerializer(data=event_data)
     assert serializer.is_valid()
     event = serializer.save()
     assert event.hotel_id == 1
 
-    invalid_data = data.copy()
-    invalid_data["status"] = 3  # Invalid status
+    invalid_data = dict(event_data, status=3)  # Invalid status
     serializer = EventSerializer(data=invalid_data)
     with pytest.raises(ValidationError):
         serializer.is_valid(raise_exception=True)
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+def test_event_rows_match_event_serializer(create_event):
+    create_event(
+        timestamp="2020-01-01T10:30:00.123456Z",
+        rpg_status=Event.CANCELLATION,
+        night_of_stay="2020-01-05",
+    )
+    create_event(
+        hotel_id=2, timestamp="2020-01-02T00:00:00Z", night_of_stay="2020-01-03"
+    )
+    events = Event.objects.order_by("id")
+
+    expected = JSONRenderer().render(EventSerializer(events, many=True).data)
+    assert FastJSONRenderer().render(list(event_rows(events))) == expected
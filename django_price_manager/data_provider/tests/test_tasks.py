@@ -1,9 +1,22 @@
 import json
 import os
-from unittest.mock import MagicMock, patch
+import threading
+import time
+from unittest.mock import MagicMock, call, patch
 
 import pytest
-from data_provider.tasks import process_event
+import requests
+from data_provider.models import Event
+from data_provider.queues import StreamEventQueue
+from data_provider.tasks import (
+    consume_events,
+    process_due_retries,
+    process_event,
+    process_event_batch,
+    process_event_batches_from_queue,
+    process_event_from_queue,
+)
+from django.db import DatabaseError
 
 
 @pytest.mark.django_db(databases=["data_provider"])
@@ -24,3 +37,131 @@ def test_process_event_from_queue(mock_redis_lpop, mock_post):
     mock_post.assert_called_once_with(
         base_url, json={"id": "1234", "event_timestamp": "2021-08-01T00:00:00Z"}
     )
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+@patch("data_provider.queues.r")
+def test_process_event_batches_from_queue(mock_redis, event_data, settings):
+    settings.EVENT_QUEUE_FLUSH_INTERVAL = 0
+    invalid_event_data = dict(event_data, status=3)
+    mock_redis.lpop.side_effect = [
+        [json.dumps(event_data), json.dumps(invalid_event_data)],
+        None,
+    ]
+
+    # When
+    inserted = process_event_batches_from_queue()
+
+    # The valid event is inserted in-process and the invalid one is skipped
+    assert inserted == 1
+    assert Event.objects.count() == 1
+    mock_redis.lpop.assert_any_call("event_queue", settings.EVENT_QUEUE_BATCH_SIZE)
+
+
+@patch("requests.post")
+@patch("data_provider.queues.r")
+def test_process_event_from_stream_acks_posted_events(mock_redis, mock_post, settings):
+    settings.EVENT_QUEUE_TRANSPORT = "stream"
+    mock_redis.zrangebyscore.return_value = []
+    mock_redis.xautoclaim.return_value = [b"0-0", [], []]
+    mock_redis.xreadgroup.side_effect = [
+        [[b"event_stream", [(b"1-0", {b"data": b'{"id": 1}'})]]],
+        [[b"event_stream", [(b"2-0", {b"data": b'{"id": 2}'})]]],
+        [],
+    ]
+    failed_response = MagicMock()
+    failed_response.raise_for_status.side_effect = requests.exceptions.HTTPError()
+    mock_post.side_effect = [MagicMock(), failed_response]
+
+    # When
+    process_event_from_queue()
+
+    # The failed event is scheduled for a retry, so both events are acknowledged
+    mock_redis.pipeline.return_value.xack.assert_has_calls(
+        [
+            call("event_stream", "event_consumers", b"1-0"),
+            call("event_stream", "event_consumers", b"2-0"),
+        ]
+    )
+    [(key, retries)] = [c.args for c in mock_redis.zadd.call_args_list]
+    assert key == "event_queue:retry"
+    assert json.loads(next(iter(retries))) == {"payload": '{"id": 2}', "attempts": 1}
+    # Stream consumers read concurrently, each thread under its own name
+    mock_redis.lock.assert_not_called()
+    consumers = []
+    threads = [
+        threading.Thread(target=lambda: consumers.append(StreamEventQueue().consumer))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    assert len(set(consumers)) == 2
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+@patch("data_provider.serializers.EventListSerializer.create")
+@patch("data_provider.queues.r")
+def test_failed_events_are_retried_then_dead_lettered(
+    mock_redis, mock_create, event_data, settings
+):
+    settings.EVENT_QUEUE_CONSUMER = "bulk"
+    settings.EVENT_RETRY_MAX_ATTEMPTS = 2
+    payload = json.dumps(event_data)
+    mock_create.side_effect = DatabaseError("database is down")
+
+    # A transient failure schedules a retry, an invalid event is dead-lettered
+    assert process_event_batch([payload, json.dumps(dict(event_data, status=3))]) == 0
+    [(key, retries)] = [c.args for c in mock_redis.zadd.call_args_list]
+    assert key == "event_queue:retry"
+    [member] = retries
+    assert json.loads(member) == {"payload": payload, "attempts": 1}
+    assert 0.4 < retries[member] - time.time() <= 1
+    assert mock_redis.rpush.call_count == 1
+
+    # The due retry fails again and exhausts its attempts
+    mock_redis.zrangebyscore.side_effect = [[member.encode()], []]
+    mock_redis.pipeline.return_value.execute.return_value = [1]
+    assert process_due_retries() == 1
+    assert mock_redis.zadd.call_count == 1
+    key, dead_letter = mock_redis.rpush.call_args.args
+    assert key == "event_queue:dead"
+    assert json.loads(dead_letter)["attempts"] == 2
+    assert json.loads(dead_letter)["error"] == "database is down"
+    assert Event.objects.count() == 0
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+@patch("data_provider.queues.r")
+def test_consume_events_blocks_on_the_queue(mock_redis, event_data, settings):
+    settings.EVENT_QUEUE_CONSUMER = "bulk"
+    mock_redis.zrangebyscore.return_value = []
+    mock_redis.lpop.return_value = None
+    # An unexpected error does not stop the consumer
+    mock_redis.blpop.side_effect = [
+        ValueError("Unexpected"),
+        (b"event_queue", json.dumps(event_data)),
+        None,
+    ]
+    should_stop = iter([False, False, False, True])
+
+    # When
+    with patch("data_provider.tasks.time.sleep") as mock_sleep:
+        processed = consume_events(lambda: next(should_stop), block=0.5)
+
+    assert processed == 1
+    assert Event.objects.count() == 1
+    mock_redis.blpop.assert_called_with(["event_queue"], timeout=0.5)
+    mock_sleep.assert_called_once_with(0.5)
+
+
+@patch("data_provider.queues.r")
+def test_process_event_from_queue_skips_while_consumed(mock_redis):
+    # The consumer lock is held by the consume_events command
+    mock_redis.lock.return_value.acquire.return_value = False
+
+    # When
+    process_event_from_queue()
+
+    mock_redis.lpop.assert_not_called()
+    mock_redis.lock.return_value.release.assert_not_called()
@@ -1,22 +1,204 @@
+import json
+from unittest.mock import patch
+
 import pytest
 from data_provider.models import Event
+from django.core.cache.backends.filebased import FileBasedCache
 from rest_framework.test import APIClient
 
+from django_price_manager.versions import bump_versions, get_versions
+
 
 @pytest.mark.django_db(databases=["data_provider"])
-def test_event_list_create_view():
+def test_event_list_create_view(event_data):
     client = APIClient()
-    data = {
-        "hotel_id": 1,
-        "event_timestamp": "2020-01-01T00:00:00Z",
-        "status": 1,
-        "room_reservation_id": "0013e338-0158-4d5c-8698-aebe00cba360",
-        "night_of_stay": "2020-01-01",
-    }
-    response = client.post("/events/", data, format="json")
+    response = client.post("/events/", event_data, format="json")
     assert response.status_code == 201
     assert Event.objects.count() == 1
 
     response = client.get("/events/")
     assert response.status_code == 200
-    assert len(response.data) == 1
+    # Listings are paginated by default
+    assert len(response.data["results"]) == 1
+    assert response.data["next"] is None
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+def test_event_bulk_create_view(event_data):
+    client = APIClient()
+    valid = event_data
+    invalid = dict(valid, status=3)
+    cancellation = dict(valid, status=2)
+    response = client.post(
+        "/events/bulk/", [valid, invalid, cancellation], format="json"
+    )
+    assert response.status_code == 201
+    assert response.data["created"] == 2
+    assert response.data["failed"] == 1
+    assert response.data["errors"][0]["index"] == 1
+    assert Event.objects.count() == 2
+
+    response = client.post("/events/bulk/", valid, format="json")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+def test_event_list_cursor_pagination(create_event):
+    client = APIClient()
+    for hour in [2, 0, 1, 1]:
+        create_event(timestamp=f"2020-01-01T0{hour}:00:00Z")
+
+    for ordering, order_by in [("timestamp", ["timestamp", "id"]), ("id", ["id"])]:
+        seen = []
+        params = {"limit": 3, "ordering": ordering}
+        while True:
+            response = client.get("/events/", params)
+            assert response.status_code == 200
+            seen.extend(event["id"] for event in response.data["results"])
+            if not response.data["next"]:
+                break
+            params = {**params, "cursor": response.data["next"]}
+
+        # Every event is returned once, ordered by (timestamp, id) or by id
+        expected = list(Event.objects.order_by(*order_by).values_list("id", flat=True))
+        assert seen == expected
+
+    response = client.get("/events/", {"cursor": "invalid"})
+    assert response.status_code == 400
+    response = client.get("/events/", {"ordering": "hotel_id"})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+def test_event_list_streaming(create_event, settings):
+    settings.EVENT_STREAM_CHUNK_SIZE = 2
+    client = APIClient()
+    for hotel_id in range(3):
+        create_event(hotel_id=hotel_id)
+    events = client.get("/events/").data["results"]
+
+    # The streamed JSON array holds the events of the regular response
+    streamed = client.get("/events/", {"stream": 1})
+    assert streamed.streaming
+    assert json.loads(b"".join(streamed.streaming_content)) == events
+
+    streamed = client.get("/events/", HTTP_ACCEPT="application/x-ndjson")
+    assert streamed["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(streamed.streaming_content).splitlines()
+    assert [json.loads(line) for line in lines] == events
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+def test_event_list_hotel_partition(create_event):
+    client = APIClient()
+    for hotel_id in [1, 2, 3, 4]:
+        create_event(hotel_id=hotel_id)
+
+    response = client.get("/events/", {"partition": 1, "partitions": 2})
+    assert response.status_code == 200
+    assert [event["hotel_id"] for event in response.data["results"]] == [1, 3]
+
+    response = client.get("/events/", {"partition": 2, "partitions": 2})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+def test_event_list_conditional_get(
+    event_data, django_capture_on_commit_callbacks, settings, tmp_path
+):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path),
+        }
+    }
+    client = APIClient()
+    event = event_data
+    response = client.get("/events/", {"hotel_id": 1})
+    etag = response["ETag"]
+    assert response["Last-Modified"]
+
+    response = client.get("/events/", {"hotel_id": 1}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+    # New events of another hotel do not change the listing of hotel 1
+    for hotel_id, status_code in [(2, 304), (1, 200)]:
+        with django_capture_on_commit_callbacks(using="data_provider", execute=True):
+            client.post(
+                "/events/",
+                dict(event, hotel_id=hotel_id, status=hotel_id),
+                format="json",
+            )
+        response = client.get("/events/", {"hotel_id": 1}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status_code
+    assert len(response.data["results"]) == 1
+    assert response["ETag"] != etag
+
+    # A change within the same second keeps the Last-Modified date, so only the ETag
+    # tells the poller that its response is stale
+    etag, last_modified = response["ETag"], response["Last-Modified"]
+    with patch("django_price_manager.versions.time.time_ns") as time_ns:
+        time_ns.return_value = get_versions("events", [1])[0] + 1
+        with django_capture_on_commit_callbacks(using="data_provider", execute=True):
+            client.post(
+                "/events/",
+                dict(event, event_timestamp="2020-01-01T00:00:01Z"),
+                format="json",
+            )
+    for headers in [
+        {"HTTP_IF_MODIFIED_SINCE": last_modified},
+        {"HTTP_IF_MODIFIED_SINCE": last_modified, "HTTP_IF_NONE_MATCH": etag},
+    ]:
+        response = client.get("/events/", {"hotel_id": 1}, **headers)
+        assert response.status_code == 200
+        assert len(response.data["results"]) == 2
+        assert response["Last-Modified"] == last_modified
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+def test_event_list_versions_shared_with_workers(settings, tmp_path):
+    client = APIClient()
+    # Versions bumped by a worker would not reach a per-process cache
+    assert not client.get("/events/", {"hotel_id": 1}).has_header("ETag")
+
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path),
+        }
+    }
+    etag = client.get("/events/", {"hotel_id": 1})["ETag"]
+    with patch(
+        "django_price_manager.versions.cache", FileBasedCache(str(tmp_path), {})
+    ):
+        bump_versions("events", [1])
+    response = client.get("/events/", {"hotel_id": 1}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db(databases=["data_provider"])
+def test_event_ingestion_is_idempotent(event_data, django_capture_on_commit_callbacks):
+    client = APIClient()
+    event = event_data
+    duplicates = client.get("/events/stats/").data["duplicates"]
+    assert client.post("/events/", event, format="json").status_code == 201
+    response = client.post("/events/", event, format="json")
+    assert response.status_code == 200
+    assert response.data["room_reservation_id"] == event["room_reservation_id"]
+
+    # Repeated within the batch, and already ingested
+    cancellation = dict(event, status=2)
+    with django_capture_on_commit_callbacks(using="data_provider", execute=True):
+        response = client.post(
+            "/events/bulk/", [event, cancellation, cancellation], format="json"
+        )
+    assert response.status_code == 201
+    assert response.data["created"] == 1
+    assert response.data["duplicates"] == 2
+    # Remembered in the cache once the batch is committed
+    response = client.post("/events/bulk/", [cancellation], format="json")
+    assert response.data["duplicates"] == 1
+    assert Event.objects.count() == 2
+    assert client.get("/events/stats/").data["duplicates"] == duplicates + 4
@@ -9,10 +9,14 @@ from typing import List
 from django.urls import path
 from django.urls.resolvers import URLPattern
 
-from .views import EventView
+from .views import EventBulkView, EventStatsView, EventView
 
 # Define the URL patterns for the Event related views.
 urlpatterns: List[URLPattern] = [
     # Endpoint for accessing and manipulating event data via the EventView.
     path("events/", EventView.as_view(), name="events"),
+    # Endpoint for creating a batch of events in a single request.
+    path("events/bulk/", EventBulkView.as_view(), name="events-bulk"),
+    # Endpoint for retrieving the counters of event ingestion.
+    path("events/stats/", EventStatsView.as_view(), name="events-stats"),
 ]
@@ -2,13 +2,21 @@
 Event views module for handling Event-related HTTP requests and responses.
 
 This module contains the views to handle GET and POST requests for Event objects,
-including filtering and validation logic for query parameters.
+including filtering and validation logic for query parameters, and a bulk ingestion
+view that writes a batch of events at once. Event listings can be streamed as a JSON
+array or as newline delimited JSON to keep memory flat on large exports. Event listings
+carry an ETag and a Last-Modified date, and conditional GET requests for hotels without
+new events are answered with 304 Not Modified before querying the events. The number of
+suppressed duplicates is served by a stats view.
 """
 
 import logging
-from typing import Any
+from typing import Any, Callable, Dict, Iterator, List, Tuple
 
+from django.conf import settings
+from django.db.models import QuerySet
 from django.forms import ValidationError
+from django.http import StreamingHttpResponse
 from django.utils.dateparse import parse_date, parse_datetime
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
@@ -16,12 +24,123 @@ from rest_framework import generics, status
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from django_price_manager.renderers import FastJSONRenderer, NDJSONRenderer
+from django_price_manager.versions import (
+    get_versions,
+    not_modified,
+    set_validators,
+    versions_etag,
+    versions_last_modified,
+)
+
+from .dedup import get_duplicate_count
 from .models import Event
-from .serializers import EventSerializer
+from .pagination import EventCursorPagination, in_hotel_partition
+from .serializers import EventSerializer, event_rows
+from .signals import EVENTS_VERSION_NAMESPACE
 
 logger = logging.getLogger("django_price_manager")
 
 
+def parse_query_date(value: str, parser: Callable[[str], Any]) -> Any:
+    """
+    Parse a date or datetime query parameter.
+
+    Args:
+        value (str): The query parameter value.
+        parser (Callable[[str], Any]): `parse_date` or `parse_datetime`.
+
+    Returns:
+        Any: The parsed value, or None if the value is not in a date format.
+
+    Raises:
+        ValidationError: If the value is well formatted but not a valid date.
+    """
+    try:
+        return parser(value)
+    except ValueError as e:
+        raise ValidationError(str(e))
+
+
+def iter_event_chunks(events: QuerySet) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Serialize events chunk by chunk without caching the queryset.
+
+    Args:
+        events (QuerySet): The events to serialize.
+
+    Yields:
+        List[Dict[str, Any]]: Up to `EVENT_STREAM_CHUNK_SIZE` serialized events.
+    """
+    chunk_size = settings.EVENT_STREAM_CHUNK_SIZE
+    chunk = []
+    for row in event_rows(events, chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_json_array(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """
+    Render serialized chunks as a single JSON array, formatted like the JSON renderer.
+
+    Args:
+        chunks (Iterator[List[Dict[str, Any]]]): The serialized events.
+
+    Yields:
+        bytes: The parts of the JSON array.
+    """
+    renderer = FastJSONRenderer()
+    yield b"["
+    separator = b""
+    for chunk in chunks:
+        # Render the chunk as an array and strip its brackets
+        yield separator + renderer.render(chunk)[1:-1]
+        separator = b","
+    yield b"]"
+
+
+def stream_ndjson(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """
+    Render serialized chunks as newline delimited JSON.
+
+    Args:
+        chunks (Iterator[List[Dict[str, Any]]]): The serialized events.
+
+    Yields:
+        bytes: The lines of each chunk.
+    """
+    renderer = NDJSONRenderer()
+    for chunk in chunks:
+        yield renderer.render(chunk)
+
+
+def parse_partition(partition: str, partitions: str) -> Tuple[int, int]:
+    """
+    Parse the hotel partition query parameters.
+
+    Args:
+        partition (str): The `partition` query parameter.
+        partitions (str): The `partitions` query parameter.
+
+    Returns:
+        Tuple[int, int]: The partition and the number of partitions.
+
+    Raises:
+        ValidationError: If they are not integers with `0 <= partition < partitions`.
+    """
+    try:
+        parsed_partition, parsed_partitions = int(partition), int(partitions)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Invalid partition: {partition}/{partitions}")
+    if not 0 <= parsed_partition < parsed_partitions:
+        raise ValidationError(f"Invalid partition: {partition}/{partitions}")
+    return parsed_partition, parsed_partitions
+
+
 class EventView(generics.ListCreateAPIView):
     """
     View to handle GET and POST requests for Event objects.
@@ -31,6 +150,8 @@ class EventView(generics.ListCreateAPIView):
     """
 
     serializer_class = EventSerializer
+    pagination_class = EventCursorPagination
+    renderer_classes = [FastJSONRenderer, NDJSONRenderer]
 
     @swagger_auto_schema(
         operation_description="Get or create events",
@@ -90,26 +211,119 @@ class EventView(generics.ListCreateAPIView):
                 type=openapi.TYPE_STRING,
                 format=openapi.FORMAT_DATE,
             ),
+            openapi.Parameter(
+                "partitions",
+                openapi.IN_QUERY,
+                description="Number of hotel partitions, used with 'partition'",
+                type=openapi.TYPE_INTEGER,
+            ),
+            openapi.Parameter(
+                "partition",
+                openapi.IN_QUERY,
+                description="Only events of hotels whose ID modulo 'partitions' is this value",
+                type=openapi.TYPE_INTEGER,
+            ),
+            openapi.Parameter(
+                "limit",
+                openapi.IN_QUERY,
+                description="Number of events per page, EVENT_PAGE_DEFAULT_LIMIT by default",
+                type=openapi.TYPE_INTEGER,
+            ),
+            openapi.Parameter(
+                "ordering",
+                openapi.IN_QUERY,
+                description="Order of the pages, 'timestamp' by default or 'id' for the insertion order",
+                type=openapi.TYPE_STRING,
+                enum=["timestamp", "id"],
+            ),
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                description="Cursor of the page to retrieve, as returned in 'next'",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "stream",
+                openapi.IN_QUERY,
+                description="Stream all the events instead of a page (1 to enable)",
+                type=openapi.TYPE_INTEGER,
+                enum=[0, 1],
+            ),
         ],
     )
     def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """
         Handles GET requests to retrieve events based on query parameters.
 
+        The events are paginated by `(timestamp, id)`, or by `id` with `ordering=id`,
+        `EVENT_PAGE_DEFAULT_LIMIT` per page unless a `limit` is given. All the matching events are streamed instead as
+        a JSON array with `stream=1`, and as newline delimited JSON when
+        `application/x-ndjson` is accepted.
+
+        The validators of the response are derived from the versions of the events of
+        the queried hotel, so a matching `If-None-Match` header is answered with 304
+        Not Modified before the events are queried.
+
         Args:
             request (Request): The HTTP request object.
 
         Returns:
             Response: The HTTP response containing the filtered events.
         """
-        hotel_id = request.query_params.get("hotel_id")
-        rpg_status = request.query_params.get("rpg_status")
-        room_reservation_id = request.query_params.get("room_reservation_id")
-        updated_gte = request.query_params.get("updated_gte")
-        updated_gt = request.query_params.get("updated_gt")
-        updated_lte = request.query_params.get("updated_lte")
-        night_of_stay_gte = request.query_params.get("night_of_stay_gte")
-        night_of_stay_lte = request.query_params.get("night_of_stay_lte")
+        try:
+            events = self.get_queryset()
+        except ValidationError as e:
+            logger.error(f"Error parsing query parameters: {str(e)}")
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        hotel_id = request.query_params.get("hotel_id", "")
+        versions = get_versions(
+            EVENTS_VERSION_NAMESPACE, [int(hotel_id)] if hotel_id.isdigit() else None
+        )
+        etag = versions_etag(
+            [request.accepted_renderer.format, sorted(request.query_params.lists())],
+            versions,
+        )
+        last_modified = versions_last_modified(versions)
+        not_modified_response = not_modified(request, etag, last_modified)
+        if not_modified_response is not None:
+            return not_modified_response
+
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            response = StreamingHttpResponse(
+                stream_ndjson(iter_event_chunks(events)),
+                content_type=NDJSONRenderer.media_type,
+            )
+        elif request.query_params.get("stream") in ("1", "true"):
+            response = StreamingHttpResponse(
+                stream_json_array(iter_event_chunks(events)),
+                content_type=FastJSONRenderer.media_type,
+            )
+        else:
+            # Events are serialized through the fast read path, see `event_rows`
+            response = self.get_paginated_response(self.paginate_queryset(events))
+        return set_validators(response, etag, last_modified)
+
+    def get_queryset(self) -> QuerySet:
+        """
+        Build the queryset of events matching the query parameters.
+
+        Returns:
+            QuerySet: The filtered events, ordered by timestamp.
+
+        Raises:
+            ValidationError: If a date or partition parameter cannot be parsed.
+        """
+        query_params = self.request.query_params
+        hotel_id = query_params.get("hotel_id")
+        rpg_status = query_params.get("rpg_status")
+        room_reservation_id = query_params.get("room_reservation_id")
+        updated_gte = query_params.get("updated_gte")
+        updated_gt = query_params.get("updated_gt")
+        updated_lte = query_params.get("updated_lte")
+        night_of_stay_gte = query_params.get("night_of_stay_gte")
+        night_of_stay_lte = query_params.get("night_of_stay_lte")
+        partitions = query_params.get("partitions")
 
         # Start with all events
         events = Event.objects.all()
@@ -124,57 +338,42 @@ class EventView(generics.ListCreateAPIView):
 
         # Parsing datetime fields
         if updated_gte:
-            try:
-                parsed_date_gte = parse_datetime(updated_gte)
-                if parsed_date_gte:
-                    events = events.filter(timestamp__gte=parsed_date_gte)
-                    logger.info(
-                        f"Filtering events updated after or at: {parsed_date_gte}"
-                    )
-            except ValidationError as e:
-                logger.error(f"Error parsing date: {str(e)}")
-                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            parsed_date_gte = parse_query_date(updated_gte, parse_datetime)
+            if parsed_date_gte:
+                events = events.filter(timestamp__gte=parsed_date_gte)
+                logger.info(f"Filtering events updated after or at: {parsed_date_gte}")
 
         # This parameter added for the dashboard update task.
         if updated_gt:
-            try:
-                parsed_date_gt = parse_datetime(updated_gt)
-                if parsed_date_gt:
-                    events = events.filter(timestamp__gt=parsed_date_gt)
-                    logger.info(f"Filtering events updated after: {parsed_date_gt}")
-            except ValidationError as e:
-                logger.error(f"Error parsing date: {str(e)}")
-                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            parsed_date_gt = parse_query_date(updated_gt, parse_datetime)
+            if parsed_date_gt:
+                events = events.filter(timestamp__gt=parsed_date_gt)
+                logger.info(f"Filtering events updated after: {parsed_date_gt}")
 
         if updated_lte:
-            try:
-                parsed_date_lte = parse_datetime(updated_lte)
-                if parsed_date_lte:
-                    events = events.filter(timestamp__lte=parsed_date_lte)
-            except ValidationError as e:
-                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            parsed_date_lte = parse_query_date(updated_lte, parse_datetime)
+            if parsed_date_lte:
+                events = events.filter(timestamp__lte=parsed_date_lte)
 
         # Parsing date fields
         if night_of_stay_gte:
-            try:
-                parsed_night_gte = parse_date(night_of_stay_gte)
-                if parsed_night_gte:
-                    events = events.filter(night_of_stay__gte=parsed_night_gte)
-            except ValidationError as e:
-                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            parsed_night_gte = parse_query_date(night_of_stay_gte, parse_date)
+            if parsed_night_gte:
+                events = events.filter(night_of_stay__gte=parsed_night_gte)
 
         if night_of_stay_lte:
-            try:
-                parsed_night_lte = parse_date(night_of_stay_lte)
-                if parsed_night_lte:
-                    events = events.filter(night_of_stay__lte=parsed_night_lte)
-            except ValidationError as e:
-                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Order events by timestamp
-        events = events.order_by("timestamp")
-        serializer = EventSerializer(events, many=True)
-        return Response(serializer.data)
+            parsed_night_lte = parse_query_date(night_of_stay_lte, parse_date)
+            if parsed_night_lte:
+                events = events.filter(night_of_stay__lte=parsed_night_lte)
+
+        # This parameter added for the partitioned dashboard update tasks.
+        if partitions:
+            events = in_hotel_partition(
+                events, *parse_partition(query_params.get("partition"), partitions)
+            )
+
+        # Order events by timestamp, the ID breaks ties between equal timestamps
+        return events.order_by("timestamp", "id")
 
     @swagger_auto_schema(
         operation_description="Create a new event",
@@ -184,6 +383,9 @@ class EventView(generics.ListCreateAPIView):
         """
         Handles POST requests to create a new event.
 
+        Posting an event again is idempotent: the existing event is returned with a 200
+        status instead of 201.
+
         Args:
             request (Request): The HTTP request object.
 
@@ -193,5 +395,98 @@ class EventView(generics.ListCreateAPIView):
         serializer = EventSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(
+                serializer.data,
+                status=(
+                    status.HTTP_201_CREATED
+                    if serializer.created
+                    else status.HTTP_200_OK
+                ),
+            )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class EventBulkView(generics.GenericAPIView):
+    """
+    View to handle bulk POST requests for Event objects.
+
+    Every event of the batch is validated on its own; valid events are inserted with
+    `bulk_create` in a single transaction, and invalid ones are reported by index
+    without failing the rest of the batch. Duplicates of ingested events are skipped
+    and counted.
+
+    Duplicates inserted by a concurrent request after the lookup are ignored by the
+    insert but still reported as created, so `created` is an upper bound under
+    concurrent ingestion of the same events.
+    """
+
+    serializer_class = EventSerializer
+
+    @swagger_auto_schema(
+        operation_description="Create a batch of events",
+        request_body=EventSerializer(many=True),
+    )
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """
+        Handles POST requests to create a batch of events.
+
+        Args:
+            request (Request): The HTTP request object with a list of events as body.
+
+        Returns:
+            Response: The HTTP response containing the number of created, duplicate and
+            failed events and the errors of each failed event.
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {"error": "Expected a list of events."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > settings.EVENT_BULK_MAX_ITEMS:
+            return Response(
+                {
+                    "error": f"A batch may contain at most {settings.EVENT_BULK_MAX_ITEMS} events."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer = EventSerializer(data=request.data, many=True)
+        valid_items, errors = serializer.validate_items()
+        events = serializer.create(valid_items) if valid_items else []
+        if errors:
+            logger.info(f"Rejected {len(errors)} of {len(request.data)} bulk events")
+
+        return Response(
+            {
+                "created": len(events),
+                "duplicates": serializer.duplicates,
+                "failed": len(errors),
+                "errors": errors,
+            },
+            status=(
+                status.HTTP_400_BAD_REQUEST
+                if errors and not valid_items
+                else status.HTTP_201_CREATED
+            ),
+        )
+
+
+class EventStatsView(generics.GenericAPIView):
+    """
+    API view to retrieve the counters of event ingestion.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Retrieve the number of duplicate events suppressed at ingestion",
+    )
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """
+        Handle GET requests to retrieve the event ingestion counters.
+
+        Args:
+            request (Request): The HTTP request object.
+
+        Returns:
+            Response: A response object containing the number of suppressed duplicates.
+        """
+        return Response({"duplicates": get_duplicate_count()})
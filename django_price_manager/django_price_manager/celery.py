@@ -11,6 +11,7 @@ import os
 from datetime import timedelta
 
 from celery import Celery
+from django.conf import settings
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_price_manager.settings")
 
@@ -26,17 +27,20 @@ app.autodiscover_tasks()
 
 # Define periodic tasks using the beat scheduler.
 app.conf.beat_schedule = {
-    "update-dashboard-data-from-events": {
-        "task": "dashboard_service.tasks.update_dashboard_data",
-        "schedule": timedelta(seconds=5),  # Run every 5 seconds
-        "options": {"queue": "dashboard_queue"},
-    },
     "process-event-from-queue": {
         "task": "data_provider.tasks.process_event_from_queue",
         "schedule": timedelta(seconds=5),  # Run every 5 seconds
     },
 }
 
+# In the push mode, dashboard updates are triggered by the ingested events instead
+if settings.DASHBOARD_REFRESH_MODE == "poll":
+    app.conf.beat_schedule["update-dashboard-data-from-events"] = {
+        "task": "dashboard_service.tasks.update_dashboard_data",
+        "schedule": timedelta(seconds=5),  # Run every 5 seconds
+        "options": {"queue": "dashboard_queue"},
+    }
+
 
 @app.task(bind=True)
 def debug_task(self):
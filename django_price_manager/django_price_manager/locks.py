@@ -0,0 +1,86 @@
+"""
+Module implementing the distributed locks of the Django Price Manager workers.
+
+A lock is a Redis key holding a random token, set only if absent and expiring after a
+lease. While the lock is held, a heartbeat thread extends the lease every third of its
+duration, so a long run keeps its lock, and the lock of a crashed process is released
+when its lease expires instead of blocking the other processes forever.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+import redis
+from redis.exceptions import LockError, RedisError
+
+logger = logging.getLogger("django_price_manager")
+
+
+class LeaseLock:
+    """
+    A Redis lock whose lease is extended by a heartbeat while it is held.
+
+    Attributes:
+        name (str): The Redis key of the lock.
+        lease (float): The number of seconds the lock is held without a heartbeat.
+        lost (threading.Event): Set if the lease could not be extended, in which case
+            another process may hold the lock and the holder should stop.
+    """
+
+    def __init__(self, client: redis.Redis, name: str, lease: float) -> None:
+        self.name = name
+        self.lease = lease
+        self.lost = threading.Event()
+        self._lock = client.lock(name, timeout=lease, thread_local=False)
+        self._stopped = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Acquire the lock and start its heartbeat.
+
+        Args:
+            timeout (Optional[float]): The number of seconds to wait for the lock, None
+                to return immediately if it is held.
+
+        Returns:
+            bool: True if the lock was acquired.
+        """
+        if not self._lock.acquire(
+            blocking=timeout is not None, blocking_timeout=timeout
+        ):
+            return False
+        self.lost.clear()
+        self._stopped.clear()
+        self._heartbeat = threading.Thread(
+            target=self._beat, name=f"{self.name}-heartbeat", daemon=True
+        )
+        self._heartbeat.start()
+        return True
+
+    def release(self) -> None:
+        """
+        Stop the heartbeat and release the lock, unless it was lost.
+        """
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        try:
+            self._lock.release()
+        except (LockError, RedisError):
+            # Expired and possibly taken over by another process
+            pass
+
+    def _beat(self) -> None:
+        """
+        Extend the lease of the lock every third of its duration until it is released.
+        """
+        while not self._stopped.wait(self.lease / 3):
+            try:
+                self._lock.reacquire()
+            except (LockError, RedisError) as e:
+                logger.warning(f"Lost the lock {self.name}: {e}")
+                self.lost.set()
+                return
@@ -0,0 +1,112 @@
+"""
+Renderer module for the Django Price Manager APIs.
+
+This module defines renderers shared by the project applications, in addition to the
+default JSON renderer of the REST framework. JSON is encoded with `orjson`, a project
+dependency; the standard library encoder is only used where it is not installed.
+"""
+
+from typing import Any, Mapping, Optional
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer producing the same bytes as the JSON renderer, faster.
+
+    Data is encoded with `orjson` when it is installed. Types that `orjson` formats
+    differently, such as datetimes, are delegated to the REST framework encoder, and
+    anything `orjson` cannot encode falls back to the JSON renderer.
+    """
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        """
+        Render data into JSON.
+
+        Args:
+            data (Any): The data to render.
+            accepted_media_type (Optional[str]): The accepted media type.
+            renderer_context (Optional[Mapping[str, Any]]): The renderer context.
+
+        Returns:
+            bytes: The rendered data.
+        """
+        if (
+            orjson is None
+            or data is None
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escape the line and paragraph separators like the JSON renderer
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renderer for newline delimited JSON, one JSON document per line.
+
+    Lists are rendered with one line per item, other data as a single line. Each line is
+    formatted exactly like the output of the JSON renderer.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        """
+        Render data into newline delimited JSON.
+
+        Args:
+            data (Any): The data to render.
+            accepted_media_type (Optional[str]): The accepted media type.
+            renderer_context (Optional[Mapping[str, Any]]): The renderer context.
+
+        Returns:
+            bytes: The rendered data.
+        """
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        return b"".join(self.render_line(item) for item in items)
+
+    @staticmethod
+    def render_line(item: Any) -> bytes:
+        """
+        Render a single item as one line of newline delimited JSON.
+
+        Args:
+            item (Any): The item to render.
+
+        Returns:
+            bytes: The rendered line, including the trailing newline.
+        """
+        return FastJSONRenderer().render(item) + b"\n"
@@ -114,6 +114,23 @@ DATABASES = {
 
 DATABASE_ROUTERS = ["django_price_manager.routers.DatabaseRouter"]
 
+# Cache shared by the web and worker processes, in Redis when CACHE_URL is set. The local
+# memory fallback is per process: the dashboard response cache and the conditional GETs
+# are then disabled, as the data versions bumped by the workers would not reach the web.
+if os.getenv("CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("CACHE_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -226,3 +243,67 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Celery configuration
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://127.0.0.1:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://127.0.0.1:6379/0")
+
+# Event ingestion configuration
+# Number of events written per INSERT by the bulk ingestion paths.
+EVENT_BULK_BATCH_SIZE = int(os.getenv("EVENT_BULK_BATCH_SIZE", "500"))
+# Maximum number of events accepted by a single bulk request.
+EVENT_BULK_MAX_ITEMS = int(os.getenv("EVENT_BULK_MAX_ITEMS", "10000"))
+# Default and maximum page size of the cursor paginated events listing.
+EVENT_PAGE_DEFAULT_LIMIT = int(os.getenv("EVENT_PAGE_DEFAULT_LIMIT", "1000"))
+EVENT_PAGE_MAX_LIMIT = int(os.getenv("EVENT_PAGE_MAX_LIMIT", "10000"))
+# Number of events fetched and written at a time by the streaming events listing.
+EVENT_STREAM_CHUNK_SIZE = int(os.getenv("EVENT_STREAM_CHUNK_SIZE", "2000"))
+# Number of seconds ingested events are remembered in the cache to drop duplicates before
+# they reach the database, 0 to rely on the database unique constraint only.
+EVENT_DEDUP_TTL = int(os.getenv("EVENT_DEDUP_TTL", "86400"))
+
+# Queue consumer configuration
+# "list" uses a Redis list (LPOP), "stream" a Redis stream with a consumer group (XREADGROUP/XACK).
+EVENT_QUEUE_TRANSPORT = os.getenv("EVENT_QUEUE_TRANSPORT", "list")
+# Idle time in milliseconds after which a pending stream entry of a dead consumer is reclaimed.
+EVENT_STREAM_CLAIM_IDLE_MS = int(os.getenv("EVENT_STREAM_CLAIM_IDLE_MS", "60000"))
+# "http" posts every queued event to the events API, "bulk" inserts batches in-process.
+EVENT_QUEUE_CONSUMER = os.getenv("EVENT_QUEUE_CONSUMER", "http")
+# Number of events popped from the queue per Redis round trip by the bulk consumer.
+EVENT_QUEUE_BATCH_SIZE = int(os.getenv("EVENT_QUEUE_BATCH_SIZE", "500"))
+# Maximum number of seconds a partial batch waits for more events before it is flushed.
+EVENT_QUEUE_FLUSH_INTERVAL = float(os.getenv("EVENT_QUEUE_FLUSH_INTERVAL", "1.0"))
+# Number of failed attempts after which a queued event is moved to the dead-letter list.
+EVENT_RETRY_MAX_ATTEMPTS = int(os.getenv("EVENT_RETRY_MAX_ATTEMPTS", "5"))
+# Number of seconds before the first retry of a failed event, doubled at every attempt.
+EVENT_RETRY_BASE_DELAY = float(os.getenv("EVENT_RETRY_BASE_DELAY", "1.0"))
+# Maximum number of seconds between two retries of a failed event.
+EVENT_RETRY_MAX_DELAY = float(os.getenv("EVENT_RETRY_MAX_DELAY", "300"))
+# Number of threads consuming the event queue in the consume_events command.
+EVENT_CONSUMER_CONCURRENCY = int(os.getenv("EVENT_CONSUMER_CONCURRENCY", "1"))
+# Maximum number of seconds a blocking pop waits for events, bounding the shutdown time.
+EVENT_CONSUMER_BLOCK_TIMEOUT = float(os.getenv("EVENT_CONSUMER_BLOCK_TIMEOUT", "1.0"))
+# Number of seconds the consumer lock is held without a heartbeat, after a crash.
+EVENT_CONSUMER_LOCK_LEASE = float(os.getenv("EVENT_CONSUMER_LOCK_LEASE", "30"))
+
+# Dashboard update configuration
+# Number of events fetched per page by the dashboard update task.
+DASHBOARD_EVENT_PAGE_SIZE = int(os.getenv("DASHBOARD_EVENT_PAGE_SIZE", "1000"))
+# Where the dashboard update task reads new events from: "http" (the events API) or
+# "orm" (the data provider database, when both services share a deployment).
+DASHBOARD_EVENT_SOURCE = os.getenv("DASHBOARD_EVENT_SOURCE", "http")
+# Number of hotel partitions updated in parallel by the dashboard workers. Partitions
+# have their own checkpoints: the value can be raised from 1, other changes need a
+# rebuild_dashboard run.
+DASHBOARD_PARTITIONS = int(os.getenv("DASHBOARD_PARTITIONS", "1"))
+# How dashboard updates are triggered: "poll" (every 5 seconds by Celery beat) or "push"
+# (when events are ingested, debounced over DASHBOARD_REFRESH_DEBOUNCE_MS milliseconds).
+DASHBOARD_REFRESH_MODE = os.getenv("DASHBOARD_REFRESH_MODE", "poll")
+DASHBOARD_REFRESH_DEBOUNCE_MS = int(os.getenv("DASHBOARD_REFRESH_DEBOUNCE_MS", "500"))
+# Number of seconds the lock of a dashboard update is held without a heartbeat, after a
+# crash. Triggers arriving while the lock is held are coalesced into one more run.
+DASHBOARD_UPDATE_LOCK_LEASE = float(os.getenv("DASHBOARD_UPDATE_LOCK_LEASE", "60"))
+# Maximum number of points returned by the dashboard series endpoint.
+DASHBOARD_SERIES_MAX_POINTS = int(os.getenv("DASHBOARD_SERIES_MAX_POINTS", "3660"))
+# Maximum number of hotels queried at once by the dashboard endpoint.
+DASHBOARD_BATCH_MAX_HOTELS = int(os.getenv("DASHBOARD_BATCH_MAX_HOTELS", "1000"))
+# Number of seconds dashboard responses are cached, in addition to being invalidated
+# whenever the dashboard data of their hotels changes. 0 disables the cache, which is
+# also disabled without a shared cache (CACHE_URL).
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", "300"))
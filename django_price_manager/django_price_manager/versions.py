@@ -0,0 +1,193 @@
+"""
+Module tracking the versions of the data served by the Django Price Manager APIs.
+
+The data of every hotel has a version per namespace ('events', 'dashboard'), stored in
+the Django cache and bumped whenever the hotel's data changes. A global version is
+bumped on every change, for the queries that are not limited to some hotels, and an
+epoch is bumped when the whole data of a namespace is replaced.
+
+Versions are the time of the last change in nanoseconds, so the responses built from
+them can be validated with an ETag and a Last-Modified date without reading the data:
+conditional requests for unchanged data are answered with 304 Not Modified. Only the
+ETag is compared, since Last-Modified dates are truncated to the second.
+
+Versions are bumped by the worker processes and read by the web processes, so they are
+only meaningful in a cache shared by every process. With a cache local to each process
+(the local memory fallback without `CACHE_URL`), no validators are sent and the
+dashboard responses are not cached.
+"""
+
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse, HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Cache backends that keep their entries in the memory of each process
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.dummy.DummyCache",
+    "django.core.cache.backends.locmem.LocMemCache",
+)
+
+
+def cache_is_shared() -> bool:
+    """
+    Return whether the default cache is shared by the web and worker processes.
+
+    Returns:
+        bool: False for the backends local to each process.
+    """
+    return settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS
+
+
+def version_key(namespace: str, hotel_id: Optional[int] = None) -> str:
+    """
+    Return the cache key of the version of a hotel's data.
+
+    Args:
+        namespace (str): The namespace of the data.
+        hotel_id (Optional[int]): The ID of the hotel, None for the global version.
+
+    Returns:
+        str: The cache key.
+    """
+    return f"{namespace}:version:{'all' if hotel_id is None else hotel_id}"
+
+
+def get_versions(namespace: str, hotel_ids: Optional[Iterable[int]]) -> List[int]:
+    """
+    Return the versions of the data of hotels.
+
+    Missing versions, never bumped or evicted, are initialized with the current time, so
+    a reset version never goes back to a version already served.
+
+    Args:
+        namespace (str): The namespace of the data.
+        hotel_ids (Optional[Iterable[int]]): The hotel IDs, None for every hotel.
+
+    Returns:
+        List[int]: The epoch, then the versions in the order of the sorted hotel IDs.
+    """
+    keys = [f"{namespace}:epoch"] + (
+        [version_key(namespace, hotel_id) for hotel_id in sorted(set(hotel_ids))]
+        if hotel_ids
+        else [version_key(namespace)]
+    )
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(namespace: str, hotel_ids: Iterable[int]) -> None:
+    """
+    Record a change of the data of hotels.
+
+    Args:
+        namespace (str): The namespace of the data.
+        hotel_ids (Iterable[int]): The IDs of the hotels whose data changed.
+    """
+    changed_at = time.time_ns()
+    keys = [version_key(namespace, hotel_id) for hotel_id in hotel_ids]
+    cache.set_many(
+        {key: changed_at for key in keys + [version_key(namespace)]}, timeout=None
+    )
+
+
+def bump_epoch(namespace: str) -> None:
+    """
+    Record a change of the whole data of a namespace.
+
+    Args:
+        namespace (str): The namespace of the data.
+    """
+    cache.set(f"{namespace}:epoch", time.time_ns(), timeout=None)
+
+
+def versions_etag(query: Any, versions: List[int]) -> str:
+    """
+    Return the entity tag of the response to a query on versioned data.
+
+    Args:
+        query (Any): The normalized query, JSON serializable.
+        versions (List[int]): The versions of the queried data.
+
+    Returns:
+        str: The entity tag, unquoted.
+    """
+    key = json.dumps([query, versions], sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def versions_last_modified(versions: List[int]) -> datetime:
+    """
+    Return the time of the last change of versioned data.
+
+    Args:
+        versions (List[int]): The versions of the data.
+
+    Returns:
+        datetime: The time of the last change, in UTC.
+    """
+    return datetime.fromtimestamp(max(versions) / 1e9, tz=timezone.utc)
+
+
+def not_modified(
+    request: HttpRequest, etag: str, last_modified: datetime
+) -> Optional[HttpResponse]:
+    """
+    Answer a conditional GET request whose validators still match.
+
+    Only `If-None-Match` is answered. Last-Modified dates have a one-second resolution,
+    so a client comparing them with `If-Modified-Since` would keep its stale response
+    after two changes within the same second.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        etag (str): The entity tag of the current response, unquoted.
+        last_modified (datetime): The time of the last change of the response data.
+
+    Returns:
+        Optional[HttpResponse]: A 304 Not Modified response if the client holds the
+            current response, None otherwise or if the cache is not shared.
+    """
+    if request.method not in ("GET", "HEAD") or not cache_is_shared():
+        return None
+    if "HTTP_IF_NONE_MATCH" not in request.META:
+        return None
+    response = get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=int(last_modified.timestamp()),
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(
+    response: HttpResponseBase, etag: str, last_modified: datetime
+) -> HttpResponseBase:
+    """
+    Set the ETag and Last-Modified headers of a response, if the cache is shared.
+
+    Args:
+        response (HttpResponseBase): The response.
+        etag (str): The entity tag of the response, unquoted.
+        last_modified (datetime): The time of the last change of the response data.
+
+    Returns:
+        HttpResponseBase: The response.
+    """
+    if cache_is_shared():
+        response["ETag"] = quote_etag(etag)
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response